@@ -0,0 +1,93 @@
+"""Recall vs latency of the ANN index against the exact vec0 scan.
+
+Builds a throwaway database of clustered synthetic embeddings, builds the
+configured ANN backend (MIND_ANN_INDEX, default ivf) and, for each nprobe
+value, reports recall@k against exact KNN together with mean/p95 query
+latency, plus the build time and on-disk index size.
+
+    python -m benchmarks.bench_ann --count 50000 --dim 1024 --k 10 --nprobe 4 8 16 32
+
+Needs sqlite-vec (SQLITE_VEC_PATH) and numpy.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from .bench_quantization import _clustered_vectors, _percentile
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mind-bench-")
+    os.environ["MIND_DB_PATH"] = os.path.join(workdir, "mind.db")
+    os.environ["MIND_EMBEDDING_DIM"] = str(args.dim)
+
+    from mind import ann, vectors
+    from mind.db import db_conn, db_read, init_db
+
+    init_db()
+    rng = random.Random(42)
+    print(f"generating {args.count} x {args.dim} vectors ...")
+    data = _clustered_vectors(args.count, args.dim, args.clusters, rng)
+    queries = [
+        vectors.pack([x + rng.gauss(0, 0.05) for x in data[rng.randrange(args.count)]]) for _ in range(args.queries)
+    ]
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO vec_memories(rowid, embedding, type, created_at, user_id, agent_id) VALUES (?,?,?,?,?,?)",
+            ((i + 1, vectors.pack(v), "note", 0, "", "") for i, v in enumerate(data)),
+        )
+    del data
+
+    def timed(fn):
+        latencies, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(fn(query))
+            latencies.append((time.perf_counter() - start) * 1000)
+        return results, latencies
+
+    with db_read() as conn:
+        exact, exact_ms = timed(
+            lambda q: [
+                r[0]
+                for r in conn.execute(
+                    "SELECT rowid FROM vec_memories WHERE embedding MATCH ? AND k = ?", (q, args.k)
+                ).fetchall()
+            ]
+        )
+
+    start = time.perf_counter()
+    built = ann.build()
+    build_s = time.perf_counter() - start
+    index_bytes = sum(p.stat().st_size for p in (ann.INDEX_DIR / built["build"]).iterdir())
+    print(f"{built['backend']} build: {build_s:.1f} s, {index_bytes / 2**20:.1f} MiB on disk")
+
+    print(f"{'config':<14} {'recall':>7} {'mean ms':>8} {'p95 ms':>8}")
+    print(f"{'exact':<14} {1.0:>7.3f} {statistics.mean(exact_ms):>8.2f} {_percentile(exact_ms, 0.95):>8.2f}")
+    with db_read() as conn:
+        index = ann.get_index(conn)
+        for nprobe in args.nprobe:
+            ann.ANN_NPROBE = nprobe
+            approx, ms = timed(lambda q: [i for i, _ in index.search(q, args.k)[0]])
+            recall = statistics.mean(len(set(a) & set(e)) / args.k for a, e in zip(approx, exact))
+            print(f"{'nprobe=' + str(nprobe):<14} {recall:>7.3f} {statistics.mean(ms):>8.2f} "
+                  f"{_percentile(ms, 0.95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Recall vs latency of cluster-routed search against the exact vec0 scan.
+
+Builds a throwaway database of clustered synthetic embeddings, clusters it
+with Mind's rebalance (mini-batch k-means, every vector moved into its
+cluster's vec0 partition) and, for each nprobe value, reports recall@k
+against exact KNN together with mean/p95 query latency, plus the
+clustering time. Set MIND_TENANT_PARTITIONS=true to measure the cluster
+filter column used when vectors are partitioned by tenant instead.
+
+    python -m benchmarks.bench_clusters --count 50000 --dim 1024 --k 10 --nprobe 1 4 8 16
+
+Needs sqlite-vec (SQLITE_VEC_PATH) and numpy.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from .bench_quantization import _clustered_vectors, _percentile
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=50, help="Clusters in the synthetic data.")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mind-bench-")
+    os.environ["MIND_DB_PATH"] = os.path.join(workdir, "mind.db")
+    os.environ["MIND_EMBEDDING_DIM"] = str(args.dim)
+    os.environ.setdefault("MIND_TENANT_PARTITIONS", "false")
+
+    from mind import clustering, vectors
+    from mind.db import db_conn, db_read, init_db
+
+    init_db()
+    rng = random.Random(42)
+    print(f"generating {args.count} x {args.dim} vectors ...")
+    data = _clustered_vectors(args.count, args.dim, args.topics, rng)
+    queries = [
+        vectors.pack([x + rng.gauss(0, 0.05) for x in data[rng.randrange(args.count)]]) for _ in range(args.queries)
+    ]
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO memories(id, uuid, text, created_at, updated_at) VALUES (?, ?, '', 0, 0)",
+            ((i + 1, f"bench-{i}") for i in range(args.count)),
+        )
+        conn.executemany(
+            "INSERT INTO vec_memories(rowid, cluster_id, embedding, type, created_at, user_id, agent_id)"
+            " VALUES (?, 0, ?, 'note', 0, '', '')",
+            ((i + 1, vectors.pack(v)) for i, v in enumerate(data)),
+        )
+    del data
+
+    def timed(fn):
+        latencies, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(fn(query))
+            latencies.append((time.perf_counter() - start) * 1000)
+        return results, latencies
+
+    with db_read() as conn:
+        exact, exact_ms = timed(
+            lambda q: [
+                r[0]
+                for r in conn.execute(
+                    "SELECT rowid FROM vec_memories WHERE embedding MATCH ? AND k = ?", (q, args.k)
+                ).fetchall()
+            ]
+        )
+
+    built = clustering.rebalance()
+    print(f"{built['clusters']} clusters: {built['seconds']:.1f} s")
+
+    print(f"{'config':<14} {'recall':>7} {'mean ms':>8} {'p95 ms':>8}")
+    print(f"{'exact':<14} {1.0:>7.3f} {statistics.mean(exact_ms):>8.2f} {_percentile(exact_ms, 0.95):>8.2f}")
+    with db_read() as conn:
+        for nprobe in args.nprobe:
+            routed, ms = timed(lambda q: [i for i, _ in clustering.search(conn, q, args.k, nprobe, [], [])[0]])
+            recall = statistics.mean(len(set(a) & set(e)) / args.k for a, e in zip(routed, exact))
+            print(f"{'nprobe=' + str(nprobe):<14} {recall:>7.3f} {statistics.mean(ms):>8.2f} "
+                  f"{_percentile(ms, 0.95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
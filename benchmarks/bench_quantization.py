@@ -0,0 +1,133 @@
+"""Recall vs latency of quantized search with full-precision rerank.
+
+Builds a throwaway database of clustered synthetic embeddings, then for
+each quantization (int8/bit, optionally truncated) and rerank factor runs
+the same queries as Mind's search path and reports recall@k against the
+exact float32 scan together with mean/p95 query latency and table size.
+
+    python -m benchmarks.bench_quantization --count 20000 --dim 1024 --k 10
+
+Needs sqlite-vec (SQLITE_VEC_PATH) like the server itself.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+
+def _clustered_vectors(count: int, dim: int, clusters: int, rng: random.Random) -> List[List[float]]:
+    centers = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    out = []
+    for _ in range(count):
+        center = centers[rng.randrange(clusters)]
+        vector = [c + rng.gauss(0, 0.6) for c in center]
+        norm = sum(x * x for x in vector) ** 0.5
+        out.append([x / norm for x in vector])
+    return out
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mind-bench-")
+    os.environ["MIND_DB_PATH"] = os.path.join(workdir, "mind.db")
+    os.environ["MIND_EMBEDDING_DIM"] = str(args.dim)
+    os.environ["MIND_VECTOR_QUANTIZATION"] = "none"
+
+    from mind import quantization, vectors
+    from mind.db import db_conn, db_read, init_db, vec_memories_q_ddl
+
+    init_db()
+    rng = random.Random(42)
+    print(f"generating {args.count} x {args.dim} vectors ...")
+    data = _clustered_vectors(args.count, args.dim, args.clusters, rng)
+    queries = [
+        vectors.pack([x + rng.gauss(0, 0.05) for x in data[rng.randrange(args.count)]]) for _ in range(args.queries)
+    ]
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO vec_memories(rowid, embedding, type, created_at, user_id, agent_id) VALUES (?,?,?,?,?,?)",
+            ((i + 1, vectors.pack(v), "note", 0, "", "") for i, v in enumerate(data)),
+        )
+    del data
+
+    def timed(fn):
+        latencies, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(fn(query))
+            latencies.append((time.perf_counter() - start) * 1000)
+        return results, latencies
+
+    with db_read() as conn:
+        exact, exact_ms = timed(
+            lambda q: [
+                r[0]
+                for r in conn.execute(
+                    "SELECT rowid FROM vec_memories WHERE embedding MATCH ? AND k = ?", (q, args.k)
+                ).fetchall()
+            ]
+        )
+    def db_bytes() -> int:
+        with db_read() as conn:
+            return conn.execute(
+                "SELECT (page_count - freelist_count) * page_size"
+                " FROM pragma_page_count(), pragma_freelist_count(), pragma_page_size()"
+            ).fetchone()[0]
+
+    size = db_bytes()
+    print(f"{'config':<22} {'rerank':>6} {'recall':>7} {'mean ms':>8} {'p95 ms':>8} {'table MiB':>10}")
+    print(f"{'float32 exact':<22} {'-':>6} {1.0:>7.3f} {statistics.mean(exact_ms):>8.2f} "
+          f"{_percentile(exact_ms, 0.95):>8.2f} {size / 2**20:>10.1f}")
+
+    configs = [("int8", args.dim), ("int8", args.dim // 4), ("bit", args.dim), ("bit", args.dim // 4)]
+    for kind, dim in configs:
+        dim -= dim % 8
+        expr = quantization.quantize_sql(kind, dim)
+        with db_conn() as conn:
+            conn.execute("DROP TABLE IF EXISTS vec_memories_q")
+        size = db_bytes()
+        with db_conn() as conn:
+            conn.execute(vec_memories_q_ddl(kind, dim))
+            conn.execute(
+                f"""
+                INSERT INTO vec_memories_q(rowid, embedding, type, created_at, user_id, agent_id)
+                SELECT rowid, {expr.replace('?', 'embedding')}, type, created_at, user_id, agent_id FROM vec_memories
+                """
+            )
+        grown = db_bytes() - size
+        for factor in args.rerank:
+            with db_read() as conn:
+                def run(q):
+                    coarse = conn.execute(
+                        f"SELECT rowid FROM vec_memories_q WHERE embedding MATCH {expr} AND k = ?",
+                        (q, args.k * factor),
+                    ).fetchall()
+                    exact_d = quantization.rerank(conn, q, [r[0] for r in coarse])
+                    return [i for i, _ in sorted(exact_d.items(), key=lambda item: item[1])[: args.k]]
+
+                approx, ms = timed(run)
+            recall = statistics.mean(len(set(a) & set(e)) / args.k for a, e in zip(approx, exact))
+            print(f"{kind + '[' + str(dim) + ']':<22} {factor:>6} {recall:>7.3f} {statistics.mean(ms):>8.2f} "
+                  f"{_percentile(ms, 0.95):>8.2f} {grown / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
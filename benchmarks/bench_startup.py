@@ -0,0 +1,98 @@
+"""Cold-start cost of the Gradio UI mode vs the headless MCP mode.
+
+Each run is a fresh interpreter on a throwaway database. For each mode it
+reports the median time to import the entry module, the time until the
+server object is ready (``create_app()`` vs ``mcp_server.create_server()``,
+both including ``init_db()``), the whole process wall time, the number of
+loaded modules and peak RSS.
+
+    python -m benchmarks.bench_startup --runs 5
+
+Needs sqlite-vec (SQLITE_VEC_PATH), plus gradio for the UI mode and the mcp
+SDK for the headless mode; a mode whose dependencies are missing is reported
+as failed and skipped.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+MODES = {
+    "ui": ("mind.main", "create_app"),
+    "headless": ("mind.mcp_server", "create_server"),
+}
+
+_CHILD = """
+import importlib, json, sys, time
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+getattr(module, {factory!r})()
+ready = time.perf_counter()
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+except ImportError:
+    rss = None
+print(json.dumps({{"import_s": imported - start, "ready_s": ready - start, "modules": len(sys.modules), "rss_mib": rss}}))
+"""
+
+
+def _run(mode: str, env: Dict[str, str]) -> dict:
+    module, factory = MODES[mode]
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(module=module, factory=factory)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_s"] = wall
+    return result
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mind-bench-")
+    env = {
+        **os.environ,
+        "MIND_DATA_DIR": workdir,
+        "MIND_DB_PATH": os.path.join(workdir, "mind.db"),
+        "OPENROUTER_API_KEY": os.environ.get("OPENROUTER_API_KEY", "benchmark"),
+        "MIND_METRICS_PORT": "0",
+    }
+
+    print(f"{'mode':<10} {'import ms':>10} {'ready ms':>10} {'wall ms':>10} {'modules':>8} {'rss MiB':>8}")
+    for mode in args.modes:
+        try:
+            runs = [_run(mode, env) for _ in range(args.runs)]
+        except RuntimeError as exc:
+            print(f"{mode:<10} failed: {exc}")
+            continue
+        rss = [run["rss_mib"] for run in runs if run["rss_mib"] is not None]
+        print(
+            f"{mode:<10} {statistics.median(r['import_s'] for r in runs) * 1000:>10.0f} "
+            f"{statistics.median(r['ready_s'] for r in runs) * 1000:>10.0f} "
+            f"{statistics.median(r['wall_s'] for r in runs) * 1000:>10.0f} "
+            f"{runs[0]['modules']:>8} {(max(rss) if rss else float('nan')):>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tenant-scoped KNN latency vs tenant size and total store size.
+
+Builds a throwaway database where one "small" tenant holds a fixed number
+of vectors and the rest of the store is spread over other tenants, then
+times the same tenant-scoped KNN Mind runs against vec_memories (tenant
+as a partition key) and against a copy that keeps the tenant as a plain
+metadata column, plus an unscoped KNN for reference. Run it with a few
+--count values: the partitioned latency should follow --small, not --count.
+
+    python -m benchmarks.bench_tenants --count 50000 --small 1000 --tenants 50 --dim 1024
+
+Needs sqlite-vec (SQLITE_VEC_PATH).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from .bench_quantization import _clustered_vectors, _percentile
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000, help="Vectors across all tenants.")
+    parser.add_argument("--small", type=int, default=500, help="Vectors of the tenant being searched.")
+    parser.add_argument("--tenants", type=int, default=20, help="Other tenants sharing the store.")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mind-bench-")
+    os.environ["MIND_DB_PATH"] = os.path.join(workdir, "mind.db")
+    os.environ["MIND_EMBEDDING_DIM"] = str(args.dim)
+    os.environ["MIND_TENANT_PARTITIONS"] = "true"
+
+    from mind import vectors
+    from mind.db import db_conn, db_read, init_db
+
+    init_db()
+    rng = random.Random(42)
+    print(f"generating {args.count} x {args.dim} vectors ...")
+    data = _clustered_vectors(args.count, args.dim, 50, rng)
+    owners = ["small" if i < args.small else f"tenant-{rng.randrange(args.tenants)}" for i in range(args.count)]
+    queries = [
+        vectors.pack([x + rng.gauss(0, 0.05) for x in data[rng.randrange(args.count)]]) for _ in range(args.queries)
+    ]
+    rows = [(i + 1, owner, vectors.pack(v)) for i, (owner, v) in enumerate(zip(owners, data))]
+    del data
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO vec_memories(rowid, cluster_id, user_id, agent_id, embedding, type, created_at)"
+            " VALUES (?, 0, ?, '', ?, 'note', 0)",
+            rows,
+        )
+        conn.execute(
+            f"CREATE VIRTUAL TABLE vec_flat USING vec0(embedding FLOAT[{args.dim}], user_id TEXT, chunk_size=256)"
+        )
+        conn.executemany("INSERT INTO vec_flat(rowid, user_id, embedding) VALUES (?, ?, ?)", rows)
+    del rows
+
+    def timed(conn, sql, *params) -> List[float]:
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            conn.execute(sql, (query, args.k, *params)).fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    knn = "SELECT rowid, distance FROM {} WHERE embedding MATCH ? AND k = ?"
+    print(f"{'config':<28} {'mean ms':>8} {'p95 ms':>8}")
+    with db_read() as conn:
+        for label, sql, params in (
+            ("unscoped", knn.format("vec_memories"), ()),
+            ("small, metadata filter", knn.format("vec_flat") + " AND user_id = ?", ("small",)),
+            ("small, partition key", knn.format("vec_memories") + " AND user_id = ?", ("small",)),
+        ):
+            ms = timed(conn, sql, *params)
+            print(f"{label:<28} {statistics.mean(ms):>8.2f} {_percentile(ms, 0.95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Microbenchmark: JSON text vs packed float32 embeddings.
+
+Compares what Mind used to hand sqlite-vec (``json.dumps`` of a float list)
+with the packed little-endian float32 buffers it uses now, plus the cost of
+decoding an OpenRouter response in both ``float`` and ``base64`` encodings.
+
+    python -m benchmarks.bench_vector_encoding --dim 4096 --count 200
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Callable, List
+
+from mind import vectors
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> tuple[float, int, int]:
+    """Return (seconds per call, peak traced bytes, bytes retained by the result)."""
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak, retained
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--count", type=int, default=100, help="embeddings per simulated response")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    floats = [[rng.uniform(-1, 1) for _ in range(args.dim)] for _ in range(args.count)]
+    packed = [vectors.pack(v) for v in floats]
+    float_body = json.dumps({"data": [{"index": i, "embedding": v} for i, v in enumerate(floats)]})
+    b64_body = json.dumps(
+        {"data": [{"index": i, "embedding": base64.b64encode(p).decode()} for i, p in enumerate(packed)]}
+    )
+
+    cases = {
+        "encode: json.dumps(list)": lambda: [json.dumps(v) for v in floats],
+        "encode: pack float32": lambda: [vectors.pack(v) for v in floats],
+        "decode float response -> lists": lambda: [i["embedding"] for i in json.loads(float_body)["data"]],
+        "decode float response -> packed": lambda: [vectors.decode(i["embedding"]) for i in json.loads(float_body)["data"]],
+        "decode base64 response -> packed": lambda: [vectors.decode(i["embedding"]) for i in json.loads(b64_body)["data"]],
+    }
+
+    print(f"dim={args.dim} count={args.count} repeat={args.repeat} numpy={'yes' if vectors.np is not None else 'no'}")
+    print(f"{'case':<36} {'ms/batch':>10} {'peak MiB':>10} {'kept MiB':>10}")
+    for name, fn in cases.items():
+        seconds, peak, retained = _measure(fn, args.repeat)
+        print(f"{name:<36} {seconds * 1000:>10.2f} {peak / 2**20:>10.2f} {retained / 2**20:>10.2f}")
+    json_bytes = sum(len(json.dumps(v)) for v in floats) / args.count
+    print(f"payload per vector: json={json_bytes / 1024:.1f} KiB packed={args.dim * 4 / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Synthetic memory corpus for benchmarks.
+
+Memories are short sentences drawn from a handful of topics, so texts on
+the same topic share words (and, through the mock embedder, vectors). Each
+has a type, 1-4 tags from a Zipf-like tag distribution, an importance and
+a ``created_at`` spread over the past year. Output is deterministic for a
+given seed.
+
+    python -m benchmarks.corpus --size 100k --out corpus.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Iterator, List
+
+TYPES = ("fact", "preference", "task", "journal", "note")
+TOPICS = {
+    "cooking": "recipe garlic oven simmer basil pasta dough roast spice sauce",
+    "travel": "flight hotel passport train itinerary museum beach visa luggage",
+    "work": "meeting deadline roadmap review budget hiring launch sprint client",
+    "health": "sleep running workout doctor vitamin stretch diet blood pressure",
+    "finance": "invoice mortgage savings tax dividend budget account transfer loan",
+    "music": "guitar chord concert album playlist melody rhythm piano lyrics",
+    "garden": "tomato compost seedling prune soil watering mulch orchard weeds",
+    "code": "python sqlite index query latency cache deploy refactor benchmark",
+}
+FILLER = "the a my with for before after today tomorrow remember always never about again new old".split()
+TAGS = [f"tag{i}" for i in range(200)]
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(value: str) -> int:
+    """Accept a plain count or one of 10k/100k/1m."""
+    return SIZES.get(value.lower()) or int(value)
+
+
+def generate(count: int, *, seed: int = 0, span_days: int = 365) -> Iterator[dict]:
+    """Yield ``count`` memory dicts accepted by ``create_memories_batch``."""
+    rng = random.Random(seed)
+    topics = {name: words.split() for name, words in TOPICS.items()}
+    names = list(topics)
+    now = int(time.time())
+    # Zipf-like weights: a few tags are very common, most are rare.
+    tag_weights = [1.0 / (rank + 1) for rank in range(len(TAGS))]
+    for i in range(count):
+        topic = rng.choice(names)
+        words = rng.choices(topics[topic], k=rng.randint(5, 12)) + rng.choices(FILLER, k=rng.randint(2, 6))
+        rng.shuffle(words)
+        tags = {topic, *rng.choices(TAGS, weights=tag_weights, k=rng.randint(0, 3))}
+        yield {
+            "text": f"{' '.join(words)} #{i}",
+            "type": rng.choice(TYPES),
+            "tags": sorted(tags),
+            "importance": round(rng.random(), 2),
+            "created_at": now - rng.randrange(span_days * 86400),
+        }
+
+
+def queries(count: int, *, seed: int = 1) -> List[str]:
+    """Search queries in the corpus vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = [word for words in TOPICS.values() for word in words.split()]
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(2, 5))) for _ in range(count)]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="10k", help="count or 10k/100k/1m")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="JSONL file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for memory in generate(parse_size(args.size), seed=args.seed):
+            out.write(json.dumps(memory) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
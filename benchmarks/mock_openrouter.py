@@ -0,0 +1,184 @@
+"""Local stand-in for the OpenRouter endpoints Mind calls.
+
+* ``POST /embeddings`` returns deterministic unit vectors of ``dim``
+  dimensions. A text's vector is the normalized mean of per-word vectors
+  (seeded from each word's hash), so texts sharing words land close
+  together and searches behave like they do on real embeddings.
+  ``encoding_format="base64"`` is honoured.
+* ``POST /chat/completions`` returns a canned classification JSON.
+
+Every response waits ``latency_ms`` (plus up to ``jitter_ms`` more) first,
+to stand in for network and model time.
+
+    python -m benchmarks.mock_openrouter --port 8999 --dim 1024 --latency-ms 40
+
+then point Mind at it with ``OPENROUTER_BASE=http://127.0.0.1:8999``.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+CLASSIFICATION = {
+    "type": "fact",
+    "tags": ["benchmark"],
+    "importance": 0.5,
+    "summary": "Synthetic memory used for benchmarking.",
+}
+
+
+class MockOpenRouter:
+    """Threaded HTTP server; use as a context manager or call start()/stop()."""
+
+    def __init__(
+        self,
+        dim: int,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+    ) -> None:
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = {"embeddings": 0, "chat": 0, "inputs": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockOpenRouter":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-openrouter", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread (standalone use)."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOpenRouter":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def embed(self, text: str) -> bytes:
+        """Packed little-endian float32 embedding of ``text``."""
+        words = re.findall(r"\w+", text.lower()) or [text]
+        if np is not None:
+            total = np.zeros(self.dim, dtype=np.float32)
+            for word in words:
+                total += _word_vector(word, self.dim)
+            return (total / np.linalg.norm(total)).astype("<f4").tobytes()
+        total = [0.0] * self.dim
+        for word in words:
+            for i, value in enumerate(_word_vector(word, self.dim)):
+                total[i] += value
+        norm = sum(x * x for x in total) ** 0.5
+        return struct.pack(f"<{self.dim}f", *(x / norm for x in total))
+
+    def _delay(self) -> None:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _handler(self) -> type:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, Nagle + delayed ACK adds ~40 ms.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                mock._delay()
+                if self.path.endswith("/embeddings"):
+                    inputs: List[str] = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                    with mock._lock:
+                        mock.requests["embeddings"] += 1
+                        mock.requests["inputs"] += len(inputs)
+                    data = []
+                    for index, text in enumerate(inputs):
+                        packed = mock.embed(text)
+                        if body.get("encoding_format") == "base64":
+                            embedding = base64.b64encode(packed).decode()
+                        else:
+                            embedding = list(struct.unpack(f"<{mock.dim}f", packed))
+                        data.append({"index": index, "embedding": embedding})
+                    payload = {"data": data, "model": body.get("model")}
+                elif self.path.endswith("/chat/completions"):
+                    with mock._lock:
+                        mock.requests["chat"] += 1
+                    payload = {"choices": [{"message": {"role": "assistant", "content": json.dumps(CLASSIFICATION)}}]}
+                else:
+                    self.send_error(404)
+                    return
+                raw = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        return Handler
+
+
+@lru_cache(maxsize=65536)
+def _word_vector(word: str, dim: int):
+    seed = int.from_bytes(hashlib.sha256(word.encode()).digest()[:8], "little")
+    if np is not None:
+        return np.random.default_rng(seed).standard_normal(dim, dtype=np.float32)
+    rng = random.Random(seed)
+    return tuple(rng.gauss(0, 1) for _ in range(dim))
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    mock = MockOpenRouter(
+        args.dim, host=args.host, port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms
+    )
+    print(f"mock OpenRouter on {mock.base_url} (dim={args.dim}, latency={args.latency_ms}ms)")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
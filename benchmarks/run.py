@@ -0,0 +1,261 @@
+"""End-to-end benchmark of the memory engine against a mock OpenRouter.
+
+Starts :class:`benchmarks.mock_openrouter.MockOpenRouter`, points a
+throwaway database at it, bulk-loads a synthetic corpus and then times
+``create_memory``, ``search_memories`` (vector/lexical/hybrid, filtered),
+``update_memory`` and ``delete_memory``. For every operation it reports
+throughput, p50/p95/p99 latency, the database size afterwards and the
+process's peak RSS so far. No network access or API key is needed.
+
+    python -m benchmarks.run --size 10k --dim 1024 --latency-ms 30 --json results.json
+    python -m benchmarks.run --size 10k --baseline results.json   # show p95 change
+
+Needs sqlite-vec (SQLITE_VEC_PATH) like the server itself.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from . import corpus
+from .mock_openrouter import MockOpenRouter
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def _peak_rss_mib() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _disk_mib(db_path: Path) -> float:
+    paths = [db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")]
+    index_dir = Path(f"{db_path}.ann")
+    if index_dir.exists():
+        paths.extend(p for p in index_dir.rglob("*") if p.is_file())
+    return sum(p.stat().st_size for p in paths if p.exists()) / 2**20
+
+
+class Report:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self.rows: List[dict] = []
+
+    def add(self, name: str, latencies_ms: List[float], wall_s: float, items: Optional[int] = None) -> None:
+        count = items if items is not None else len(latencies_ms)
+        row = {
+            "op": name,
+            "count": count,
+            "throughput": count / wall_s if wall_s else 0.0,
+            "p50_ms": _percentile(latencies_ms, 0.50),
+            "p95_ms": _percentile(latencies_ms, 0.95),
+            "p99_ms": _percentile(latencies_ms, 0.99),
+            "mean_ms": statistics.mean(latencies_ms),
+            "db_mib": _disk_mib(self.db_path),
+            "peak_rss_mib": _peak_rss_mib(),
+        }
+        self.rows.append(row)
+        print(self._format(row), flush=True)
+
+    @staticmethod
+    def header() -> str:
+        return (
+            f"{'operation':<24} {'count':>8} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'db MiB':>8} {'rss MiB':>8}"
+        )
+
+    @staticmethod
+    def _format(row: dict, baseline: Optional[dict] = None) -> str:
+        rss = f"{row['peak_rss_mib']:>8.0f}" if row["peak_rss_mib"] is not None else f"{'-':>8}"
+        line = (
+            f"{row['op']:<24} {row['count']:>8} {row['throughput']:>9.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['db_mib']:>8.1f} {rss}"
+        )
+        if baseline and baseline.get("p95_ms"):
+            line += f"  p95 {(row['p95_ms'] / baseline['p95_ms'] - 1) * 100:+.0f}%"
+        return line
+
+    def compare(self, baseline_rows: List[dict]) -> None:
+        previous = {row["op"]: row for row in baseline_rows}
+        print("\nagainst baseline:")
+        print(self.header())
+        for row in self.rows:
+            print(self._format(row, previous.get(row["op"])))
+
+
+async def _timed(
+    calls: List[Callable[[], Awaitable[object]]], concurrency: int
+) -> tuple[List[float], float]:
+    """Run the calls with bounded concurrency; return per-call latencies (ms) and wall time (s)."""
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    latencies: List[float] = []
+
+    async def run(call: Callable[[], Awaitable[object]]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(call) for call in calls))
+    return latencies, time.perf_counter() - start
+
+
+async def _bench(args: argparse.Namespace, report: Report) -> None:
+    from mind.openrouter import aclose_client
+
+    try:
+        await _operations(args, report)
+    finally:
+        await aclose_client()
+
+
+async def _operations(args: argparse.Namespace, report: Report) -> None:
+    from mind import memory_engine
+    from mind.db import db_read
+
+    rng = random.Random(7)
+    size = corpus.parse_size(args.size)
+
+    # Bulk load: one latency sample per create_memories_batch call.
+    items = corpus.generate(size)
+    batch_latencies: List[float] = []
+    start = time.perf_counter()
+    loaded = 0
+    while loaded < size:
+        batch = [next(items) for _ in range(min(args.batch_size, size - loaded))]
+        t0 = time.perf_counter()
+        result = await memory_engine.create_memories_batch(batch, source="benchmark", use_ai=args.ai)
+        batch_latencies.append((time.perf_counter() - t0) * 1000)
+        if result["failed"]:
+            raise RuntimeError(f"bulk load failed: {result['failed'][:3]}")
+        loaded += len(batch)
+        print(f"\rloaded {loaded}/{size}", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    report.add(f"create_batch[{args.batch_size}]", batch_latencies, time.perf_counter() - start, items=size)
+
+    with db_read() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM memories WHERE deleted_at IS NULL")]
+
+    extra = list(corpus.generate(args.ops, seed=99))
+    latencies, wall = await _timed(
+        [
+            (lambda spec=spec: memory_engine.create_memory(spec["text"], source="benchmark", use_ai=args.ai))
+            for spec in extra
+        ],
+        args.concurrency,
+    )
+    report.add("create_memory", latencies, wall)
+
+    queries = corpus.queries(args.ops)
+    month_ago = int(time.time()) - 30 * 86400
+    searches: Dict[str, Callable[[str], Awaitable[object]]] = {
+        "search vector": lambda q: memory_engine.search_memories(q, top_k=args.k, mode="vector"),
+        "search lexical": lambda q: memory_engine.search_memories(q, top_k=args.k, mode="lexical"),
+        "search hybrid": lambda q: memory_engine.search_memories(q, top_k=args.k, mode="hybrid"),
+        "search vector+type": lambda q: memory_engine.search_memories(
+            q, top_k=args.k, mode="vector", type_filter="task"
+        ),
+        "search vector+tag": lambda q: memory_engine.search_memories(q, top_k=args.k, mode="vector", tags=["tag0"]),
+        "search vector+rare tag": lambda q: memory_engine.search_memories(
+            q, top_k=args.k, mode="vector", tags=["tag150"]
+        ),
+        "search vector+since": lambda q: memory_engine.search_memories(
+            q, top_k=args.k, mode="vector", since=month_ago
+        ),
+    }
+    for name, search in searches.items():
+        latencies, wall = await _timed([(lambda q=q: search(q)) for q in queries], args.concurrency)
+        report.add(name, latencies, wall)
+
+    targets = rng.sample(ids, min(args.ops, len(ids)))
+    latencies, wall = await _timed(
+        [
+            (lambda memory_id=memory_id, i=i: memory_engine.update_memory(memory_id, text=f"{queries[i]} edited #{i}"))
+            for i, memory_id in enumerate(targets)
+        ],
+        args.concurrency,
+    )
+    report.add("update_memory", latencies, wall)
+
+    latencies, wall = await _timed(
+        [(lambda memory_id=memory_id: memory_engine.delete_memory(memory_id)) for memory_id in targets],
+        args.concurrency,
+    )
+    report.add("delete_memory", latencies, wall)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="10k", help="corpus size: count or 10k/100k/1m")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--ops", type=int, default=200, help="calls per timed operation")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected mock OpenRouter latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--ai", action="store_true", help="classify through the mock chat endpoint")
+    parser.add_argument("--db", help="database path (default: a temporary directory)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json output to compare p95 latency against")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db) if args.db else Path(tempfile.mkdtemp(prefix="mind-bench-")) / "mind.db"
+    mock = MockOpenRouter(args.dim, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    os.environ.update(
+        {
+            "MIND_DATA_DIR": str(db_path.parent),
+            "MIND_DB_PATH": str(db_path),
+            "MIND_EMBEDDING_DIM": str(args.dim),
+            "MIND_EMBEDDING_ENCODING": "base64",
+            "OPENROUTER_BASE": mock.base_url,
+            "OPENROUTER_API_KEY": "benchmark",
+            # Measure the engine, not the embedding cache.
+            "MIND_EMBED_CACHE": "false",
+            "MIND_ENRICHMENT_MODE": "sync",
+        }
+    )
+
+    from mind.db import close_pool, init_db
+
+    init_db()
+    report = Report(db_path)
+    print(f"corpus={args.size} dim={args.dim} latency={args.latency_ms}ms db={db_path}")
+    print(Report.header())
+    try:
+        asyncio.run(_bench(args, report))
+    finally:
+        close_pool()
+        mock.stop()
+    print(f"mock requests: {mock.requests}")
+
+    if args.json:
+        meta = {key: getattr(args, key) for key in ("size", "dim", "ops", "k", "batch_size", "concurrency", "latency_ms")}
+        Path(args.json).write_text(json.dumps({"config": meta, "results": report.rows}, indent=2))
+    if args.baseline:
+        report.compare(json.loads(Path(args.baseline).read_text())["results"])
+
+
+if __name__ == "__main__":
+    main()
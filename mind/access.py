@@ -0,0 +1,89 @@
+"""Write-behind tracking of ``memories.last_accessed_at``.
+
+Stamping each search hit inline would turn every read into a write. Reads
+call ``record`` instead, which only notes the ids in memory; the buffer is
+written as one batched UPDATE on the pool's writer thread after
+MIND_ACCESS_FLUSH_SECONDS, as soon as MIND_ACCESS_FLUSH_BATCH memories are
+pending, and when the pool closes. A crash loses at most one interval of
+access times, which only feed ranking and archiving.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import ACCESS_FLUSH_BATCH, ACCESS_FLUSH_SECONDS, ACCESS_TRACKING
+from .db import db_conn, now_ts, on_close, submit_write
+from .metrics import ACCESS_EVENTS, stage
+
+_lock = threading.Lock()
+# memory id -> latest access time not yet written.
+_pending: Dict[int, int] = {}
+_timer: Optional[threading.Timer] = None
+
+
+def record(memory_ids: Iterable[int]) -> None:
+    """Note that these memories were just read."""
+    if not ACCESS_TRACKING:
+        return
+    global _timer
+    ts = now_ts()
+    with _lock:
+        before = len(_pending)
+        for memory_id in memory_ids:
+            _pending[memory_id] = ts
+        ACCESS_EVENTS.inc(len(_pending) - before, kind="buffered")
+        full = len(_pending) >= ACCESS_FLUSH_BATCH
+        if not full and _pending and _timer is None:
+            _timer = threading.Timer(ACCESS_FLUSH_SECONDS, flush)
+            _timer.daemon = True
+            _timer.start()
+    if full:
+        flush()
+
+
+def _take() -> List[Tuple[int, int, int]]:
+    global _pending, _timer
+    with _lock:
+        batch, _pending = _pending, {}
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    return [(ts, memory_id, ts) for memory_id, ts in batch.items()]
+
+
+def _write(conn: sqlite3.Connection, batch: List[Tuple[int, int, int]]) -> int:
+    with stage("access.flush"):
+        # Never moves a stamp backwards (a restore may have set a later one).
+        conn.executemany(
+            "UPDATE memories SET last_accessed_at = ?"
+            " WHERE id = ? AND (last_accessed_at IS NULL OR last_accessed_at < ?)",
+            batch,
+        )
+    ACCESS_EVENTS.inc(len(batch), kind="written")
+    return len(batch)
+
+
+def flush() -> Optional[Future]:
+    """Queue the pending access times as one write; returns its future (None if nothing was pending)."""
+    batch = _take()
+    if not batch:
+        return None
+    return submit_write(_write, batch)
+
+
+def pending() -> int:
+    with _lock:
+        return len(_pending)
+
+
+def _drain() -> None:
+    batch = _take()
+    if batch:
+        with db_conn() as conn:
+            _write(conn, batch)
+
+
+on_close(_drain)
@@ -0,0 +1,473 @@
+"""Approximate nearest-neighbour index over vec_memories.
+
+vec0 answers ``embedding MATCH ?`` with an exact scan, so latency grows
+with the corpus. With ``MIND_ANN_INDEX`` naming a registered backend
+(``ivf`` by default, needs NumPy) and at least ``MIND_ANN_MIN_ROWS``
+vectors stored, vector searches go through an approximate index instead.
+
+SQLite stays the source of truth:
+
+* The index is built from a snapshot of vec_memories and persisted under
+  ``<DB_PATH>.ann/<build id>/`` as ``.npy`` files memory-mapped on load.
+  ``mind_meta['ann']`` names the current build and the snapshot position.
+* Every vector write appends the memory id to ``ann_log`` in the same
+  transaction, as long as a build exists or is under way (with neither,
+  nothing would replay or trim the log). Before each search the index replays entries newer than
+  what it has seen: changed vectors are masked out of the snapshot and
+  kept in a small in-memory delta that is scanned exactly.
+* A missing or unreadable build, or a delta larger than
+  ``MIND_ANN_REBUILD_FRACTION`` of the snapshot, starts a rebuild in a
+  background thread; searches scan exactly until it is ready.
+  ``python -m mind.cli ann-build`` builds in the foreground.
+
+``MIND_SEARCH_EXACT=true`` bypasses the index (it is still maintained),
+e.g. to measure its recall.
+"""
+from __future__ import annotations
+
+import json
+import math
+import shutil
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+from uuid import uuid4
+
+from .config import (
+    ANN_INDEX,
+    ANN_MIN_ROWS,
+    ANN_NLIST,
+    ANN_NPROBE,
+    ANN_REBUILD_FRACTION,
+    DB_PATH,
+    MIND_EMBEDDING_DIM,
+)
+from .db import db_conn, get_connection, get_meta, set_meta
+from .vectors import Vector, np
+
+INDEX_DIR = Path(f"{DB_PATH}.ann")
+_META_KEY = "ann"
+# Set while a build takes its snapshot, so writes made meanwhile are logged for it.
+_BUILDING_KEY = "ann_building"
+# Seconds between corpus size checks while no index exists, and before retrying a failed build.
+_SIZE_CHECK_INTERVAL = 60.0
+_RETRY_AFTER = 300.0
+_CHUNK = 4096
+# Upper bound on the k-means training sample.
+_SAMPLE_BYTES = 256 * 1024 * 1024
+
+_BACKENDS: Dict[str, Type["ANNIndex"]] = {}
+
+
+def register_backend(name: str) -> Callable[[Type["ANNIndex"]], Type["ANNIndex"]]:
+    """Class decorator making an ANNIndex implementation selectable via MIND_ANN_INDEX."""
+
+    def decorator(cls: Type["ANNIndex"]) -> Type["ANNIndex"]:
+        cls.name = name
+        _BACKENDS[name] = cls
+        return cls
+
+    return decorator
+
+
+def enabled() -> bool:
+    return ANN_INDEX != "none" and np is not None
+
+
+class ANNIndex(ABC):
+    """A read-only index over a snapshot of (id, vector) pairs, stored in a directory."""
+
+    name = ""
+
+    @classmethod
+    @abstractmethod
+    def build(cls, path: Path, ids: "np.ndarray", vectors: "np.ndarray") -> None:
+        """Write an index for ``vectors`` (N x D float32, may be a memmap) into ``path``."""
+
+    @classmethod
+    @abstractmethod
+    def load(cls, path: Path) -> "ANNIndex":
+        """Open an index written by ``build``."""
+
+    @abstractmethod
+    def search(self, query: "np.ndarray", k: int, exclude: Optional["np.ndarray"]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Up to k approximate nearest (ids, squared L2 distances), skipping ids in ``exclude``.
+
+        Fewer than k results means every indexed vector was considered.
+        """
+
+
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray") -> "np.ndarray":
+    """Nearest centroid of every vector, computed in bounded chunks."""
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _CHUNK):
+        chunk = np.asarray(vectors[start : start + _CHUNK], dtype=np.float32)
+        labels[start : start + len(chunk)] = np.argmin(centroid_norms - 2.0 * chunk @ centroids.T, axis=1)
+    return labels
+
+
+def _kmeans(vectors: "np.ndarray", nlist: int, iterations: int = 10, per_list: int = 64) -> "np.ndarray":
+    """Lloyd's k-means on a sample of up to ``nlist * per_list`` vectors (at most _SAMPLE_BYTES)."""
+    rng = np.random.default_rng(0)
+    n, dim = vectors.shape
+    size = min(n, max(nlist * 4, min(nlist * per_list, _SAMPLE_BYTES // (dim * 4))))
+    sample_ids = np.sort(rng.choice(n, size=size, replace=False))
+    sample = np.asarray(vectors[sample_ids], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        counts = np.bincount(labels, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        filled = counts > 0
+        # Empty lists keep their previous centroid.
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+@register_backend("ivf")
+class IVFIndex(ANNIndex):
+    """Inverted file: k-means centroids, vectors stored contiguously per list.
+
+    A query probes the ``MIND_ANN_NPROBE`` nearest lists, and more if they
+    hold fewer than k usable vectors.
+    """
+
+    def __init__(
+        self,
+        centroids: "np.ndarray",
+        offsets: "np.ndarray",
+        ids: "np.ndarray",
+        vectors: "np.ndarray",
+        norms: "np.ndarray",
+    ) -> None:
+        self.centroids = centroids
+        self.centroid_norms = (centroids * centroids).sum(axis=1)
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.norms = norms
+
+    @classmethod
+    def build(cls, path: Path, ids: "np.ndarray", vectors: "np.ndarray") -> None:
+        n = len(ids)
+        nlist = min(ANN_NLIST or max(1, int(math.sqrt(n))), n)
+        centroids = _kmeans(vectors, nlist)
+        labels = _assign(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=nlist))]).astype(np.int64)
+
+        grouped = np.lib.format.open_memmap(path / "vectors.npy", mode="w+", dtype=np.float32, shape=(n, vectors.shape[1]))
+        norms = np.empty(n, dtype=np.float32)
+        for start in range(0, n, _CHUNK):
+            rows = order[start : start + _CHUNK]
+            ascending = np.argsort(rows)
+            block = np.empty((len(rows), vectors.shape[1]), dtype=np.float32)
+            # Read the snapshot in row order, then lay the rows out by list.
+            block[ascending] = vectors[rows[ascending]]
+            grouped[start : start + len(block)] = block
+            norms[start : start + len(block)] = (block * block).sum(axis=1)
+        grouped.flush()
+        del grouped
+        np.save(path / "centroids.npy", centroids)
+        np.save(path / "offsets.npy", offsets)
+        np.save(path / "ids.npy", ids[order])
+        np.save(path / "norms.npy", norms)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        return cls(
+            centroids=np.load(path / "centroids.npy"),
+            offsets=np.load(path / "offsets.npy"),
+            ids=np.load(path / "ids.npy", mmap_mode="r"),
+            vectors=np.load(path / "vectors.npy", mmap_mode="r"),
+            norms=np.load(path / "norms.npy", mmap_mode="r"),
+        )
+
+    def search(self, query: "np.ndarray", k: int, exclude: Optional["np.ndarray"]) -> Tuple["np.ndarray", "np.ndarray"]:
+        query_norm = float(query @ query)
+        lists = np.argsort(self.centroid_norms - 2.0 * self.centroids @ query)
+        found_ids: List["np.ndarray"] = []
+        found_dists: List["np.ndarray"] = []
+        found = 0
+        for probed, list_no in enumerate(lists):
+            if probed >= ANN_NPROBE and found >= k:
+                break
+            start, end = self.offsets[list_no], self.offsets[list_no + 1]
+            if start == end:
+                continue
+            ids = self.ids[start:end]
+            dists = self.norms[start:end] - 2.0 * (self.vectors[start:end] @ query) + query_norm
+            if exclude is not None:
+                keep = ~np.isin(ids, exclude)
+                ids, dists = ids[keep], dists[keep]
+            found_ids.append(ids)
+            found_dists.append(dists)
+            found += len(ids)
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids = np.concatenate(found_ids)
+        dists = np.concatenate(found_dists)
+        if len(ids) > k:
+            top = np.argpartition(dists, k - 1)[:k]
+            ids, dists = ids[top], dists[top]
+        return ids, dists
+
+
+class LiveIndex:
+    """A loaded build plus the vector changes logged since its snapshot."""
+
+    def __init__(self, backend: ANNIndex, build_id: str, seq: int, size: int) -> None:
+        self.backend = backend
+        self.build_id = build_id
+        self.seq = seq
+        self.size = size
+        self._delta: Dict[int, "np.ndarray"] = {}
+        self._changed: set[int] = set()
+        self._lock = threading.Lock()
+        self._view: Optional[Tuple[Optional["np.ndarray"], "np.ndarray", "np.ndarray"]] = None
+
+    @property
+    def changed(self) -> int:
+        return len(self._changed)
+
+    def catch_up(self, conn: sqlite3.Connection) -> None:
+        """Replay ``ann_log`` entries newer than the ones already applied."""
+        rows = conn.execute("SELECT seq, memory_id FROM ann_log WHERE seq > ? ORDER BY seq", (self.seq,)).fetchall()
+        if not rows:
+            return
+        memory_ids = list(dict.fromkeys(row[1] for row in rows))
+        # Read after the log, so the vectors are at least as new as the entries.
+        current: Dict[int, bytes] = {}
+        for start in range(0, len(memory_ids), 500):
+            chunk = memory_ids[start : start + 500]
+            current.update(
+                conn.execute(
+                    f"SELECT rowid, embedding FROM vec_memories WHERE rowid IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            )
+        with self._lock:
+            if rows[-1][0] <= self.seq:
+                return
+            for memory_id in memory_ids:
+                self._changed.add(memory_id)
+                if memory_id in current:
+                    self._delta[memory_id] = np.frombuffer(current[memory_id], dtype="<f4")
+                else:
+                    self._delta.pop(memory_id, None)
+            self.seq = rows[-1][0]
+            self._view = None
+
+    def _snapshot(self) -> Tuple[Optional["np.ndarray"], "np.ndarray", "np.ndarray"]:
+        with self._lock:
+            if self._view is None:
+                exclude = np.fromiter(self._changed, dtype=np.int64) if self._changed else None
+                delta_ids = np.fromiter(self._delta, dtype=np.int64, count=len(self._delta))
+                delta_vectors = (
+                    np.stack(list(self._delta.values()))
+                    if self._delta
+                    else np.empty((0, MIND_EMBEDDING_DIM), dtype=np.float32)
+                )
+                self._view = (exclude, delta_ids, delta_vectors)
+            return self._view
+
+    def search(self, query_embedding: Vector, k: int) -> Tuple[List[Tuple[int, float]], bool]:
+        """Nearest (rowid, L2 distance) pairs and whether fewer than k vectors exist."""
+        query = np.frombuffer(query_embedding, dtype="<f4").astype(np.float32)
+        exclude, delta_ids, delta_vectors = self._snapshot()
+        ids, dists = self.backend.search(query, k, exclude)
+        if len(delta_ids):
+            diff = delta_vectors - query
+            ids = np.concatenate([ids, delta_ids])
+            dists = np.concatenate([dists, (diff * diff).sum(axis=1)])
+        order = np.argsort(dists)[:k]
+        matches = [(int(ids[i]), math.sqrt(max(float(dists[i]), 0.0))) for i in order]
+        return matches, len(matches) < k
+
+
+_live: Optional[LiveIndex] = None
+_live_lock = threading.Lock()
+_build_lock = threading.Lock()
+_next_size_check = 0.0
+_retry_at = 0.0
+_last_error: Optional[str] = None
+
+
+def _backend_class() -> Type[ANNIndex]:
+    try:
+        return _BACKENDS[ANN_INDEX]
+    except KeyError:
+        raise ValueError(f"Unknown ANN index {ANN_INDEX!r}; expected one of {', '.join(_BACKENDS)} or 'none'") from None
+
+
+def _read_meta(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+    value = get_meta(conn, _META_KEY)
+    if value is None:
+        return None
+    meta = json.loads(value)
+    if meta.get("backend") != ANN_INDEX or meta.get("dim") != MIND_EMBEDDING_DIM:
+        return None
+    return meta
+
+
+def _load(meta: Dict[str, Any]) -> Optional[LiveIndex]:
+    global _live
+    with _live_lock:
+        if _live is not None and _live.build_id == meta["build"]:
+            return _live
+        path = INDEX_DIR / meta["build"]
+        try:
+            backend = _backend_class().load(path)
+        except (OSError, ValueError):
+            return None
+        _live = LiveIndex(backend, meta["build"], meta["seq"], meta["size"])
+        return _live
+
+
+def log_changes(conn: sqlite3.Connection, memory_ids: Sequence[int]) -> None:
+    """Record that the vectors of ``memory_ids`` were written or removed (call inside the write)."""
+    if not memory_ids or not enabled():
+        return
+    tracked = conn.execute(
+        "SELECT 1 FROM mind_meta WHERE key IN (?, ?)", (_META_KEY, _BUILDING_KEY)
+    ).fetchone()
+    if tracked is not None:
+        conn.executemany("INSERT INTO ann_log(memory_id) VALUES (?)", [(i,) for i in memory_ids])
+
+
+def get_index(conn: sqlite3.Connection) -> Optional[LiveIndex]:
+    """The current index caught up with ``ann_log``, or None to scan exactly.
+
+    Starts a background rebuild when the index is missing, unreadable or
+    carries too many changes.
+    """
+    global _next_size_check
+    if not enabled():
+        return None
+    meta = _read_meta(conn)
+    live = _load(meta) if meta is not None else None
+    if live is None:
+        if meta is not None:
+            rebuild_async()
+        elif time.monotonic() >= _next_size_check:
+            _next_size_check = time.monotonic() + _SIZE_CHECK_INTERVAL
+            live_rows = conn.execute("SELECT COUNT(*) FROM memories WHERE deleted_at IS NULL").fetchone()[0]
+            if live_rows >= ANN_MIN_ROWS:
+                rebuild_async()
+        return None
+    live.catch_up(conn)
+    if live.changed > ANN_REBUILD_FRACTION * max(live.size, 1):
+        rebuild_async()
+    return live
+
+
+def rebuild_async() -> None:
+    """Start a background build unless one is running or the last one failed recently."""
+    if time.monotonic() < _retry_at or not _build_lock.acquire(blocking=False):
+        return
+
+    def run() -> None:
+        try:
+            _run_build(lambda message: None)
+        except Exception:
+            pass  # Kept in stats()["last_error"]; searches keep scanning exactly.
+        finally:
+            _build_lock.release()
+
+    threading.Thread(target=run, name="mind-ann-build", daemon=True).start()
+
+
+def build(progress: Optional[Callable[[str], None]] = None) -> dict:
+    """Build a new index from vec_memories, publish it and drop older builds."""
+    if np is None:
+        raise RuntimeError("The ANN index needs numpy")
+    with _build_lock:
+        return _run_build(progress or (lambda message: None))
+
+
+def _run_build(progress: Callable[[str], None]) -> dict:
+    global _retry_at, _last_error
+    try:
+        result = _build(_backend_class(), progress)
+    except Exception as exc:
+        _retry_at = time.monotonic() + _RETRY_AFTER
+        _last_error = f"{type(exc).__name__}: {exc}"
+        raise
+    _last_error = None
+    return result
+
+
+def _build(backend: Type[ANNIndex], progress: Callable[[str], None]) -> dict:
+    build_id = uuid4().hex
+    tmp = INDEX_DIR / f"{build_id}.tmp"
+    tmp.mkdir(parents=True)
+    # Committed before the snapshot, so every write after it lands in ann_log.
+    with db_conn() as conn:
+        set_meta(conn, _BUILDING_KEY, build_id)
+    try:
+        conn = get_connection(readonly=True)
+        try:
+            # One read transaction, so the snapshot and its log position agree.
+            conn.execute("BEGIN")
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ann_log").fetchone()[0]
+            count = conn.execute("SELECT COUNT(*) FROM vec_memories").fetchone()[0]
+            if count == 0:
+                shutil.rmtree(tmp)
+                _clear_building(build_id)
+                return {"backend": backend.name, "rows": 0}
+            progress(f"reading {count} vectors")
+            ids = np.empty(count, dtype=np.int64)
+            snapshot = np.lib.format.open_memmap(
+                tmp / "snapshot.npy", mode="w+", dtype=np.float32, shape=(count, MIND_EMBEDDING_DIM)
+            )
+            for i, (rowid, embedding) in enumerate(conn.execute("SELECT rowid, embedding FROM vec_memories")):
+                ids[i] = rowid
+                snapshot[i] = np.frombuffer(embedding, dtype="<f4")
+        finally:
+            conn.close()
+
+        progress(f"building {backend.name} index")
+        backend.build(tmp, ids, snapshot)
+        del snapshot
+        (tmp / "snapshot.npy").unlink()
+        path = INDEX_DIR / build_id
+        tmp.rename(path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        _clear_building(build_id)
+        raise
+
+    meta = {"backend": backend.name, "build": build_id, "seq": seq, "size": count, "dim": MIND_EMBEDDING_DIM}
+    with db_conn() as conn:
+        set_meta(conn, _META_KEY, json.dumps(meta))
+        conn.execute("DELETE FROM ann_log WHERE seq <= ?", (seq,))
+        # From here on the published build keeps the log going; a marker left by a crashed build goes too.
+        set_meta(conn, _BUILDING_KEY, None)
+    for old in INDEX_DIR.iterdir():
+        if old.name != build_id and not old.name.endswith(".tmp"):
+            shutil.rmtree(old, ignore_errors=True)
+    return {"backend": backend.name, "build": build_id, "rows": count}
+
+
+def _clear_building(build_id: str) -> None:
+    with db_conn() as conn:
+        conn.execute("DELETE FROM mind_meta WHERE key = ? AND value = ?", (_BUILDING_KEY, build_id))
+        if get_meta(conn, _META_KEY) is None and get_meta(conn, _BUILDING_KEY) is None:
+            conn.execute("DELETE FROM ann_log")
+
+
+def stats() -> dict:
+    live = _live
+    return {
+        "backend": ANN_INDEX if enabled() else "none",
+        "build": live.build_id if live else None,
+        "rows": live.size if live else 0,
+        "changed": live.changed if live else 0,
+        "building": _build_lock.locked(),
+        "last_error": _last_error,
+    }
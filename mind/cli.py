@@ -0,0 +1,202 @@
+"""Command-line maintenance tasks for Mind.
+
+    python -m mind.cli quantize [--rebuild] [--batch-size N]
+    python -m mind.cli ann-build
+    python -m mind.cli cluster [--no-labels]
+    python -m mind.cli dedup [--policy merge|skip|link] [--distance D] [--batch-size N] [--dry-run]
+    python -m mind.cli maintenance [--purge-days D] [--archive-days D] [--max-importance I] [--vacuum-pages N] [--full-vacuum]
+    python -m mind.cli restore ID [ID ...]
+    python -m mind.cli export PATH [--include-deleted] [--batch-size N]
+    python -m mind.cli import PATH [--any-model] [--batch-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import List, Optional
+
+from .config import ARCHIVE_AFTER_DAYS, ARCHIVE_MAX_IMPORTANCE, DEDUP_DISTANCE, PURGE_AFTER_DAYS, VACUUM_PAGES
+from .db import init_db
+
+
+def _print(result: dict) -> None:
+    print(json.dumps(result, indent=2))
+
+
+def _quantize(args: argparse.Namespace) -> None:
+    from . import quantization
+
+    def progress(done: int) -> None:
+        print(f"\rquantized {done} vectors", end="", file=sys.stderr, flush=True)
+
+    result = quantization.backfill(rebuild=args.rebuild, batch_size=args.batch_size, progress=progress)
+    print(file=sys.stderr)
+    _print(result)
+
+
+def _ann_build(args: argparse.Namespace) -> None:
+    from . import ann
+
+    result = ann.build(progress=lambda message: print(message, file=sys.stderr, flush=True))
+    _print(result)
+
+
+def _cluster(args: argparse.Namespace) -> None:
+    from . import clustering
+    from .openrouter import aclose_client
+
+    async def label() -> dict:
+        try:
+            return await clustering.label_clusters()
+        finally:
+            await aclose_client()
+
+    result = clustering.rebalance(progress=lambda message: print(message, file=sys.stderr, flush=True))
+    if not args.no_labels:
+        result.update(asyncio.run(label()))
+    _print(result)
+
+
+def _dedup(args: argparse.Namespace) -> None:
+    from . import dedup
+
+    def progress(scanned: int, found: int) -> None:
+        print(f"\rscanned {scanned} memories, {found} duplicates", end="", file=sys.stderr, flush=True)
+
+    result = dedup.run(
+        policy=args.policy,
+        max_distance=args.distance,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        progress=progress,
+    )
+    print(file=sys.stderr)
+    _print(result)
+
+
+def _maintenance(args: argparse.Namespace) -> None:
+    from . import maintenance
+
+    result = maintenance.run(
+        purge_days=args.purge_days,
+        archive_days=args.archive_days,
+        max_importance=args.max_importance,
+        vacuum_pages=args.vacuum_pages,
+        full_vacuum=args.full_vacuum,
+        progress=lambda message: print(message, file=sys.stderr, flush=True),
+    )
+    _print(result)
+
+
+def _restore(args: argparse.Namespace) -> None:
+    from . import maintenance
+
+    _print({"restored": maintenance.restore(args.ids)})
+
+
+def _export(args: argparse.Namespace) -> None:
+    from . import transfer
+
+    def progress(done: int) -> None:
+        print(f"\rexported {done} memories", end="", file=sys.stderr, flush=True)
+
+    result = transfer.dump(args.path, include_deleted=args.include_deleted, batch_size=args.batch_size, progress=progress)
+    print(file=sys.stderr)
+    _print(result)
+
+
+def _import(args: argparse.Namespace) -> None:
+    from . import transfer
+
+    def progress(done: int) -> None:
+        print(f"\rread {done} memories", end="", file=sys.stderr, flush=True)
+
+    result = transfer.load(args.path, any_model=args.any_model, batch_size=args.batch_size, progress=progress)
+    print(file=sys.stderr)
+    _print(result)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m mind.cli", description="Mind maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    quantize = commands.add_parser(
+        "quantize", help="Build the quantized vector table (MIND_VECTOR_QUANTIZATION) from vec_memories."
+    )
+    quantize.add_argument("--rebuild", action="store_true", help="Drop and rebuild even if it is up to date.")
+    quantize.add_argument("--batch-size", type=int, default=1000)
+    quantize.set_defaults(func=_quantize)
+
+    ann_build = commands.add_parser(
+        "ann-build", help="Build the approximate nearest-neighbour index (MIND_ANN_INDEX) from vec_memories."
+    )
+    ann_build.set_defaults(func=_ann_build)
+
+    cluster = commands.add_parser(
+        "cluster", help="Rebuild the memory clusters now and label the ones that need it."
+    )
+    cluster.add_argument("--no-labels", action="store_true", help="Skip the LLM labeling step.")
+    cluster.set_defaults(func=_cluster)
+
+    dedup = commands.add_parser(
+        "dedup", help="Find near-duplicate memories already stored and merge, drop or link them."
+    )
+    dedup.add_argument("--policy", choices=["merge", "skip", "link"], default="merge")
+    dedup.add_argument("--distance", type=float, default=DEDUP_DISTANCE, help="L2 threshold (MIND_DEDUP_DISTANCE).")
+    dedup.add_argument("--batch-size", type=int, default=500)
+    dedup.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    dedup.set_defaults(func=_dedup)
+
+    maintenance = commands.add_parser(
+        "maintenance", help="Purge old tombstones, archive cold memories, vacuum and checkpoint the WAL."
+    )
+    maintenance.add_argument(
+        "--purge-days", type=float, default=PURGE_AFTER_DAYS, help="MIND_PURGE_AFTER_DAYS (0 keeps tombstones)."
+    )
+    maintenance.add_argument(
+        "--archive-days", type=float, default=ARCHIVE_AFTER_DAYS, help="MIND_ARCHIVE_AFTER_DAYS (0 skips archiving)."
+    )
+    maintenance.add_argument(
+        "--max-importance", type=float, default=ARCHIVE_MAX_IMPORTANCE, help="MIND_ARCHIVE_MAX_IMPORTANCE."
+    )
+    maintenance.add_argument(
+        "--vacuum-pages", type=int, default=VACUUM_PAGES, help="Free pages to release (MIND_VACUUM_PAGES, 0 = all)."
+    )
+    maintenance.add_argument(
+        "--full-vacuum",
+        action="store_true",
+        help="Rewrite the database with VACUUM (blocks writes; converts older databases to incremental vacuum).",
+    )
+    maintenance.set_defaults(func=_maintenance)
+
+    restore = commands.add_parser("restore", help="Move archived memories back into the main database.")
+    restore.add_argument("ids", type=int, nargs="+")
+    restore.set_defaults(func=_restore)
+
+    export = commands.add_parser(
+        "export", help="Write memories, tags, relations, clusters and embeddings to a JSONL file (.gz to compress)."
+    )
+    export.add_argument("path")
+    export.add_argument("--include-deleted", action="store_true", help="Also export soft-deleted memories.")
+    export.add_argument("--batch-size", type=int, default=1000)
+    export.set_defaults(func=_export)
+
+    import_ = commands.add_parser(
+        "import", help="Load an export without calling OpenRouter; memories whose uuid exists are skipped."
+    )
+    import_.add_argument("path")
+    import_.add_argument(
+        "--any-model", action="store_true", help="Import even if the export used another embedding model."
+    )
+    import_.add_argument("--batch-size", type=int, default=1000)
+    import_.set_defaults(func=_import)
+
+    args = parser.parse_args(argv)
+    init_db()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
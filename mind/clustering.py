@@ -0,0 +1,494 @@
+"""Automatic clustering of memories and cluster-routed vector search.
+
+* Centroids live in ``vec_clusters`` (rowid = ``clusters.id``). A memory's
+  cluster is ``memories.cluster_id`` and the ``cluster_id`` column of its
+  vec_memories row (0 while unassigned). That column is vec0's partition
+  key unless MIND_TENANT_PARTITIONS partitions by tenant instead; then it
+  is a metadata column the KNN filters on.
+* A new memory joins the cluster with the nearest centroid: one small vec0
+  scan, no NumPy needed.
+* Centroids are (re)built by mini-batch k-means over a bounded sample of
+  stored embeddings, warm-started from the current centroids so cluster
+  ids stay stable, after which live memories are reassigned a page at a
+  time. This runs in a background thread once ``MIND_CLUSTER_MIN_ROWS``
+  memories exist and again after the store changed by
+  ``MIND_CLUSTER_REBALANCE_FRACTION``; ``python -m mind.cli cluster`` runs
+  it in the foreground. Building needs NumPy.
+* Routed search compares the query with the centroids first and runs the
+  KNN over the nearest clusters' members only (plus unassigned rows).
+* Clusters without a label, or that doubled in size since they got one,
+  are labeled by the LLM, ``MIND_CLUSTER_LABEL_BATCH`` clusters per call.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .ann import _assign
+from .config import (
+    AI_ASSIST_ENABLED,
+    AUTO_CLUSTER_ENABLED,
+    CLUSTER_COUNT,
+    CLUSTER_LABEL_BATCH,
+    CLUSTER_MIN_ROWS,
+    CLUSTER_REBALANCE_FRACTION,
+    MIND_EMBEDDING_DIM,
+)
+from .db import VEC_PARTITION_KEYS, db_conn, db_read, get_meta, now_ts, run_read, run_write, set_meta
+from .llm import LLMError, label_clusters as llm_label_clusters
+from .metrics import stage
+from .vectors import Vector, np
+
+_META_KEY = "clusters"
+# Seconds between checks whether a rebalance is due, and before retrying a failed one.
+_CHECK_INTERVAL = 60.0
+_RETRY_AFTER = 300.0
+# Average cluster size kept at or above vec0's chunk size (see vec_memories_ddl), so cluster partitions stay dense.
+_MIN_AVERAGE_SIZE = 256
+_PAGE = 1000
+_ITERATIONS = 100
+_BATCH = 1024
+# Upper bound on the k-means training sample.
+_SAMPLE_BYTES = 256 * 1024 * 1024
+# Member texts shown to the LLM per cluster, and how much of each.
+_LABEL_SAMPLES = 5
+_LABEL_CHARS = 300
+
+_rebalance_lock = threading.Lock()
+_next_check = 0.0
+_retry_at = 0.0
+_last_error: Optional[str] = None
+_last_build: Optional[Dict[str, Any]] = None
+# Loop that labels clusters after a background rebalance (the one new memories arrive on).
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _partition(cluster_id: Optional[int]) -> int:
+    return cluster_id or 0
+
+
+def nearest_clusters(conn: sqlite3.Connection, embedding: Vector, n: int) -> List[int]:
+    """Ids of the ``n`` clusters whose centroids are nearest ``embedding``."""
+    rows = conn.execute("SELECT rowid FROM vec_clusters WHERE embedding MATCH ? AND k = ?", (embedding, n))
+    return [row[0] for row in rows]
+
+
+def existing(conn: sqlite3.Connection, cluster_ids: Iterable[Optional[int]]) -> set[int]:
+    """The subset of ``cluster_ids`` that still exists (a rebalance may have dropped some)."""
+    wanted = {cluster_id for cluster_id in cluster_ids if cluster_id}
+    if not wanted:
+        return set()
+    rows = conn.execute(f"SELECT id FROM clusters WHERE id IN ({','.join('?' * len(wanted))})", list(wanted))
+    return {row[0] for row in rows}
+
+
+def _assign_many(conn: sqlite3.Connection, embeddings: Sequence[Vector]) -> List[Optional[int]]:
+    _maybe_rebalance(conn)
+    assigned: List[Optional[int]] = []
+    for embedding in embeddings:
+        nearest = nearest_clusters(conn, embedding, 1)
+        assigned.append(nearest[0] if nearest else None)
+    return assigned
+
+
+async def assign(embeddings: Sequence[Vector]) -> List[Optional[int]]:
+    """Cluster for each new embedding (None until clusters exist).
+
+    Also starts a background rebalance when one is due.
+    """
+    global _loop
+    if not AUTO_CLUSTER_ENABLED:
+        return [None] * len(embeddings)
+    _loop = asyncio.get_running_loop()
+    return await run_read(_assign_many, embeddings)
+
+
+def resize(conn: sqlite3.Connection, old: Optional[int], new: Optional[int]) -> None:
+    """Move one member's count from cluster ``old`` to cluster ``new`` (either may be None)."""
+    if old == new:
+        return
+    if old:
+        conn.execute("UPDATE clusters SET size = size - 1 WHERE id = ?", (old,))
+    if new:
+        conn.execute("UPDATE clusters SET size = size + 1 WHERE id = ?", (new,))
+
+
+def relocate(conn: sqlite3.Connection, memory_id: int, cluster_id: Optional[int]) -> None:
+    """Move a vector to another cluster (vec0 cannot update a partition key in place)."""
+    if "cluster_id" not in VEC_PARTITION_KEYS:
+        conn.execute("UPDATE vec_memories SET cluster_id = ? WHERE rowid = ?", (_partition(cluster_id), memory_id))
+        return
+    row = conn.execute(
+        "SELECT embedding, type, created_at, user_id, agent_id FROM vec_memories WHERE rowid = ?", (memory_id,)
+    ).fetchone()
+    if row is None:
+        return
+    conn.execute("DELETE FROM vec_memories WHERE rowid = ?", (memory_id,))
+    conn.execute(
+        """
+        INSERT INTO vec_memories(rowid, cluster_id, embedding, type, created_at, user_id, agent_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (memory_id, _partition(cluster_id), *row),
+    )
+
+
+def search(
+    conn: sqlite3.Connection,
+    query_embedding: Vector,
+    k: int,
+    nprobe: int,
+    vec_filters: List[str],
+    vec_params: List[Any],
+) -> Optional[Tuple[List[Tuple[int, float]], bool]]:
+    """KNN over the members of the ``nprobe`` clusters nearest the query, or None without clusters.
+
+    Unassigned rows are always included. Returns (rowid, L2 distance) pairs
+    and whether fewer than k rows matched; when the probed clusters hold
+    fewer than k matches, more clusters are probed until all have been.
+    """
+    total = conn.execute("SELECT COUNT(*) FROM vec_clusters").fetchone()[0]
+    if not total:
+        return None
+    nprobe = max(nprobe, 1)
+    while True:
+        partitions = [0, *nearest_clusters(conn, query_embedding, min(nprobe, total))]
+        where_clause = " AND ".join(
+            ["embedding MATCH ?", "k = ?", f"cluster_id IN ({','.join('?' * len(partitions))})", *vec_filters]
+        )
+        # On a partition key vec0 returns up to k rows per cluster; keep the overall k nearest.
+        rows = conn.execute(
+            f"SELECT rowid, distance FROM vec_memories WHERE {where_clause}",
+            [query_embedding, k, *partitions, *vec_params],
+        ).fetchall()
+        matches = sorted(((row[0], row[1]) for row in rows), key=lambda match: match[1])[:k]
+        if len(matches) >= k or nprobe >= total:
+            return matches, len(matches) < k
+        nprobe *= 2
+
+
+# ---------- rebalancing ----------
+
+
+def _read_meta(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+    value = get_meta(conn, _META_KEY)
+    return json.loads(value) if value else None
+
+
+def _due(conn: sqlite3.Connection) -> bool:
+    live = conn.execute("SELECT COUNT(*) FROM memories WHERE deleted_at IS NULL").fetchone()[0]
+    meta = _read_meta(conn)
+    if meta is None:
+        return live >= CLUSTER_MIN_ROWS
+    unassigned = conn.execute(
+        "SELECT COUNT(*) FROM memories WHERE cluster_id IS NULL AND deleted_at IS NULL"
+    ).fetchone()[0]
+    threshold = CLUSTER_REBALANCE_FRACTION * max(meta["rows"], 1)
+    return unassigned > threshold or abs(live - meta["rows"]) > threshold
+
+
+def _maybe_rebalance(conn: sqlite3.Connection) -> None:
+    global _next_check
+    if np is None or time.monotonic() < _next_check:
+        return
+    _next_check = time.monotonic() + _CHECK_INTERVAL
+    if _due(conn):
+        rebalance_async()
+
+
+def rebalance_async() -> None:
+    """Start a background rebalance unless one is running or the last one failed recently."""
+    if time.monotonic() < _retry_at or not _rebalance_lock.acquire(blocking=False):
+        return
+
+    def run() -> None:
+        try:
+            _run_rebalance(lambda message: None)
+        except Exception:
+            return  # Kept in stats()["last_error"]; new memories keep joining the old clusters.
+        finally:
+            _rebalance_lock.release()
+        loop = _loop
+        if loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(label_clusters(), loop)
+
+    threading.Thread(target=run, name="mind-cluster-rebalance", daemon=True).start()
+
+
+def rebalance(progress: Optional[Callable[[str], None]] = None) -> dict:
+    """Rebuild the centroids and reassign every live memory, in the foreground."""
+    if np is None:
+        raise RuntimeError("Clustering needs numpy")
+    with _rebalance_lock:
+        return _run_rebalance(progress or (lambda message: None))
+
+
+def _run_rebalance(progress: Callable[[str], None]) -> dict:
+    global _retry_at, _last_error, _last_build
+    try:
+        result = _rebalance(progress)
+    except Exception as exc:
+        _retry_at = time.monotonic() + _RETRY_AFTER
+        _last_error = f"{type(exc).__name__}: {exc}"
+        raise
+    _last_error = None
+    _last_build = result
+    return result
+
+
+def _target_count(rows: int) -> int:
+    if CLUSTER_COUNT:
+        return min(CLUSTER_COUNT, rows)
+    return max(1, min(round(math.sqrt(rows)), rows // _MIN_AVERAGE_SIZE))
+
+
+def _load_vectors(conn: sqlite3.Connection, ids: Sequence[int]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """(ids, partitions, vectors) of the given memories that still have a vector, in chunks of 500."""
+    found_ids: List[int] = []
+    partitions: List[int] = []
+    vectors = np.empty((len(ids), MIND_EMBEDDING_DIM), dtype=np.float32)
+    for start in range(0, len(ids), 500):
+        chunk = [int(i) for i in ids[start : start + 500]]
+        for rowid, partition, embedding in conn.execute(
+            f"SELECT rowid, cluster_id, embedding FROM vec_memories WHERE rowid IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ):
+            vectors[len(found_ids)] = np.frombuffer(embedding, dtype="<f4")
+            found_ids.append(rowid)
+            partitions.append(partition or 0)
+    return np.asarray(found_ids, dtype=np.int64), np.asarray(partitions, dtype=np.int64), vectors[: len(found_ids)]
+
+
+def _minibatch_kmeans(sample: "np.ndarray", centroids: "np.ndarray", rng: "np.random.Generator") -> "np.ndarray":
+    """Sculley's mini-batch k-means: each batch pulls centroids toward their members at rate 1/count."""
+    counts = np.zeros(len(centroids), dtype=np.float64)
+    for _ in range(_ITERATIONS):
+        batch = sample[rng.choice(len(sample), size=min(_BATCH, len(sample)), replace=False)]
+        labels = _assign(batch, centroids)
+        batch_counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, batch)
+        hit = batch_counts > 0
+        counts[hit] += batch_counts[hit]
+        rate = (batch_counts[hit] / counts[hit]).astype(np.float32)
+        centroids[hit] += rate[:, None] * (sums[hit] / batch_counts[hit, None] - centroids[hit])
+    return centroids
+
+
+def _rebalance(progress: Callable[[str], None]) -> dict:
+    started = time.perf_counter()
+    rng = np.random.default_rng()
+    with db_read() as conn:
+        ids = np.fromiter(
+            (row[0] for row in conn.execute("SELECT id FROM memories WHERE deleted_at IS NULL ORDER BY id")),
+            dtype=np.int64,
+        )
+        current = conn.execute(
+            "SELECT c.id, v.embedding FROM clusters c JOIN vec_clusters v ON v.rowid = c.id ORDER BY c.size DESC"
+        ).fetchall()
+        if not len(ids):
+            return {"rows": 0, "clusters": 0}
+        k = _target_count(len(ids))
+        size = min(len(ids), max(k * 4, min(k * 64, _SAMPLE_BYTES // (MIND_EMBEDDING_DIM * 4))))
+        progress(f"sampling {size} of {len(ids)} vectors for {k} clusters")
+        _, _, sample = _load_vectors(conn, np.sort(rng.choice(ids, size=size, replace=False)))
+
+    # Warm start: keep the largest current clusters (and their ids), seed the rest from the sample.
+    kept = current[:k]
+    cluster_ids: List[Optional[int]] = [row[0] for row in kept]
+    seeds = sample[rng.choice(len(sample), size=k - len(kept), replace=False)] if k > len(kept) else sample[:0]
+    centroids = np.concatenate(
+        [np.asarray([np.frombuffer(row[1], dtype="<f4") for row in kept], dtype=np.float32).reshape(-1, sample.shape[1]), seeds]
+    )
+    cluster_ids.extend([None] * len(seeds))
+    progress("training centroids")
+    centroids = _minibatch_kmeans(sample, centroids, rng)
+    del sample
+
+    ts = now_ts()
+    dropped = [row[0] for row in current[k:]]
+    with db_conn() as conn:
+        conn.executemany("DELETE FROM vec_clusters WHERE rowid = ?", [(cluster_id,) for cluster_id in dropped])
+        for position, centroid in enumerate(centroids):
+            if cluster_ids[position] is None:
+                cluster_ids[position] = conn.execute(
+                    "INSERT INTO clusters(created_at, updated_at) VALUES (?, ?)", (ts, ts)
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO vec_clusters(rowid, embedding) VALUES (?, ?)", (cluster_ids[position], centroid.tobytes())
+                )
+            else:
+                conn.execute(
+                    "UPDATE vec_clusters SET embedding = ? WHERE rowid = ?", (centroid.tobytes(), cluster_ids[position])
+                )
+    targets = np.asarray(cluster_ids, dtype=np.int64)
+
+    moved = 0
+    for start in range(0, len(ids), _PAGE):
+        with db_read() as conn:
+            page_ids, partitions, vectors = _load_vectors(conn, ids[start : start + _PAGE])
+        labels = targets[_assign(vectors, centroids)] if len(page_ids) else page_ids
+        changed = [(int(m), int(c)) for m, c, p in zip(page_ids, labels, partitions) if c != p]
+        moved += _move(changed)
+        progress(f"assigned {min(start + _PAGE, len(ids))} of {len(ids)} memories")
+
+    if dropped:
+        # Memories written meanwhile may have joined a cluster that is now dropped.
+        with db_read() as conn:
+            stragglers = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT id FROM memories WHERE cluster_id IN ({','.join('?' * len(dropped))}) AND deleted_at IS NULL",
+                    dropped,
+                )
+            ]
+            page_ids, _, vectors = _load_vectors(conn, stragglers)
+        if len(page_ids):
+            moved += _move([(int(m), int(c)) for m, c in zip(page_ids, targets[_assign(vectors, centroids)])])
+
+    with db_conn() as conn:
+        conn.execute(
+            """
+            UPDATE clusters SET size = (
+              SELECT COUNT(*) FROM memories m WHERE m.cluster_id = clusters.id AND m.deleted_at IS NULL
+            )
+            """
+        )
+        empty = [row[0] for row in conn.execute("SELECT id FROM clusters WHERE size = 0")]
+        _drop(conn, [*dropped, *empty])
+        count = conn.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+        meta = {"rows": int(len(ids)), "clusters": count, "built_at": ts}
+        set_meta(conn, _META_KEY, json.dumps(meta))
+    return {**meta, "moved": moved, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _move(moves: Sequence[Tuple[int, int]]) -> int:
+    if not moves:
+        return 0
+    with db_conn() as conn:
+        for memory_id, cluster_id in moves:
+            conn.execute("UPDATE memories SET cluster_id = ? WHERE id = ?", (cluster_id, memory_id))
+            relocate(conn, memory_id, cluster_id)
+    return len(moves)
+
+
+def _drop(conn: sqlite3.Connection, cluster_ids: Sequence[int]) -> None:
+    """Delete clusters that no live memory belongs to any more."""
+    for cluster_id in set(cluster_ids):
+        conn.execute("UPDATE memories SET cluster_id = NULL WHERE cluster_id = ? AND deleted_at IS NOT NULL", (cluster_id,))
+        conn.execute("DELETE FROM vec_clusters WHERE rowid = ?", (cluster_id,))
+        conn.execute(
+            "DELETE FROM clusters WHERE id = ? AND NOT EXISTS (SELECT 1 FROM memories WHERE cluster_id = ?)",
+            (cluster_id, cluster_id),
+        )
+
+
+# ---------- labels and listing ----------
+
+
+def _pending_labels(conn: sqlite3.Connection, limit: Optional[int]) -> List[Tuple[int, int, List[str]]]:
+    """(id, size, sample texts) of clusters that need a label, largest first."""
+    rows = conn.execute(
+        """
+        SELECT c.id, c.size, v.embedding FROM clusters c JOIN vec_clusters v ON v.rowid = c.id
+        WHERE c.size > 0 AND (c.label IS NULL OR c.size >= 2 * c.labeled_size)
+        ORDER BY c.size DESC LIMIT ?
+        """,
+        (limit if limit is not None else -1,),
+    ).fetchall()
+    pending = []
+    for cluster_id, size, centroid in rows:
+        # The members nearest the centroid describe the cluster best.
+        member_ids = [
+            row[0]
+            for row in conn.execute(
+                "SELECT rowid FROM vec_memories WHERE embedding MATCH ? AND k = ? AND cluster_id = ?",
+                (centroid, _LABEL_SAMPLES, cluster_id),
+            )
+        ]
+        texts = [
+            row[0][:_LABEL_CHARS]
+            for row in conn.execute(
+                f"SELECT text FROM memories WHERE id IN ({','.join('?' * len(member_ids))}) AND deleted_at IS NULL",
+                member_ids,
+            )
+        ] if member_ids else []
+        if texts:
+            pending.append((cluster_id, size, texts))
+    return pending
+
+
+def _store_labels(conn: sqlite3.Connection, labels: Dict[int, Dict[str, str]], sizes: Dict[int, int]) -> None:
+    ts = now_ts()
+    conn.executemany(
+        "UPDATE clusters SET label = ?, summary = ?, labeled_size = ?, updated_at = ? WHERE id = ?",
+        [(label["label"], label.get("summary"), sizes[cluster_id], ts, cluster_id) for cluster_id, label in labels.items()],
+    )
+
+
+async def label_clusters(limit: Optional[int] = None) -> dict:
+    """Label clusters that have no label or doubled in size since, several per LLM call."""
+    if not AI_ASSIST_ENABLED:
+        return {"labeled": 0, "failed_batches": 0}
+    pending = await run_read(_pending_labels, limit)
+    batch_size = max(CLUSTER_LABEL_BATCH, 1)
+    batches = [pending[start : start + batch_size] for start in range(0, len(pending), batch_size)]
+    with stage("label_clusters"):
+        results = await asyncio.gather(*(llm_label_clusters(batch) for batch in batches), return_exceptions=True)
+    labels: Dict[int, Dict[str, str]] = {}
+    failed = 0
+    for result in results:
+        if isinstance(result, LLMError):
+            failed += 1
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            labels.update(result)
+    sizes = {cluster_id: size for cluster_id, size, _ in pending}
+    labels = {cluster_id: label for cluster_id, label in labels.items() if cluster_id in sizes}
+    if labels:
+        await run_write(_store_labels, labels, sizes)
+    return {"labeled": len(labels), "failed_batches": failed}
+
+
+def _list(conn: sqlite3.Connection, limit: int) -> List[dict]:
+    rows = conn.execute(
+        "SELECT id, label, summary, size, updated_at FROM clusters ORDER BY size DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+async def list_clusters(limit: int = 100) -> List[dict]:
+    """Clusters with their label, summary and live member count, largest first."""
+    return await run_read(_list, limit)
+
+
+def _members(conn: sqlite3.Connection, cluster_id: int, limit: int) -> List[dict]:
+    rows = conn.execute(
+        """
+        SELECT id, text, tags, importance, created_at FROM memories
+        WHERE cluster_id = ? AND deleted_at IS NULL
+        ORDER BY importance DESC, id DESC LIMIT ?
+        """,
+        (cluster_id, limit),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+async def cluster_members(cluster_id: int, limit: int = 50) -> List[dict]:
+    """Live memories of one cluster, most important first."""
+    return await run_read(_members, cluster_id, limit)
+
+
+def stats() -> dict:
+    return {
+        "enabled": AUTO_CLUSTER_ENABLED,
+        "last_build": _last_build,
+        "rebalancing": _rebalance_lock.locked(),
+        "last_error": _last_error,
+    }
@@ -8,20 +8,158 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = Path(os.getenv("MIND_DATA_DIR", BASE_DIR.parent / "data"))
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-
 DB_PATH = Path(os.getenv("MIND_DB_PATH", DATA_DIR / "mind.db"))
 SQLITE_VEC_PATH = os.getenv("SQLITE_VEC_PATH", "/usr/local/lib/vec0")
+DB_READER_CONNECTIONS = int(os.getenv("MIND_DB_READERS", "4"))
+# Negative values are KiB, positive values are pages (see PRAGMA cache_size).
+SQLITE_CACHE_SIZE = int(os.getenv("MIND_SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("MIND_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Most queued writes the writer thread commits in one transaction (group commit).
+DB_WRITE_BATCH = int(os.getenv("MIND_DB_WRITE_BATCH", "64"))
 
 OPENROUTER_BASE = os.getenv("OPENROUTER_BASE", "https://openrouter.ai/api/v1")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
+HTTP_MAX_CONNECTIONS = int(os.getenv("MIND_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("MIND_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MIND_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("MIND_HTTP2", "false").lower() == "true"
+HTTP_MAX_IN_FLIGHT = int(os.getenv("MIND_HTTP_MAX_IN_FLIGHT", "8"))
+HTTP_MAX_RETRIES = int(os.getenv("MIND_HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("MIND_HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("MIND_HTTP_BACKOFF_MAX", "20"))
+
 MIND_EMBEDDING_MODEL = os.getenv("MIND_EMBEDDING_MODEL", "qwen/qwen3-embedding-8b")
 MIND_LLM_MODEL = os.getenv("MIND_LLM_MODEL", "google/gemini-2.5-flash-lite-preview-09-2025")
 MIND_EMBEDDING_DIM = int(os.getenv("MIND_EMBEDDING_DIM", "4096"))
+# Inputs per /embeddings request; larger lists are split into several requests.
+EMBED_BATCH_SIZE = int(os.getenv("MIND_EMBED_BATCH_SIZE", "64"))
+# How long a text waits for concurrent embed_texts calls to share its /embeddings request (0 = same tick only).
+EMBED_BATCH_WINDOW_MS = float(os.getenv("MIND_EMBED_BATCH_WINDOW_MS", "2"))
+# "float" (JSON number arrays) or "base64" (packed float32, if the provider supports it).
+MIND_EMBEDDING_ENCODING = os.getenv("MIND_EMBEDDING_ENCODING", "float")
+
+# Optional compact copy of every vector ("none", "int8" or "bit") scanned first, then reranked
+# against full-precision vectors. MIND_VECTOR_QUANT_DIM < MIND_EMBEDDING_DIM truncates
+# Matryoshka-style before quantizing (bit needs a multiple of 8).
+VECTOR_QUANTIZATION = os.getenv("MIND_VECTOR_QUANTIZATION", "none").lower()
+VECTOR_QUANT_DIM = int(os.getenv("MIND_VECTOR_QUANT_DIM", str(MIND_EMBEDDING_DIM)))
+VECTOR_RERANK_FACTOR = int(os.getenv("MIND_VECTOR_RERANK_FACTOR", "8"))
+
+# Approximate nearest-neighbour index ("ivf" or "none", needs numpy), used once MIND_ANN_MIN_ROWS
+# memories exist. MIND_ANN_NLIST=0 picks ~sqrt(rows) lists; MIND_SEARCH_EXACT=true bypasses the index.
+ANN_INDEX = os.getenv("MIND_ANN_INDEX", "ivf").lower()
+ANN_MIN_ROWS = int(os.getenv("MIND_ANN_MIN_ROWS", "20000"))
+ANN_NLIST = int(os.getenv("MIND_ANN_NLIST", "0"))
+ANN_NPROBE = int(os.getenv("MIND_ANN_NPROBE", "16"))
+# Rebuild once vectors changed since the last build exceed this fraction of it.
+ANN_REBUILD_FRACTION = float(os.getenv("MIND_ANN_REBUILD_FRACTION", "0.2"))
+SEARCH_EXACT = os.getenv("MIND_SEARCH_EXACT", "false").lower() == "true"
+
+EMBED_CACHE_ENABLED = os.getenv("MIND_EMBED_CACHE", "true").lower() == "true"
+EMBED_CACHE_MEMORY_ITEMS = int(os.getenv("MIND_EMBED_CACHE_MEMORY_ITEMS", "2048"))
+EMBED_CACHE_MAX_ROWS = int(os.getenv("MIND_EMBED_CACHE_MAX_ROWS", "50000"))
+
+# Over-fetch factor for filtered vector search, and the largest k sqlite-vec accepts.
+SEARCH_OVERFETCH = int(os.getenv("MIND_SEARCH_OVERFETCH", "4"))
+SEARCH_MAX_K = int(os.getenv("MIND_SEARCH_MAX_K", "4096"))
+# Default search mode ("vector", "lexical" or "hybrid") and the reciprocal-rank-fusion constant.
+SEARCH_MODE = os.getenv("MIND_SEARCH_MODE", "vector").lower()
+HYBRID_RRF_K = int(os.getenv("MIND_HYBRID_RRF_K", "60"))
+
+# Ranking: "relevance" orders hits by the search mode's own score; "blend" over-fetches MIND_RANK_OVERFETCH x top_k
+# candidates and orders them by a weighted sum of relevance (normalised to 0-1 within the candidates), importance,
+# and recency of creation and of last access, each recency being 1 / (1 + age / half-life).
+RANKING = os.getenv("MIND_RANKING", "relevance").lower()
+RANK_OVERFETCH = int(os.getenv("MIND_RANK_OVERFETCH", "4"))
+RANK_RELEVANCE_WEIGHT = float(os.getenv("MIND_RANK_RELEVANCE_WEIGHT", "1.0"))
+RANK_IMPORTANCE_WEIGHT = float(os.getenv("MIND_RANK_IMPORTANCE_WEIGHT", "0.3"))
+RANK_RECENCY_WEIGHT = float(os.getenv("MIND_RANK_RECENCY_WEIGHT", "0.2"))
+RANK_RECENCY_HALF_LIFE_DAYS = float(os.getenv("MIND_RANK_RECENCY_HALF_LIFE_DAYS", "30"))
+RANK_ACCESS_WEIGHT = float(os.getenv("MIND_RANK_ACCESS_WEIGHT", "0.2"))
+RANK_ACCESS_HALF_LIFE_DAYS = float(os.getenv("MIND_RANK_ACCESS_HALF_LIFE_DAYS", "7"))
+# Reads stamp last_accessed_at through an in-memory buffer written in one batch every MIND_ACCESS_FLUSH_SECONDS,
+# or as soon as MIND_ACCESS_FLUSH_BATCH memories are pending.
+ACCESS_TRACKING = os.getenv("MIND_ACCESS_TRACKING", "true").lower() == "true"
+ACCESS_FLUSH_SECONDS = float(os.getenv("MIND_ACCESS_FLUSH_SECONDS", "5"))
+ACCESS_FLUSH_BATCH = int(os.getenv("MIND_ACCESS_FLUSH_BATCH", "1000"))
 
 AI_ASSIST_ENABLED = os.getenv("MIND_AI_ASSIST", "true").lower() == "true"
+# "sync" classifies before storing; "background" stores immediately and enriches via a job queue.
+ENRICHMENT_MODE = os.getenv("MIND_ENRICHMENT_MODE", "sync").lower()
+ENRICHMENT_WORKERS = int(os.getenv("MIND_ENRICHMENT_WORKERS", "2"))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("MIND_ENRICHMENT_MAX_ATTEMPTS", "5"))
+ENRICHMENT_POLL_SECONDS = float(os.getenv("MIND_ENRICHMENT_POLL_SECONDS", "5"))
+# A job claimed longer ago than this is presumed abandoned (its worker's process died) and claimable again.
+ENRICHMENT_LEASE_SECONDS = float(os.getenv("MIND_ENRICHMENT_LEASE_SECONDS", "600"))
+CLASSIFY_CONCURRENCY = int(os.getenv("MIND_CLASSIFY_CONCURRENCY", "8"))
+INGEST_CHUNK_SIZE = int(os.getenv("MIND_INGEST_CHUNK_SIZE", "256"))
+# Automatic clustering (building centroids needs numpy): about sqrt(rows) clusters (MIND_CLUSTER_COUNT overrides)
+# once MIND_CLUSTER_MIN_ROWS memories exist, re-balanced in the background after the store changed by
+# MIND_CLUSTER_REBALANCE_FRACTION. With MIND_CLUSTER_ROUTING, vector search scans only the members of the
+# MIND_CLUSTER_NPROBE clusters nearest the query. Labels are requested MIND_CLUSTER_LABEL_BATCH clusters per LLM call.
 AUTO_CLUSTER_ENABLED = os.getenv("MIND_AUTO_CLUSTER", "true").lower() == "true"
+CLUSTER_MIN_ROWS = int(os.getenv("MIND_CLUSTER_MIN_ROWS", "1000"))
+CLUSTER_COUNT = int(os.getenv("MIND_CLUSTER_COUNT", "0"))
+CLUSTER_REBALANCE_FRACTION = float(os.getenv("MIND_CLUSTER_REBALANCE_FRACTION", "0.2"))
+CLUSTER_ROUTING = os.getenv("MIND_CLUSTER_ROUTING", "false").lower() == "true"
+CLUSTER_NPROBE = int(os.getenv("MIND_CLUSTER_NPROBE", "4"))
+CLUSTER_LABEL_BATCH = int(os.getenv("MIND_CLUSTER_LABEL_BATCH", "8"))
+# vec0 partition keys of the vector tables. With MIND_TENANT_PARTITIONS, vectors are partitioned by (user_id,
+# agent_id) so a tenant-scoped search reads only that tenant's chunks, and cluster_id is a filter column; without
+# it, clusters are the partitions and tenants are filtered. vec0 allocates a partition 256 vectors at a time, so
+# every partition takes at least 256 x MIND_EMBEDDING_DIM x 4 bytes (1 MiB at 1024 dims) however few rows it holds.
+# Changing this rebuilds the vector tables on the next start.
+TENANT_PARTITIONS = os.getenv("MIND_TENANT_PARTITIONS", "true").lower() == "true"
+# Near-duplicate handling on create_memory: "off", "skip", "merge" or "link", for a live memory of the
+# same user within MIND_DEDUP_DISTANCE (L2 between embeddings; about 0.25 is cosine 0.97 for unit vectors).
+DEDUP_POLICY = os.getenv("MIND_DEDUP_POLICY", "off").lower()
+DEDUP_DISTANCE = float(os.getenv("MIND_DEDUP_DISTANCE", "0.25"))
+# Maintenance, run every MIND_MAINTENANCE_INTERVAL_SECONDS (0 = only on demand): soft-deleted memories are purged
+# for good after MIND_PURGE_AFTER_DAYS (0, the default, keeps them), memories never accessed with importance at most
+# MIND_ARCHIVE_MAX_IMPORTANCE move to the archive database after MIND_ARCHIVE_AFTER_DAYS (0 disables archiving),
+# and up to MIND_VACUUM_PAGES free pages (0 = all) are returned to the filesystem. The WAL is checkpointed
+# every MIND_WAL_CHECKPOINT_SECONDS.
+MAINTENANCE_INTERVAL = float(os.getenv("MIND_MAINTENANCE_INTERVAL_SECONDS", "3600"))
+PURGE_AFTER_DAYS = float(os.getenv("MIND_PURGE_AFTER_DAYS", "0"))
+ARCHIVE_AFTER_DAYS = float(os.getenv("MIND_ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_MAX_IMPORTANCE = float(os.getenv("MIND_ARCHIVE_MAX_IMPORTANCE", "0.3"))
+ARCHIVE_PATH = Path(os.getenv("MIND_ARCHIVE_PATH", DB_PATH.with_name(f"{DB_PATH.stem}-archive{DB_PATH.suffix}")))
+VACUUM_PAGES = int(os.getenv("MIND_VACUUM_PAGES", "0"))
+WAL_CHECKPOINT_SECONDS = float(os.getenv("MIND_WAL_CHECKPOINT_SECONDS", "300"))
+# Graph expansion in search: neighbours up to MIND_GRAPH_HOPS relation hops (0 = off) from the top MIND_GRAPH_SEEDS
+# hits are added, at most MIND_GRAPH_NEIGHBOURS of them, scored by the product of the kind weights along the path
+# (MIND_RELATION_WEIGHTS as "kind=weight,..."; other kinds weigh MIND_RELATION_DEFAULT_WEIGHT).
+GRAPH_HOPS = int(os.getenv("MIND_GRAPH_HOPS", "0"))
+GRAPH_SEEDS = int(os.getenv("MIND_GRAPH_SEEDS", "5"))
+GRAPH_NEIGHBOURS = int(os.getenv("MIND_GRAPH_NEIGHBOURS", "10"))
+RELATION_WEIGHTS = {
+    kind.strip().lower(): float(weight)
+    for kind, _, weight in (
+        pair.partition("=")
+        for pair in os.getenv(
+            "MIND_RELATION_WEIGHTS", "related=0.8,derived_from=0.7,supports=0.7,contradicts=0.5,duplicate_of=0.3"
+        ).split(",")
+    )
+    if kind.strip() and weight.strip()
+}
+RELATION_DEFAULT_WEIGHT = float(os.getenv("MIND_RELATION_DEFAULT_WEIGHT", "0.5"))
 
 SERVER_NAME = os.getenv("MIND_SERVER_NAME", "0.0.0.0")
 SERVER_PORT = int(os.getenv("MIND_SERVER_PORT", "7860"))
+# "ui" serves the Gradio app with its MCP endpoint; "mcp" (or --headless) serves only the MCP tools,
+# over MIND_MCP_TRANSPORT ("sse", "streamable-http" or "stdio").
+MIND_MODE = os.getenv("MIND_MODE", "ui").lower()
+MCP_TRANSPORT = os.getenv("MIND_MCP_TRANSPORT", "sse").lower()
+
+# Prometheus /metrics endpoint (0 disables it) and the slow-operation log (0 ms disables it).
+METRICS_HOST = os.getenv("MIND_METRICS_HOST", SERVER_NAME)
+METRICS_PORT = int(os.getenv("MIND_METRICS_PORT", "9464"))
+SLOW_QUERY_MS = float(os.getenv("MIND_SLOW_QUERY_MS", "0"))
+SLOW_QUERY_LOG = os.getenv("MIND_SLOW_QUERY_LOG")
+
+
+def ensure_data_dir() -> None:
+    """Create the data directory on first database use rather than at import."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -1,32 +1,95 @@
 """SQLite + sqlite-vec helpers and schema management."""
 from __future__ import annotations
 
+import asyncio
+import os
+import queue
+import re
 import sqlite3
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
-from .config import DB_PATH, SQLITE_VEC_PATH, MIND_EMBEDDING_DIM
+from .config import (
+    ARCHIVE_PATH,
+    DB_PATH,
+    DB_READER_CONNECTIONS,
+    DB_WRITE_BATCH,
+    MIND_EMBEDDING_DIM,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_VEC_PATH,
+    TENANT_PARTITIONS,
+    VECTOR_QUANTIZATION,
+    ensure_data_dir,
+)
+from .metrics import (
+    DB_BYTES,
+    DB_CONNECTIONS,
+    DB_ROWS,
+    DB_WRITE_BATCH_SIZE,
+    ENRICHMENT_JOBS,
+    register_collector,
+    stage,
+)
+
+T = TypeVar("T")
+# (future, fn, args) queued for the writer thread.
+_WriteJob = Tuple[Future, Callable[..., Any], tuple]
+
+_VEC_ENTRYPOINTS = ("sqlite3_extension_init", "sqlite3_vec_init", "sqlite3_vec0_init", "sqlite3_sqlitevec_init")
+
+# (path, entrypoint) of the sqlite-vec build that loaded last; entrypoint None means load_extension(path).
+_vec_extension: Optional[tuple[str, Optional[str]]] = None
 
 
 def now_ts() -> int:
     return int(time.time())
 
 
-def get_connection() -> sqlite3.Connection:
-    """Open a SQLite connection with sqlite-vec loaded."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA foreign_keys=ON;")
+def get_connection(*, readonly: bool = False) -> sqlite3.Connection:
+    """Open a SQLite connection with sqlite-vec loaded and tuning pragmas applied."""
+    with stage("db.connect"):
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Only takes effect while the file is still empty, so it must precede journal_mode;
+        # existing databases switch over with `python -m mind.cli maintenance --full-vacuum`.
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA foreign_keys=ON;")
+        conn.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE};")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE};")
 
-    conn.enable_load_extension(True)
-    _load_sqlite_vec(conn)
-    conn.enable_load_extension(False)
+        conn.enable_load_extension(True)
+        _load_sqlite_vec(conn)
+        conn.enable_load_extension(False)
+
+        if readonly:
+            conn.execute("PRAGMA query_only=ON;")
+    DB_CONNECTIONS.inc()
     return conn
 
 
 def _load_sqlite_vec(conn: sqlite3.Connection) -> None:
+    """Load sqlite-vec, reusing the location that worked last before probing again."""
+    global _vec_extension
+    if _vec_extension is not None:
+        path, entry = _vec_extension
+        try:
+            if entry is None:
+                conn.load_extension(path)
+            else:
+                conn.execute("SELECT load_extension(?, ?)", (path, entry))
+            return
+        except (TypeError, sqlite3.OperationalError):
+            _vec_extension = None
+    _vec_extension = _probe_sqlite_vec(conn)
+
+
+def _probe_sqlite_vec(conn: sqlite3.Connection) -> tuple[str, Optional[str]]:
     """Try known sqlite-vec library locations and entrypoints for resilience."""
     base = Path(SQLITE_VEC_PATH)
     home = Path.home()
@@ -56,7 +119,7 @@ def _load_sqlite_vec(conn: sqlite3.Connection) -> None:
         # Prefer direct API when available.
         try:
             conn.load_extension(str(path))
-            return
+            return str(path), None
         except TypeError:
             # Some builds only accept one arg; fall back to SQL function below.
             pass
@@ -65,10 +128,10 @@ def _load_sqlite_vec(conn: sqlite3.Connection) -> None:
             last_err = exc
 
         # Try explicit entrypoints via SQL load_extension function.
-        for entry in ("sqlite3_extension_init", "sqlite3_vec_init", "sqlite3_vec0_init", "sqlite3_sqlitevec_init"):
+        for entry in _VEC_ENTRYPOINTS:
             try:
                 conn.execute("SELECT load_extension(?, ?)", (str(path), entry))
-                return
+                return str(path), entry
             except sqlite3.OperationalError as exc:
                 tried.append(f"{path} ({entry}) -> {exc}")
                 last_err = exc
@@ -77,15 +140,425 @@ def _load_sqlite_vec(conn: sqlite3.Connection) -> None:
     raise sqlite3.OperationalError(f"Could not load sqlite-vec. Tried: {details}") from last_err
 
 
+class ConnectionPool:
+    """Long-lived connections: one serialized writer plus a fixed set of readers.
+
+    WAL mode lets readers run alongside the writer, so only writes are
+    serialized. Connections are opened once and keep sqlite-vec loaded.
+
+    Async code does not touch the connections on the event loop: reads run on
+    a thread pool with one thread per reader connection (``submit_read``) and
+    writes are queued to a single writer thread (``submit_write``) that
+    commits everything queued so far in one transaction, each write inside
+    its own savepoint so a failing one does not take the others with it.
+    """
+
+    def __init__(self, readers: int = DB_READER_CONNECTIONS) -> None:
+        ensure_data_dir()
+        self._writer = get_connection()
+        self._writer_lock = threading.Lock()
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_conns = [get_connection(readonly=True) for _ in range(max(readers, 1))]
+        for conn in self._reader_conns:
+            self._readers.put(conn)
+        self._read_executor = ThreadPoolExecutor(len(self._reader_conns), thread_name_prefix="mind-db-read")
+        self._write_queue: queue.SimpleQueue[Optional[_WriteJob]] = queue.SimpleQueue()
+        self._write_thread = threading.Thread(target=self._write_loop, name="mind-db-write", daemon=True)
+        self._write_thread.start()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the writer connection; commit on success, roll back on error."""
+        with stage("db.writer_wait"):
+            self._writer_lock.acquire()
+        try:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+        finally:
+            self._writer_lock.release()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection, waiting if all of them are in use."""
+        with stage("db.reader_wait"):
+            conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def submit_read(self, fn: Callable[..., T], *args: Any) -> Future:
+        """Run ``fn(conn, *args)`` on a reader thread."""
+        return self._read_executor.submit(self._read, fn, args)
+
+    def _read(self, fn: Callable[..., T], args: tuple) -> T:
+        with self.reader() as conn:
+            return fn(conn, *args)
+
+    def submit_write(self, fn: Callable[..., T], *args: Any) -> Future:
+        """Queue ``fn(conn, *args)`` for the writer thread; resolves once committed."""
+        future: Future = Future()
+        self._write_queue.put((future, fn, args))
+        return future
+
+    def _write_loop(self) -> None:
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                return
+            batch = [job]
+            stopping = False
+            while len(batch) < max(DB_WRITE_BATCH, 1):
+                try:
+                    job = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit_group(batch)
+            if stopping:
+                return
+
+    def _commit_group(self, batch: List[_WriteJob]) -> None:
+        outcomes: List[tuple[Future, bool, Any]] = []
+        try:
+            with stage("db.group_commit"), self.writer() as conn:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                for future, fn, args in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT mind_write")
+                    try:
+                        result = fn(conn, *args)
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO mind_write")
+                        conn.execute("RELEASE mind_write")
+                        outcomes.append((future, False, exc))
+                    else:
+                        conn.execute("RELEASE mind_write")
+                        outcomes.append((future, True, result))
+        except BaseException as exc:
+            # The transaction itself failed (e.g. COMMIT): nothing in the group was stored.
+            for future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        DB_WRITE_BATCH_SIZE.observe(len(outcomes))
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def close(self) -> None:
+        self._write_queue.put(None)
+        self._write_thread.join()
+        self._read_executor.shutdown(wait=True)
+        with self._writer_lock:
+            self._writer.close()
+        for conn in self._reader_conns:
+            conn.close()
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+# Called before the pool closes, e.g. to write buffered bookkeeping.
+_close_hooks: List[Callable[[], None]] = []
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def on_close(hook: Callable[[], None]) -> None:
+    """Run ``hook()`` each time the pool is about to close (while it can still write)."""
+    _close_hooks.append(hook)
+
+
+def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        for hook in _close_hooks:
+            hook()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
 @contextmanager
-def db_conn():
-    """Context manager for DB connections that commits on success."""
-    conn = get_connection()
-    try:
+def db_conn() -> Iterator[sqlite3.Connection]:
+    """Borrow the pooled writer connection; commits on success."""
+    with get_pool().writer() as conn:
         yield conn
-        conn.commit()
-    finally:
-        conn.close()
+
+
+@contextmanager
+def db_read() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled read-only connection."""
+    with get_pool().reader() as conn:
+        yield conn
+
+
+async def run_read(fn: Callable[..., T], *args: Any) -> T:
+    """Await ``fn(conn, *args)`` on a pooled reader without blocking the event loop."""
+    return await asyncio.wrap_future(get_pool().submit_read(fn, *args))
+
+
+async def run_write(fn: Callable[..., T], *args: Any) -> T:
+    """Await ``fn(conn, *args)`` on the writer thread; returns after its group commit.
+
+    ``fn`` must only use the connection it is given (never ``db_conn()``).
+    """
+    return await asyncio.wrap_future(get_pool().submit_write(fn, *args))
+
+
+def submit_write(fn: Callable[..., Any], *args: Any) -> Future:
+    """Queue a write without waiting for it (best-effort bookkeeping such as cache upkeep)."""
+    return get_pool().submit_write(fn, *args)
+
+
+def _collect_db_metrics() -> None:
+    """Row-count and file-size gauges, refreshed on every metrics scrape."""
+    for path, label in ((DB_PATH, "db"), (f"{DB_PATH}-wal", "wal"), (ARCHIVE_PATH, "archive")):
+        DB_BYTES.set(os.path.getsize(path) if os.path.exists(path) else 0, file=label)
+    if _pool is None:
+        return
+    with db_read() as conn:
+        live, deleted = conn.execute(
+            "SELECT COUNT(*) - COUNT(deleted_at), COUNT(deleted_at) FROM memories"
+        ).fetchone()
+        DB_ROWS.set(live, table="memories")
+        DB_ROWS.set(deleted, table="memories_deleted")
+        for table in ("memory_tags", "memory_relations", "clusters", "embedding_cache"):
+            DB_ROWS.set(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0], table=table)
+        for status in ("pending", "running", "failed"):
+            ENRICHMENT_JOBS.set(0, status=status)
+        for row in conn.execute("SELECT status, COUNT(*) FROM enrichment_jobs GROUP BY status"):
+            ENRICHMENT_JOBS.set(row[1], status=row[0])
+
+
+register_collector(_collect_db_metrics)
+
+
+MEMORY_TAGS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS memory_tags (
+      memory_id INTEGER NOT NULL,
+      tag       TEXT NOT NULL COLLATE NOCASE,
+      PRIMARY KEY (memory_id, tag),
+      FOREIGN KEY(memory_id) REFERENCES memories(id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_memory_tags_tag ON memory_tags(tag, memory_id)",
+)
+
+# One row per (from, kind, to) edge; the two indexes cover walks in either direction.
+MEMORY_RELATIONS_INDEX_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_memory_relations_edge ON memory_relations(from_id, kind, to_id)",
+    "CREATE INDEX IF NOT EXISTS idx_memory_relations_to ON memory_relations(to_id, kind, from_id)",
+)
+
+# External-content FTS5 index over memories, kept in sync by triggers. Soft-deleted rows stay
+# indexed (searches join on deleted_at) and are removed when the row is purged.
+# Bulk loads (mind/transfer.py) suspend this one and index a whole page with one INSERT ... SELECT.
+MEMORIES_FTS_INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+      INSERT INTO memories_fts(rowid, text, summary, tags) VALUES (new.id, new.text, new.summary, new.tags);
+    END
+"""
+MEMORIES_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+      text, summary, tags,
+      content='memories', content_rowid='id',
+      tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    MEMORIES_FTS_INSERT_TRIGGER,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+      INSERT INTO memories_fts(memories_fts, rowid, text, summary, tags)
+      VALUES ('delete', old.id, old.text, old.summary, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE OF text, summary, tags ON memories BEGIN
+      INSERT INTO memories_fts(memories_fts, rowid, text, summary, tags)
+      VALUES ('delete', old.id, old.text, old.summary, old.tags);
+      INSERT INTO memories_fts(rowid, text, summary, tags) VALUES (new.id, new.text, new.summary, new.tags);
+    END
+    """,
+)
+
+
+# Cold memories moved out of the main database (see mind/maintenance.py), attached as `archive`.
+# Embeddings are plain blobs scanned exactly: the archive is only searched on request.
+ARCHIVE_DDL = (
+    "PRAGMA archive.auto_vacuum=INCREMENTAL",
+    "PRAGMA archive.journal_mode=WAL",
+    """
+    CREATE TABLE IF NOT EXISTS archive.memories (
+      id               INTEGER PRIMARY KEY,
+      uuid             TEXT UNIQUE NOT NULL,
+      user_id          TEXT,
+      agent_id         TEXT,
+      source           TEXT,
+      type             TEXT,
+      text             TEXT NOT NULL,
+      summary          TEXT,
+      tags             TEXT,
+      importance       REAL,
+      conversation_id  TEXT,
+      cluster_id       INTEGER,
+      created_at       INTEGER NOT NULL,
+      updated_at       INTEGER NOT NULL,
+      last_accessed_at INTEGER,
+      extra_json       TEXT,
+      deleted_at       INTEGER,
+      version          INTEGER NOT NULL DEFAULT 1,
+      archived_at      INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.memory_vectors (
+      memory_id INTEGER PRIMARY KEY,
+      embedding BLOB NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.memory_tags (
+      memory_id INTEGER NOT NULL,
+      tag       TEXT NOT NULL COLLATE NOCASE,
+      PRIMARY KEY (memory_id, tag)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_memory_tags_tag ON memory_tags(tag, memory_id)",
+    """
+    CREATE TABLE IF NOT EXISTS archive.memory_relations (
+      id         INTEGER PRIMARY KEY,
+      from_id    INTEGER NOT NULL,
+      to_id      INTEGER NOT NULL,
+      kind       TEXT NOT NULL,
+      created_at INTEGER NOT NULL
+    )
+    """,
+    # No triggers: rows are indexed and un-indexed explicitly as they move in and out.
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS archive.memories_fts USING fts5(
+      text, summary, tags,
+      content='memories', content_rowid='id',
+      tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+)
+
+
+def attach_archive(conn: sqlite3.Connection, *, create: bool = False) -> bool:
+    """ATTACH the archive database as `archive`; False when it does not exist and ``create`` is off.
+
+    Must run outside a transaction; the connection stays attached.
+    """
+    if any(row[1] == "archive" for row in conn.execute("PRAGMA database_list")):
+        return True
+    if not create and not ARCHIVE_PATH.exists():
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (str(ARCHIVE_PATH),))
+    if create:
+        _execute_all(conn, ARCHIVE_DDL)
+    return True
+
+
+def _execute_all(conn: sqlite3.Connection, statements: Sequence[str]) -> None:
+    for statement in statements:
+        conn.execute(statement)
+
+
+# vec0 partition keys of vec_memories (see MIND_TENANT_PARTITIONS); vec_memories_q has no cluster_id.
+VEC_PARTITION_KEYS: Tuple[str, ...] = ("user_id", "agent_id") if TENANT_PARTITIONS else ("cluster_id",)
+_VEC_COLUMN_TYPES = {"cluster_id": "INTEGER", "user_id": "TEXT", "agent_id": "TEXT"}
+
+
+def _vec_columns(names: Sequence[str], element: str) -> str:
+    """Partition keys first, then the vector, then every other column as metadata."""
+    partitions = [f"{name} {_VEC_COLUMN_TYPES[name]} PARTITION KEY" for name in names if name in VEC_PARTITION_KEYS]
+    metadata = [f"{name} {_VEC_COLUMN_TYPES[name]}" for name in names if name not in VEC_PARTITION_KEYS]
+    columns = [*partitions, f"embedding {element}", "type TEXT", "created_at INTEGER", *metadata, "chunk_size=256"]
+    return ",\n          ".join(columns)
+
+
+def vec_memories_ddl() -> str:
+    """vec0 table for embeddings; metadata columns mirror `memories` so KNN can pre-filter.
+
+    vec0 columns cannot hold NULL, so unset user/agent ids are stored as ''
+    and an unassigned cluster as 0. The VEC_PARTITION_KEYS columns are vec0
+    partition keys: each combination of their values gets its own chunks, so
+    a KNN constrained to one only reads those. Chunks are smaller than vec0's
+    default because every partition allocates at least one.
+    """
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS vec_memories
+        USING vec0(
+          {_vec_columns(("cluster_id", "user_id", "agent_id"), f"FLOAT[{MIND_EMBEDDING_DIM}]")}
+        )
+    """
+
+
+def vec_clusters_ddl() -> str:
+    """Cluster centroids, keyed by `clusters.id`."""
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS vec_clusters
+        USING vec0(embedding FLOAT[{MIND_EMBEDDING_DIM}])
+    """
+
+
+def vec_memories_q_ddl(kind: str, dim: int) -> str:
+    """Quantized companion of vec_memories (int8 or bit vectors, same tenant columns and partitioning)."""
+    element = {"int8": "INT8", "bit": "BIT"}[kind]
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS vec_memories_q
+        USING vec0(
+          {_vec_columns(("user_id", "agent_id"), f"{element}[{dim}]")}
+        )
+    """
+
+
+def _partition_keys(conn: sqlite3.Connection, table: str) -> Optional[Tuple[str, ...]]:
+    """Partition key columns of an existing vec0 table; None if the table does not exist."""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()
+    if row is None:
+        return None
+    return tuple(name.lower() for name in re.findall(r"(\w+)\s+\w+\s+PARTITION\s+KEY", row[0], re.IGNORECASE))
+
+
+def get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM mind_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: Optional[str]) -> None:
+    if value is None:
+        conn.execute("DELETE FROM mind_meta WHERE key = ?", (key,))
+    else:
+        conn.execute(
+            "INSERT INTO mind_meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
 
 
 def create_schema(conn: sqlite3.Connection) -> None:
@@ -110,22 +583,24 @@ def create_schema(conn: sqlite3.Connection) -> None:
           last_accessed_at INTEGER,
           extra_json       TEXT,
           deleted_at       INTEGER,
+          version          INTEGER NOT NULL DEFAULT 1,
           FOREIGN KEY(cluster_id) REFERENCES clusters(id)
         );
 
-        CREATE VIRTUAL TABLE IF NOT EXISTS vec_memories
-        USING vec0(
-          embedding FLOAT[{MIND_EMBEDDING_DIM}]
-        );
+        {vec_memories_ddl()};
 
         CREATE TABLE IF NOT EXISTS clusters (
-          id         INTEGER PRIMARY KEY AUTOINCREMENT,
-          label      TEXT,
-          summary    TEXT,
-          created_at INTEGER NOT NULL,
-          updated_at INTEGER NOT NULL
+          id           INTEGER PRIMARY KEY AUTOINCREMENT,
+          label        TEXT,
+          summary      TEXT,
+          created_at   INTEGER NOT NULL,
+          updated_at   INTEGER NOT NULL,
+          size         INTEGER NOT NULL DEFAULT 0,
+          labeled_size INTEGER NOT NULL DEFAULT 0
         );
 
+        {vec_clusters_ddl()};
+
         CREATE TABLE IF NOT EXISTS memory_relations (
           id         INTEGER PRIMARY KEY AUTOINCREMENT,
           from_id    INTEGER NOT NULL,
@@ -136,13 +611,211 @@ def create_schema(conn: sqlite3.Connection) -> None:
           FOREIGN KEY(to_id) REFERENCES memories(id)
         );
 
+        {";".join(MEMORY_TAGS_DDL)};
+
+        {";".join(MEMORIES_FTS_DDL)};
+
+        CREATE TABLE IF NOT EXISTS mind_meta (
+          key   TEXT PRIMARY KEY,
+          value TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+          model        TEXT NOT NULL,
+          dim          INTEGER NOT NULL,
+          text_hash    TEXT NOT NULL,
+          vector       BLOB NOT NULL,
+          created_at   INTEGER NOT NULL,
+          last_used_at INTEGER NOT NULL,
+          PRIMARY KEY (model, dim, text_hash)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS enrichment_jobs (
+          id           INTEGER PRIMARY KEY AUTOINCREMENT,
+          memory_id    INTEGER NOT NULL,
+          fields       TEXT NOT NULL,
+          status       TEXT NOT NULL DEFAULT 'pending',
+          attempts     INTEGER NOT NULL DEFAULT 0,
+          last_error   TEXT,
+          available_at INTEGER NOT NULL,
+          created_at   INTEGER NOT NULL,
+          updated_at   INTEGER NOT NULL,
+          FOREIGN KEY(memory_id) REFERENCES memories(id)
+        );
+
+        -- Vector writes since the last ANN index build (see mind/ann.py).
+        CREATE TABLE IF NOT EXISTS ann_log (
+          seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+          memory_id INTEGER NOT NULL
+        );
+
         CREATE INDEX IF NOT EXISTS idx_memories_cluster_id ON memories(cluster_id);
         CREATE INDEX IF NOT EXISTS idx_memories_deleted_at ON memories(deleted_at);
+        CREATE INDEX IF NOT EXISTS idx_memories_created_at ON memories(created_at);
+        -- Per-tenant listing, newest first, without touching other tenants' rows.
+        CREATE INDEX IF NOT EXISTS idx_memories_user_id ON memories(user_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_memories_agent_id ON memories(agent_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used_at);
+        CREATE INDEX IF NOT EXISTS idx_enrichment_jobs_status ON enrichment_jobs(status, available_at);
+        {";".join(MEMORY_RELATIONS_INDEX_DDL)};
         """
     )
 
 
+def _migrate_vec_metadata(conn: sqlite3.Connection) -> None:
+    """Rebuild vec_memories with metadata columns (and cluster/tenant partitions) copied from `memories`."""
+    conn.execute("CREATE TEMP TABLE vec_backup AS SELECT rowid AS id, embedding FROM vec_memories")
+    conn.execute("DROP TABLE vec_memories")
+    conn.execute(vec_memories_ddl())
+    conn.execute(
+        """
+        INSERT INTO vec_memories(rowid, cluster_id, embedding, type, created_at, user_id, agent_id)
+        SELECT b.id, COALESCE(m.cluster_id, 0), b.embedding, COALESCE(m.type, 'note'), m.created_at,
+               COALESCE(m.user_id, ''), COALESCE(m.agent_id, '')
+        FROM vec_backup b
+        JOIN memories m ON m.id = b.id
+        """
+    )
+    conn.execute("DROP TABLE temp.vec_backup")
+
+
+def _migrate_memory_tags(conn: sqlite3.Connection) -> None:
+    """Create the tag index and backfill it from the comma-joined `memories.tags`."""
+    _execute_all(conn, MEMORY_TAGS_DDL)
+    rows = conn.execute("SELECT id, tags FROM memories WHERE tags IS NOT NULL AND deleted_at IS NULL")
+    conn.executemany(
+        "INSERT OR IGNORE INTO memory_tags(memory_id, tag) VALUES (?, ?)",
+        (
+            (row["id"], tag)
+            for row in rows.fetchall()
+            for tag in (part.strip() for part in row["tags"].split(","))
+            if tag
+        ),
+    )
+
+
+def _migrate_memories_fts(conn: sqlite3.Connection) -> None:
+    """Create the FTS5 index and its triggers, then index existing rows."""
+    _execute_all(conn, MEMORIES_FTS_DDL)
+    conn.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+
+
+def _migrate_memory_version(conn: sqlite3.Connection) -> None:
+    """Add the optimistic-concurrency counter bumped by every update."""
+    conn.execute("ALTER TABLE memories ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+
+def _migrate_clusters(conn: sqlite3.Connection) -> None:
+    """Partition vec_memories by cluster and add centroid storage and cluster sizes."""
+    conn.execute("ALTER TABLE clusters ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE clusters ADD COLUMN labeled_size INTEGER NOT NULL DEFAULT 0")
+    conn.execute(vec_clusters_ddl())
+    ddl = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'vec_memories'").fetchone()[0]
+    if "PARTITION KEY" not in ddl.upper():
+        # Step 1 builds the partitioned table already when upgrading from before it.
+        _migrate_vec_metadata(conn)
+
+
+def _migrate_relation_indexes(conn: sqlite3.Connection) -> None:
+    """Make edges unique and index both directions of memory_relations."""
+    conn.execute(
+        """
+        DELETE FROM memory_relations WHERE id NOT IN (
+          SELECT MIN(id) FROM memory_relations GROUP BY from_id, kind, to_id
+        )
+        """
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_memory_relations_from")
+    _execute_all(conn, MEMORY_RELATIONS_INDEX_DDL)
+
+
+def _sync_vec_partitions(conn: sqlite3.Connection) -> None:
+    """Rebuild vec_memories and vec_memories_q when their partition keys differ from VEC_PARTITION_KEYS."""
+    if _partition_keys(conn, "vec_memories") != VEC_PARTITION_KEYS:
+        _migrate_vec_metadata(conn)
+    quantized = get_meta(conn, "quantized")
+    q_keys = _partition_keys(conn, "vec_memories_q")
+    if quantized is None or q_keys is None or q_keys == tuple(k for k in VEC_PARTITION_KEYS if k != "cluster_id"):
+        return
+    kind, dim, _ = quantized.split(":")
+    conn.execute("CREATE TEMP TABLE vec_q_backup AS SELECT rowid AS id, embedding FROM vec_memories_q")
+    conn.execute("DROP TABLE vec_memories_q")
+    conn.execute(vec_memories_q_ddl(kind, int(dim)))
+    # Stored vectors are raw blobs; vec_int8()/vec_bit() tag them with their element type again.
+    conn.execute(
+        f"""
+        INSERT INTO vec_memories_q(rowid, user_id, agent_id, embedding, type, created_at)
+        SELECT b.id, COALESCE(m.user_id, ''), COALESCE(m.agent_id, ''),
+               {"vec_int8" if kind == "int8" else "vec_bit"}(b.embedding), COALESCE(m.type, 'note'), m.created_at
+        FROM vec_q_backup b
+        JOIN memories m ON m.id = b.id
+        """
+    )
+    conn.execute("DROP TABLE temp.vec_q_backup")
+
+
+# (schema version, step) pairs applied in order to databases created by older releases.
+# Fresh databases get the current schema from create_schema() and start at SCHEMA_VERSION.
+_MIGRATIONS = [
+    (1, _migrate_vec_metadata),
+    (2, _migrate_memory_tags),
+    (3, _migrate_memories_fts),
+    (4, _migrate_memory_version),
+    (5, _migrate_clusters),
+    (6, _migrate_relation_indexes),
+    (7, _sync_vec_partitions),
+]
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+
+def _run_step(conn: sqlite3.Connection, step: Callable[[sqlite3.Connection], None], version: Optional[int] = None) -> None:
+    conn.commit()
+    conn.execute("BEGIN")
+    try:
+        step(conn)
+        if version is not None:
+            conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """Apply pending migrations, one transaction per step."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in _MIGRATIONS:
+        if version >= target:
+            continue
+        _run_step(conn, step, target)
+        version = target
+    # The partition layout follows MIND_TENANT_PARTITIONS, not the schema version.
+    _run_step(conn, _sync_vec_partitions)
+
+
 def init_db() -> None:
-    """Initialize the database on startup."""
+    """Initialize the database on startup, upgrading older schemas in place."""
     with db_conn() as conn:
+        fresh = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'memories'").fetchone() is None
+        if not fresh:
+            migrate(conn)
         create_schema(conn)
+        if fresh:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if VECTOR_QUANTIZATION == "none":
+            # The quantized table is derived data; drop it rather than let it go stale.
+            conn.execute("DROP TABLE IF EXISTS vec_memories_q")
+            set_meta(conn, "quantized", None)
+        elif get_meta(conn, "quantized") is None and conn.execute("SELECT 1 FROM vec_memories LIMIT 1").fetchone() is None:
+            # Nothing to backfill yet, so the quantized table can start out ready.
+            from .quantization import create_table
+
+            create_table(conn, "ready")
+
+        from . import ann
+
+        if not ann.enabled() or get_meta(conn, "ann") is None:
+            # The log only matters relative to a build; without one it is dead weight, and a
+            # build left over from a run with the index disabled has missed writes.
+            conn.execute("DELETE FROM ann_log")
+            set_meta(conn, "ann", None)
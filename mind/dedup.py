@@ -0,0 +1,99 @@
+"""Offline near-duplicate cleanup for memories stored before (or without) MIND_DEDUP_POLICY.
+
+    python -m mind.cli dedup [--policy merge|skip|link] [--distance D] [--batch-size N] [--dry-run]
+
+Live memories are walked in id order, one page at a time. Each one is
+looked up against its nearest neighbours (the ANN index when built, else
+the exact vec0 scan), and a match within the distance threshold that is
+older, live, of the same user and not itself a duplicate makes it a
+duplicate of that match. "merge" folds its tags and importance into the
+original and soft-deletes it, "skip" only soft-deletes it, "link" keeps it
+and records a ``duplicate_of`` relation; memories that already carry one
+are not scanned again, so re-runs only report new duplicates. Each page is applied in one write,
+so progress lives in the database and memory use is bounded by the page size.
+"""
+from __future__ import annotations
+
+from typing import Callable, List, Optional
+
+from .config import DEDUP_DISTANCE
+from .db import db_conn, db_read, now_ts
+from .memory_engine import DEDUP_POLICIES, _link_duplicate, _merge_into, _near_duplicate, _soft_delete
+from .metrics import DUPLICATES
+
+# Pairs echoed back in the result, enough to eyeball a dry run.
+_SAMPLE_PAIRS = 20
+
+
+def run(
+    *,
+    policy: str = "merge",
+    max_distance: float = DEDUP_DISTANCE,
+    batch_size: int = 500,
+    dry_run: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Find and resolve near-duplicates; ``progress(scanned, duplicates)`` is called after each page."""
+    if policy not in DEDUP_POLICIES or policy == "off":
+        raise ValueError(f"Unknown dedup policy {policy!r}; expected skip, merge or link")
+
+    scanned = 0
+    found = 0
+    pairs: List[dict] = []
+    last_id = 0
+    while True:
+        with db_read() as conn:
+            page = conn.execute(
+                """
+                SELECT m.id, m.user_id, m.tags, m.importance, v.embedding
+                FROM memories m JOIN vec_memories v ON v.rowid = m.id
+                WHERE m.id > ? AND m.deleted_at IS NULL
+                  AND NOT EXISTS (
+                    SELECT 1 FROM memory_relations r WHERE r.from_id = m.id AND r.kind = 'duplicate_of'
+                  )
+                ORDER BY m.id LIMIT ?
+                """,
+                (last_id, batch_size),
+            ).fetchall()
+            if not page:
+                break
+            # Duplicates found earlier in this page are not committed yet; keep them from being matched.
+            marked: set[int] = set()
+            matches = []
+            for row in page:
+                match = _near_duplicate(
+                    conn, row["embedding"], row["user_id"],
+                    max_distance=max_distance, older_than=row["id"], exclude=marked,
+                )
+                if match is not None:
+                    marked.add(row["id"])
+                    matches.append((row, *match))
+
+        if matches and not dry_run:
+            ts = now_ts()
+            with db_conn() as conn:
+                for row, original_id, _ in matches:
+                    if policy == "link":
+                        _link_duplicate(conn, row["id"], original_id, ts)
+                        continue
+                    if policy == "merge":
+                        _merge_into(conn, original_id, row["tags"], row["importance"], ts)
+                    _soft_delete(conn, row["id"], ts)
+            DUPLICATES.inc(len(matches), policy=policy)
+
+        for row, original_id, distance in matches[: _SAMPLE_PAIRS - len(pairs)]:
+            pairs.append({"id": row["id"], "duplicate_of": original_id, "distance": round(distance, 4)})
+        scanned += len(page)
+        found += len(matches)
+        last_id = page[-1]["id"]
+        if progress is not None:
+            progress(scanned, found)
+
+    return {
+        "policy": policy,
+        "max_distance": max_distance,
+        "dry_run": dry_run,
+        "scanned": scanned,
+        "duplicates": found,
+        "sample": pairs,
+    }
@@ -0,0 +1,181 @@
+"""Two-tier embedding cache: an in-process LRU in front of a SQLite table.
+
+Entries are keyed by (embedding model, dim, sha256 of the normalized text)
+and stored as little-endian float32 blobs. Both tiers evict least recently
+used entries: the memory tier on every insert past its bound, the SQLite
+tier in one DELETE once it grows past ``MIND_EMBED_CACHE_MAX_ROWS``.
+SQLite-tier writes (inserts and recency updates) are queued to the pool's
+writer thread without waiting, so a cache hit never waits on a commit.
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .config import (
+    EMBED_CACHE_ENABLED,
+    EMBED_CACHE_MAX_ROWS,
+    EMBED_CACHE_MEMORY_ITEMS,
+    MIND_EMBEDDING_DIM,
+    MIND_EMBEDDING_MODEL,
+)
+from .db import db_conn, now_ts, run_read, submit_write
+from .vectors import Vector
+
+# Trim the SQLite tier in chunks so eviction is not a DELETE per insert.
+_TRIM_SLACK = 0.1
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Bounded LRU in memory, backed by the ``embedding_cache`` table."""
+
+    def __init__(
+        self,
+        model: str = MIND_EMBEDDING_MODEL,
+        dim: int = MIND_EMBEDDING_DIM,
+        *,
+        memory_items: int = EMBED_CACHE_MEMORY_ITEMS,
+        max_rows: int = EMBED_CACHE_MAX_ROWS,
+        enabled: bool = EMBED_CACHE_ENABLED,
+    ) -> None:
+        self.model = model
+        self.dim = dim
+        self.memory_items = memory_items
+        self.max_rows = max_rows
+        self.enabled = enabled
+        self._lru: OrderedDict[str, Vector] = OrderedDict()
+        self._lock = threading.Lock()
+        self._rows: Optional[int] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Vector]:
+        """Return cached blobs for the keys that are present in either tier."""
+        if not self.enabled or not keys:
+            return {}
+        found: Dict[str, Vector] = {}
+        with self._lock:
+            for key in keys:
+                blob = self._lru.get(key)
+                if blob is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = blob
+            self.memory_hits += len(found)
+
+        pending = [k for k in dict.fromkeys(keys) if k not in found]
+        if pending:
+            disk = await run_read(self._load, pending)
+            if disk:
+                submit_write(self._touch, list(disk), now_ts())
+                self._remember(disk)
+                found.update(disk)
+            with self._lock:
+                self.disk_hits += len(disk)
+                self.misses += len(pending) - len(disk)
+        return found
+
+    def put_many(self, entries: Dict[str, Vector]) -> None:
+        """Store freshly computed blobs in both tiers (the SQLite write is queued)."""
+        if not self.enabled or not entries:
+            return
+        self._remember(entries)
+        submit_write(self._store, entries, now_ts())
+
+    def _load(self, conn: sqlite3.Connection, keys: List[str]) -> Dict[str, Vector]:
+        rows = conn.execute(
+            f"""
+            SELECT text_hash, vector FROM embedding_cache
+            WHERE model = ? AND dim = ? AND text_hash IN ({",".join("?" * len(keys))})
+            """,
+            (self.model, self.dim, *keys),
+        ).fetchall()
+        return {row["text_hash"]: bytes(row["vector"]) for row in rows}
+
+    def _touch(self, conn: sqlite3.Connection, keys: List[str], ts: int) -> None:
+        conn.execute(
+            f"""
+            UPDATE embedding_cache SET last_used_at = ?
+            WHERE model = ? AND dim = ? AND text_hash IN ({",".join("?" * len(keys))})
+            """,
+            (ts, self.model, self.dim, *keys),
+        )
+
+    def _store(self, conn: sqlite3.Connection, entries: Dict[str, Vector], ts: int) -> None:
+        before = conn.total_changes
+        conn.executemany(
+            """
+            INSERT INTO embedding_cache (model, dim, text_hash, vector, created_at, last_used_at)
+            VALUES (?,?,?,?,?,?)
+            ON CONFLICT(model, dim, text_hash) DO NOTHING
+            """,
+            [(self.model, self.dim, key, blob, ts, ts) for key, blob in entries.items()],
+        )
+        inserted = conn.total_changes - before
+        if inserted < len(entries):
+            # Another caller stored some of these keys first; the vectors match, so a touch will do.
+            self._touch(conn, list(entries), ts)
+        if self._rows is None:
+            self._rows = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        else:
+            self._rows += inserted
+        if self._rows > self.max_rows * (1 + _TRIM_SLACK):
+            excess = self._rows - self.max_rows
+            cur = conn.execute(
+                """
+                DELETE FROM embedding_cache WHERE (model, dim, text_hash) IN (
+                  SELECT model, dim, text_hash FROM embedding_cache ORDER BY last_used_at LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+            self._rows -= cur.rowcount
+            self.disk_evictions += cur.rowcount
+
+    def _remember(self, entries: Dict[str, Vector]) -> None:
+        with self._lock:
+            for key, blob in entries.items():
+                self._lru[key] = blob
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.memory_items:
+                self._lru.popitem(last=False)
+                self.memory_evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached vector for this model/dim from both tiers."""
+        with self._lock:
+            self._lru.clear()
+        with db_conn() as conn:
+            conn.execute("DELETE FROM embedding_cache WHERE model = ? AND dim = ?", (self.model, self.dim))
+        self._rows = None
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_items": len(self._lru),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+
+
+embedding_cache = EmbeddingCache()
@@ -1,30 +1,160 @@
 """Embedding client for OpenRouter (OpenAI-compatible API)."""
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import itertools
+from typing import Dict, List, Optional, Set
 
-import httpx
-
-from .config import OPENROUTER_API_KEY, OPENROUTER_BASE, MIND_EMBEDDING_MODEL
+from . import vectors
+from .config import (
+    EMBED_BATCH_SIZE,
+    EMBED_BATCH_WINDOW_MS,
+    MIND_EMBEDDING_DIM,
+    MIND_EMBEDDING_ENCODING,
+    MIND_EMBEDDING_MODEL,
+    OPENROUTER_API_KEY,
+)
+from .embedding_cache import embedding_cache, text_key
+from .metrics import COALESCED, EMBEDDING_INPUTS, TOKENS, stage
+from .openrouter import post_json
+from .vectors import Vector
 
 
 class EmbeddingError(Exception):
     pass
 
 
-async def embed_texts(texts: list[str]) -> List[List[float]]:
-    """Return embeddings for provided texts using OpenRouter's /embeddings."""
-    if not texts:
-        return []
+async def _fetch_embeddings(texts: list[str]) -> List[Vector]:
     if not OPENROUTER_API_KEY:
         raise EmbeddingError("OPENROUTER_API_KEY is not set")
 
     payload = {"model": MIND_EMBEDDING_MODEL, "input": texts}
-    headers = {"Authorization": f"Bearer {OPENROUTER_API_KEY}"}
+    if MIND_EMBEDDING_ENCODING != "float":
+        payload["encoding_format"] = MIND_EMBEDDING_ENCODING
+    data = await post_json("/embeddings", payload, timeout=30)
+    usage = data.get("usage") or {}
+    if usage.get("prompt_tokens"):
+        TOKENS.inc(usage["prompt_tokens"], endpoint="/embeddings", kind="prompt")
+    items = sorted(data["data"], key=lambda item: item.get("index", 0))
+    # Pack each vector as soon as it is read so the float lists can be freed with the response.
+    packed = [vectors.decode(item.pop("embedding")) for item in items]
+    del data, items
+    if len(packed) != len(texts):
+        raise EmbeddingError(f"Expected {len(texts)} embeddings, got {len(packed)}")
+    for vector in packed:
+        if vectors.dimension(vector) != MIND_EMBEDDING_DIM:
+            raise EmbeddingError(f"Expected {MIND_EMBEDDING_DIM}-dim embeddings, got {vectors.dimension(vector)}")
+    return packed
+
+
+class _EmbedBatcher:
+    """Shares /embeddings requests between concurrent ``embed_texts`` calls.
+
+    A text already being fetched is not requested again: later callers await
+    the same future (single-flight). New texts wait up to
+    MIND_EMBED_BATCH_WINDOW_MS for other callers' texts and then go out
+    together, MIND_EMBED_BATCH_SIZE inputs per request.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queued: Dict[str, str] = {}
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()  # The loop only keeps weak references to tasks.
+
+    def submit(self, missing: Dict[str, str]) -> List[asyncio.Future]:
+        """Futures for the given key -> text pairs, in order."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures are bound to their loop; start over on a new one.
+            self._loop, self._inflight, self._queued, self._timer, self._tasks = loop, {}, {}, None, set()
+        futures = []
+        for key, text in missing.items():
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = loop.create_future()
+                self._queued[key] = text
+                EMBEDDING_INPUTS.inc(source="upstream")
+            else:
+                COALESCED.inc(endpoint="/embeddings")
+            futures.append(future)
+
+        step = max(EMBED_BATCH_SIZE, 1)
+        while len(self._queued) >= step:
+            self._send(step)
+        if self._queued and self._timer is None:
+            if EMBED_BATCH_WINDOW_MS > 0:
+                self._timer = loop.call_later(EMBED_BATCH_WINDOW_MS / 1000, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+        return futures
+
+    def _flush(self) -> None:
+        self._timer = None
+        while self._queued:
+            self._send(max(EMBED_BATCH_SIZE, 1))
+
+    def _send(self, count: int) -> None:
+        batch = dict(itertools.islice(self._queued.items(), count))
+        for key in batch:
+            del self._queued[key]
+        task = asyncio.get_running_loop().create_task(self._fetch(batch, self._inflight))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _fetch(batch: Dict[str, str], inflight: Dict[str, asyncio.Future]) -> None:
+        error: Optional[BaseException] = None
+        try:
+            fresh = dict(zip(batch, await _fetch_embeddings(list(batch.values()))))
+            # Cache first, so a caller arriving after the futures are dropped finds the vectors there.
+            embedding_cache.put_many(fresh)
+            for key, vector in fresh.items():
+                future = inflight.pop(key)
+                if not future.done():
+                    future.set_result(vector)
+        except BaseException as exc:
+            error = exc
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+        finally:
+            # No key of this batch may stay in flight, or single-flight would hand
+            # its pending future to every later caller.
+            for key in batch:
+                future = inflight.pop(key, None)
+                if future is None or future.done():
+                    continue
+                if isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error or EmbeddingError("No embedding returned for this input"))
+
+
+_batcher = _EmbedBatcher()
+
+
+async def embed_texts(texts: list[str]) -> List[Vector]:
+    """Return packed float32 embeddings, fetching only cache misses from OpenRouter."""
+    if not texts:
+        return []
+
+    with stage("embed"):
+        keys = [text_key(t) for t in texts]
+        found = await embedding_cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        EMBEDDING_INPUTS.inc(len(texts) - len(missing), source="cache")
+        if missing:
+            # Shielded: a cancelled caller must not cancel a fetch other callers share.
+            fetched = await asyncio.gather(*(asyncio.shield(f) for f in _batcher.submit(missing)))
+            found.update(zip(missing, fetched))
+
+        return [found[key] for key in keys]
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(f"{OPENROUTER_BASE}/embeddings", json=payload, headers=headers)
-        resp.raise_for_status()
 
-    data = resp.json()
-    return [item["embedding"] for item in data["data"]]
+def cache_stats() -> dict:
+    return embedding_cache.stats()
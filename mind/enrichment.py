@@ -0,0 +1,173 @@
+"""Write-behind AI enrichment backed by the ``enrichment_jobs`` table.
+
+In background mode, new memories are stored right away and a job is queued
+in the same transaction listing the fields the LLM should fill in. Workers
+running on the server's event loop claim jobs, call ``classify_memory`` and
+patch the row through ``update_memory``; their own bookkeeping goes through
+the pool's writer thread like every other write. Jobs survive restarts: a
+claimed job not finished within ``MIND_ENRICHMENT_LEASE_SECONDS`` is
+claimable again, so a crashed process loses nothing while another live
+process sharing the database keeps its jobs. Failed jobs are retried with
+exponential backoff up to ``MIND_ENRICHMENT_MAX_ATTEMPTS``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+from typing import Iterable, List, Optional, Sequence
+
+from .config import (
+    ENRICHMENT_LEASE_SECONDS,
+    ENRICHMENT_MAX_ATTEMPTS,
+    ENRICHMENT_POLL_SECONDS,
+    ENRICHMENT_WORKERS,
+)
+from .db import db_read, now_ts, run_read, run_write
+from .llm import classify_memory
+
+ENRICHABLE_FIELDS = ("type", "tags", "importance", "summary")
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def enqueue(conn: sqlite3.Connection, memory_ids: Sequence[int], fields: Iterable[str]) -> None:
+    """Queue enrichment for memories inside the caller's write transaction."""
+    wanted = [f for f in fields if f in ENRICHABLE_FIELDS]
+    if not wanted or not memory_ids:
+        return
+    ts = now_ts()
+    payload = json.dumps(wanted)
+    conn.executemany(
+        """
+        INSERT INTO enrichment_jobs (memory_id, fields, status, attempts, available_at, created_at, updated_at)
+        VALUES (?, ?, 'pending', 0, ?, ?, ?)
+        """,
+        [(memory_id, payload, ts, ts, ts) for memory_id in memory_ids],
+    )
+
+
+def notify() -> None:
+    """Wake idle workers after new jobs were committed."""
+    if _wakeup is not None and _loop is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def ensure_workers(count: int = ENRICHMENT_WORKERS) -> None:
+    """Start the worker pool on the running loop (no-op if already running there)."""
+    global _wakeup, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop and any(not task.done() for task in _workers):
+        return
+    _workers.clear()
+    _wakeup = asyncio.Event()
+    _loop = loop
+    for _ in range(max(count, 1)):
+        _workers.append(loop.create_task(_worker()))
+
+
+async def stop_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+def queue_stats() -> dict:
+    with db_read() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM enrichment_jobs GROUP BY status").fetchall()
+    return {row["status"]: row["n"] for row in rows}
+
+
+# A running job whose lease ran out was claimed by a process that died.
+_DUE = "(status = 'pending' AND available_at <= ?) OR (status = 'running' AND updated_at <= ?)"
+
+
+def _has_due(conn: sqlite3.Connection) -> bool:
+    ts = now_ts()
+    return (
+        conn.execute(
+            f"SELECT 1 FROM enrichment_jobs WHERE {_DUE} LIMIT 1", (ts, ts - ENRICHMENT_LEASE_SECONDS)
+        ).fetchone()
+        is not None
+    )
+
+
+def _claim(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+    ts = now_ts()
+    return conn.execute(
+        f"""
+        UPDATE enrichment_jobs
+        SET status = 'running', attempts = attempts + 1, updated_at = ?
+        WHERE id = (SELECT id FROM enrichment_jobs WHERE {_DUE} ORDER BY id LIMIT 1)
+        RETURNING id, memory_id, fields, attempts
+        """,
+        (ts, ts, ts - ENRICHMENT_LEASE_SECONDS),
+    ).fetchone()
+
+
+def _finish(conn: sqlite3.Connection, job_id: int) -> None:
+    conn.execute("DELETE FROM enrichment_jobs WHERE id = ?", (job_id,))
+
+
+def _fail(conn: sqlite3.Connection, job: sqlite3.Row, error: Exception) -> None:
+    ts = now_ts()
+    status = "failed" if job["attempts"] >= ENRICHMENT_MAX_ATTEMPTS else "pending"
+    delay = min(30 * 2 ** (job["attempts"] - 1), 3600)
+    conn.execute(
+        "UPDATE enrichment_jobs SET status = ?, last_error = ?, available_at = ?, updated_at = ? WHERE id = ?",
+        (status, str(error)[:500], ts + delay, ts, job["id"]),
+    )
+
+
+async def process_job(job: sqlite3.Row) -> None:
+    """Classify one memory and patch the requested fields."""
+    from .memory_engine import update_memory  # memory_engine imports this module
+
+    row = await run_read(
+        lambda conn: conn.execute(
+            "SELECT text, version FROM memories WHERE id = ? AND deleted_at IS NULL", (job["memory_id"],)
+        ).fetchone()
+    )
+    if row is None:
+        await run_write(_finish, job["id"])
+        return
+
+    guess = await classify_memory(row["text"])
+    fields = json.loads(job["fields"])
+    patch = {}
+    if "type" in fields and guess.get("type"):
+        patch["type_"] = guess["type"]
+    if "tags" in fields and guess.get("tags") is not None:
+        patch["tags"] = guess["tags"]
+    if "importance" in fields and guess.get("importance") is not None:
+        patch["importance"] = guess["importance"]
+    if "summary" in fields and guess.get("summary") is not None:
+        patch["summary"] = guess["summary"]
+    if patch:
+        # A ConflictError (the memory was edited while classifying) fails the job; the retry
+        # classifies the new text.
+        await update_memory(job["memory_id"], expected_version=row["version"], **patch)
+    await run_write(_finish, job["id"])
+
+
+async def _worker() -> None:
+    assert _wakeup is not None
+    while True:
+        _wakeup.clear()
+        # Idle polls stay on the readers; only a due job costs a turn on the single writer.
+        job = await run_write(_claim) if await run_read(_has_due) else None
+        if job is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=ENRICHMENT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        try:
+            await process_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - any failure is retried later
+            await run_write(_fail, job, exc)
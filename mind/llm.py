@@ -1,12 +1,14 @@
-"""LLM helpers for classification and summaries via OpenRouter."""
+"""LLM helpers for classification, summaries and cluster labels via OpenRouter."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
-import httpx
-
-from .config import OPENROUTER_API_KEY, OPENROUTER_BASE, MIND_LLM_MODEL
+from .config import OPENROUTER_API_KEY, MIND_LLM_MODEL
+from .metrics import COALESCED, TOKENS, stage
+from .openrouter import post_json
 
 
 class LLMError(Exception):
@@ -17,24 +19,51 @@ async def call_llm(messages: List[Dict[str, str]], temperature: float = 0.2) ->
     if not OPENROUTER_API_KEY:
         raise LLMError("OPENROUTER_API_KEY is not set")
 
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.post(
-            f"{OPENROUTER_BASE}/chat/completions",
-            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
-            json={
-                "model": MIND_LLM_MODEL,
-                "messages": messages,
-                "temperature": temperature,
-            },
-        )
-        resp.raise_for_status()
-
-    data = resp.json()
+    data = await post_json(
+        "/chat/completions",
+        {
+            "model": MIND_LLM_MODEL,
+            "messages": messages,
+            "temperature": temperature,
+        },
+        timeout=60,
+    )
+    usage = data.get("usage") or {}
+    for kind in ("prompt", "completion"):
+        if usage.get(f"{kind}_tokens"):
+            TOKENS.inc(usage[f"{kind}_tokens"], endpoint="/chat/completions", kind=kind)
     return data["choices"][0]["message"]["content"]
 
 
+# (model, text) -> classification in flight on the current loop, shared by concurrent callers.
+_inflight: Dict[Tuple[str, str], "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+def _forget(key: Tuple[str, str], task: "asyncio.Task[Dict[str, Any]]") -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Retrieved here so a failure nobody awaited is not logged as lost.
+
+
 async def classify_memory(text: str) -> Dict[str, Any]:
-    """Ask the LLM to propose type/tags/importance/summary."""
+    """Ask the LLM to propose type/tags/importance/summary.
+
+    Concurrent calls for the same text share one request.
+    """
+    key = (MIND_LLM_MODEL, text)
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is not None and task.get_loop() is loop:
+        COALESCED.inc(endpoint="/chat/completions")
+    else:
+        task = _inflight[key] = loop.create_task(_classify(text))
+        task.add_done_callback(functools.partial(_forget, key))
+    # Shielded: a cancelled caller must not cancel the request other callers share.
+    return dict(await asyncio.shield(task))
+
+
+async def _classify(text: str) -> Dict[str, Any]:
     system_prompt = (
         'You are a classifier for a personal long-term memory store called "Mind". '
         'Return ONLY JSON with keys: "type", "tags", "importance", "summary".'
@@ -43,6 +72,36 @@ async def classify_memory(text: str) -> Dict[str, Any]:
     )
     user_prompt = f'TEXT:\\n\"\"\"{text}\"\"\"'
 
+    with stage("classify"):
+        raw = await call_llm(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+        )
+    try:
+        result = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise LLMError("LLM did not return valid JSON") from exc
+    if not isinstance(result, dict):
+        raise LLMError("LLM did not return a JSON object")
+    return result
+
+
+async def label_clusters(clusters: List[Tuple[int, int, List[str]]]) -> Dict[int, Dict[str, str]]:
+    """Name several clusters in one call.
+
+    ``clusters`` holds (id, size, sample texts); returns {id: {"label", "summary"}}.
+    """
+    system_prompt = (
+        'You name groups of notes in a personal long-term memory store called "Mind". '
+        "For every group, give a short label (2-5 words) and a one-sentence summary of what its notes share. "
+        'Return ONLY JSON: {"clusters": [{"id": <group id>, "label": "...", "summary": "..."}]}.'
+    )
+    user_prompt = "\n\n".join(
+        f"GROUP {cluster_id} ({size} notes):\n" + "\n".join(f"- {text}" for text in texts)
+        for cluster_id, size, texts in clusters
+    )
     raw = await call_llm(
         [
             {"role": "system", "content": system_prompt},
@@ -50,6 +109,14 @@ async def classify_memory(text: str) -> Dict[str, Any]:
         ]
     )
     try:
-        return json.loads(raw)
+        result = json.loads(raw)
     except json.JSONDecodeError as exc:
         raise LLMError("LLM did not return valid JSON") from exc
+    items = result.get("clusters") if isinstance(result, dict) else None
+    if not isinstance(items, list):
+        raise LLMError("LLM did not return a clusters list")
+    labels: Dict[int, Dict[str, str]] = {}
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("id"), int) and item.get("label"):
+            labels[item["id"]] = {"label": str(item["label"]), "summary": str(item.get("summary") or "")}
+    return labels
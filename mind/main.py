@@ -1,26 +1,87 @@
+"""Entry point: the Gradio UI with its MCP endpoint, or the MCP tools alone.
+
+    python -m mind.main               # UI + MCP on MIND_SERVER_PORT
+    python -m mind.main --headless    # MCP only (same as MIND_MODE=mcp)
+
+Gradio is imported and the Blocks are built only when the UI is served, so
+headless starts skip the whole UI stack. ``demo`` is still available as a
+module attribute (built on first access) for ``gradio mind/main.py`` and Spaces.
+"""
 from __future__ import annotations
 
-import gradio as gr
+import argparse
+from typing import TYPE_CHECKING, List, Optional
+
+from .config import METRICS_HOST, METRICS_PORT, MIND_MODE, SERVER_NAME, SERVER_PORT
+
+if TYPE_CHECKING:
+    import gradio as gr
+
+_demo: Optional["gr.Blocks"] = None
 
-from .config import SERVER_NAME, SERVER_PORT
-from .db import init_db
-from .ui import APP_THEME, CUSTOM_CSS, build_ui
 
+def create_app() -> "gr.Blocks":
+    import gradio as gr
+
+    from .db import init_db
+    from .ui import build_ui
 
-def create_app() -> gr.Blocks:
     init_db()
     with gr.Blocks(title="Mind") as demo:
         build_ui()
     return demo
 
 
-demo = create_app()
+def __getattr__(name: str):
+    global _demo
+    if name == "demo":
+        if _demo is None:
+            _demo = create_app()
+        return _demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-if __name__ == "__main__":
-    demo.launch(
+
+def _launch_ui() -> None:
+    from .ui import APP_THEME, CUSTOM_CSS
+
+    __getattr__("demo").launch(
         server_name=SERVER_NAME,
         server_port=SERVER_PORT,
         mcp_server=True,
         theme=APP_THEME,
         css=CUSTOM_CSS,
     )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m mind.main", description="Run the Mind server.")
+    parser.add_argument(
+        "--headless", action="store_true", help="serve only the MCP tools, without building the Gradio UI"
+    )
+    args = parser.parse_args(argv)
+    headless = args.headless or MIND_MODE == "mcp"
+
+    from . import maintenance
+    from .db import close_pool
+    from .metrics import start_http_server, stop_http_server
+    from .openrouter import close_client
+
+    if METRICS_PORT:
+        start_http_server(METRICS_HOST, METRICS_PORT)
+    maintenance.start()
+    try:
+        if headless:
+            from .mcp_server import serve
+
+            serve()
+        else:
+            _launch_ui()
+    finally:
+        maintenance.stop()
+        stop_http_server()
+        close_client()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""Retention and storage upkeep: tombstone purge, archive tiering, incremental vacuum and WAL checkpoints.
+
+    python -m mind.cli maintenance [--purge-days D] [--archive-days D] [--max-importance I]
+                                   [--vacuum-pages N] [--full-vacuum]
+    python -m mind.cli restore ID [ID ...]
+
+``delete_memory`` only tombstones a row; ``purge`` removes tombstones older
+than MIND_PURGE_AFTER_DAYS for good, with their tags, relations and jobs
+(off by default).
+``archive`` moves cold memories (never accessed, importance at most
+MIND_ARCHIVE_MAX_IMPORTANCE, older than MIND_ARCHIVE_AFTER_DAYS) with their
+embeddings, tags and relations into the database at MIND_ARCHIVE_PATH,
+which ``search_memories(include_archive=True)`` attaches and scans exactly;
+``restore`` brings them back. Freed pages go back to the filesystem through
+``PRAGMA incremental_vacuum`` (new databases are created with
+auto_vacuum=INCREMENTAL; older ones convert once with a full VACUUM), and
+the WAL is truncated by ``PRAGMA wal_checkpoint``.
+
+``start()`` runs checkpoints every MIND_WAL_CHECKPOINT_SECONDS and the whole
+job every MIND_MAINTENANCE_INTERVAL_SECONDS on a daemon thread. Work is
+done in batches on the writer connection, so other writes wait at most one
+batch. The archive and main databases commit separately, so a crash
+mid-batch can leave a memory in both; the next run finishes the move.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from . import clustering
+from .config import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_MAX_IMPORTANCE,
+    ARCHIVE_PATH,
+    DB_PATH,
+    MAINTENANCE_INTERVAL,
+    PURGE_AFTER_DAYS,
+    VACUUM_PAGES,
+    WAL_CHECKPOINT_SECONDS,
+)
+from .db import attach_archive, db_conn, db_read, get_meta, now_ts, set_meta
+from .memory_engine import MEMORY_FIELDS, _drop_vectors, _set_tags, _store_vectors, _vec_row
+from .metrics import stage
+
+_COLUMNS = ", ".join(MEMORY_FIELDS)
+_DAY = 86400
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+# Held by whichever of the scheduler and an on-demand run is working.
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+_last_error: Optional[str] = None
+
+
+def _marks(ids: Sequence[int]) -> str:
+    return ",".join("?" * len(ids))
+
+
+def _file_sizes() -> Dict[str, int]:
+    paths = {"db": DB_PATH, "wal": f"{DB_PATH}-wal", "archive": ARCHIVE_PATH, "archive_wal": f"{ARCHIVE_PATH}-wal"}
+    return {name: os.path.getsize(path) if os.path.exists(path) else 0 for name, path in paths.items()}
+
+
+def _purge_batch(conn: sqlite3.Connection, ids: List[int]) -> None:
+    marks = _marks(ids)
+    # Vectors went with the soft delete; the FTS row goes with the memories row (trigger).
+    conn.execute(f"DELETE FROM memory_relations WHERE from_id IN ({marks}) OR to_id IN ({marks})", [*ids, *ids])
+    conn.execute(f"DELETE FROM enrichment_jobs WHERE memory_id IN ({marks})", ids)
+    conn.execute(f"DELETE FROM memory_tags WHERE memory_id IN ({marks})", ids)
+    conn.execute(f"DELETE FROM memories WHERE id IN ({marks})", ids)
+
+
+def purge(*, older_than_days: float = PURGE_AFTER_DAYS, batch_size: int = 500) -> int:
+    """Hard-delete memories soft-deleted more than ``older_than_days`` ago; returns how many."""
+    if older_than_days <= 0:
+        return 0
+    cutoff = now_ts() - int(older_than_days * _DAY)
+    purged = 0
+    while True:
+        with stage("maintenance.purge"), db_conn() as conn:
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM memories WHERE deleted_at IS NOT NULL AND deleted_at < ? LIMIT ?",
+                    (cutoff, batch_size),
+                )
+            ]
+            if ids:
+                _purge_batch(conn, ids)
+        purged += len(ids)
+        if len(ids) < batch_size:
+            return purged
+
+
+def _archive_batch(conn: sqlite3.Connection, ids: List[int], ts: int) -> None:
+    marks = _marks(ids)
+    # Left behind in both databases by an interrupted run: only the main copy still needs removing.
+    present = {row[0] for row in conn.execute(f"SELECT id FROM archive.memories WHERE id IN ({marks})", ids)}
+    fresh = [memory_id for memory_id in ids if memory_id not in present]
+    if fresh:
+        fresh_marks = _marks(fresh)
+        conn.execute(
+            f"INSERT INTO archive.memories ({_COLUMNS}, archived_at)"
+            f" SELECT {_COLUMNS}, ? FROM main.memories WHERE id IN ({fresh_marks})",
+            [ts, *fresh],
+        )
+        conn.executemany(
+            "INSERT INTO archive.memory_vectors(memory_id, embedding) SELECT rowid, embedding FROM main.vec_memories WHERE rowid = ?",
+            [(memory_id,) for memory_id in fresh],
+        )
+        conn.execute(
+            "INSERT INTO archive.memories_fts(rowid, text, summary, tags)"
+            f" SELECT id, text, summary, tags FROM archive.memories WHERE id IN ({fresh_marks})",
+            fresh,
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO archive.memory_tags(memory_id, tag)"
+            f" SELECT memory_id, tag FROM main.memory_tags WHERE memory_id IN ({fresh_marks})",
+            fresh,
+        )
+    relation_filter = f"from_id IN ({marks}) OR to_id IN ({marks})"
+    conn.execute(
+        "INSERT OR IGNORE INTO archive.memory_relations(id, from_id, to_id, kind, created_at)"
+        f" SELECT id, from_id, to_id, kind, created_at FROM main.memory_relations WHERE {relation_filter}",
+        [*ids, *ids],
+    )
+    conn.execute(f"DELETE FROM main.memory_relations WHERE {relation_filter}", [*ids, *ids])
+    for row in conn.execute(f"SELECT cluster_id FROM main.memories WHERE id IN ({marks})", ids).fetchall():
+        clustering.resize(conn, row[0], None)
+    _drop_vectors(conn, ids)
+    conn.execute(f"DELETE FROM main.enrichment_jobs WHERE memory_id IN ({marks})", ids)
+    conn.execute(f"DELETE FROM main.memory_tags WHERE memory_id IN ({marks})", ids)
+    conn.execute(f"DELETE FROM main.memories WHERE id IN ({marks})", ids)
+
+
+def archive(
+    *,
+    older_than_days: float = ARCHIVE_AFTER_DAYS,
+    max_importance: float = ARCHIVE_MAX_IMPORTANCE,
+    batch_size: int = 500,
+) -> int:
+    """Move cold memories to the archive database; returns how many moved."""
+    if older_than_days <= 0:
+        return 0
+    cutoff = now_ts() - int(older_than_days * _DAY)
+    moved = 0
+    while True:
+        with stage("maintenance.archive"), db_conn() as conn:
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT id FROM memories
+                    WHERE deleted_at IS NULL AND last_accessed_at IS NULL
+                      AND COALESCE(importance, 0) <= ? AND created_at < ?
+                    LIMIT ?
+                    """,
+                    (max_importance, cutoff, batch_size),
+                )
+            ]
+            if ids:
+                attach_archive(conn, create=True)
+                _archive_batch(conn, ids, now_ts())
+        moved += len(ids)
+        if len(ids) < batch_size:
+            return moved
+
+
+def restore(memory_ids: Sequence[int]) -> int:
+    """Move archived memories back into the main database; returns how many were found.
+
+    They come back unclustered (the next rebalance places them) and marked
+    as accessed, so the next run does not archive them again.
+    """
+    ids = list(dict.fromkeys(memory_ids))
+    if not ids:
+        return 0
+    marks = _marks(ids)
+    ts = now_ts()
+    with stage("maintenance.restore"), db_conn() as conn:
+        if not attach_archive(conn):
+            return 0
+        rows = conn.execute(
+            f"""
+            SELECT m.id, m.type, m.tags, m.created_at, m.user_id, m.agent_id, v.embedding
+            FROM archive.memories m JOIN archive.memory_vectors v ON v.memory_id = m.id
+            WHERE m.id IN ({marks})
+            """,
+            ids,
+        ).fetchall()
+        found = [row["id"] for row in rows]
+        if not found:
+            return 0
+        marks = _marks(found)
+        restored_columns = ", ".join("NULL" if column == "cluster_id" else column for column in MEMORY_FIELDS)
+        conn.execute(
+            f"INSERT INTO main.memories ({_COLUMNS}) SELECT {restored_columns} FROM archive.memories WHERE id IN ({marks})",
+            found,
+        )
+        conn.execute(f"UPDATE main.memories SET last_accessed_at = ? WHERE id IN ({marks})", [ts, *found])
+        _store_vectors(
+            conn,
+            [
+                _vec_row(row["id"], row["embedding"], row["type"], row["created_at"], row["user_id"], row["agent_id"], None)
+                for row in rows
+            ],
+        )
+        _set_tags(conn, found, [row["tags"] for row in rows])
+        # Relations come back once both ends are live again.
+        relations = conn.execute(
+            f"""
+            SELECT r.id, r.from_id, r.to_id, r.kind, r.created_at FROM archive.memory_relations r
+            WHERE (r.from_id IN ({marks}) OR r.to_id IN ({marks}))
+              AND r.from_id IN (SELECT id FROM main.memories) AND r.to_id IN (SELECT id FROM main.memories)
+            """,
+            [*found, *found],
+        ).fetchall()
+        conn.executemany(
+            "INSERT OR IGNORE INTO main.memory_relations(id, from_id, to_id, kind, created_at) VALUES (?, ?, ?, ?, ?)",
+            [tuple(relation) for relation in relations],
+        )
+        conn.executemany("DELETE FROM archive.memory_relations WHERE id = ?", [(relation[0],) for relation in relations])
+        conn.execute(
+            "INSERT INTO archive.memories_fts(memories_fts, rowid, text, summary, tags)"
+            f" SELECT 'delete', id, text, summary, tags FROM archive.memories WHERE id IN ({marks})",
+            found,
+        )
+        conn.execute(f"DELETE FROM archive.memory_vectors WHERE memory_id IN ({marks})", found)
+        conn.execute(f"DELETE FROM archive.memory_tags WHERE memory_id IN ({marks})", found)
+        conn.execute(f"DELETE FROM archive.memories WHERE id IN ({marks})", found)
+    return len(found)
+
+
+def _schemas(conn: sqlite3.Connection) -> List[str]:
+    return [row[1] for row in conn.execute("PRAGMA database_list") if row[1] in ("main", "archive")]
+
+
+def vacuum(*, pages: int = VACUUM_PAGES, full: bool = False) -> dict:
+    """Return free pages to the filesystem, at most ``pages`` per database (0 = all).
+
+    ``full`` rewrites each database with VACUUM instead, which also switches
+    databases created before auto_vacuum=INCREMENTAL over to it; it blocks
+    writes for the whole rewrite.
+    """
+    freed = {}
+    with stage("maintenance.vacuum"), db_conn() as conn:
+        attach_archive(conn)
+        for schema in _schemas(conn):
+            before = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            if full:
+                conn.execute(f"PRAGMA {schema}.auto_vacuum=INCREMENTAL")
+                conn.execute(f"VACUUM {schema}")
+            elif conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] == 2:
+                conn.execute(f"PRAGMA {schema}.incremental_vacuum({max(pages, 0)})").fetchall()
+            page_size = conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+            freed[schema] = (before - conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]) * page_size
+    return {"freed_bytes": freed, "full": full}
+
+
+def checkpoint(mode: str = "TRUNCATE") -> dict:
+    """Checkpoint the WAL (PASSIVE, FULL, RESTART or TRUNCATE); ``busy`` means readers held it back."""
+    if mode.upper() not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode {mode!r}")
+    result = {}
+    with stage("maintenance.checkpoint"), db_conn() as conn:
+        for schema in _schemas(conn):
+            busy, log, done = conn.execute(f"PRAGMA {schema}.wal_checkpoint({mode.upper()})").fetchone()
+            result[schema] = {"busy": bool(busy), "log_pages": log, "checkpointed_pages": done}
+    return result
+
+
+def run(
+    *,
+    purge_days: float = PURGE_AFTER_DAYS,
+    archive_days: float = ARCHIVE_AFTER_DAYS,
+    max_importance: float = ARCHIVE_MAX_IMPORTANCE,
+    vacuum_pages: int = VACUUM_PAGES,
+    full_vacuum: bool = False,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """Purge, archive, vacuum and checkpoint in one go and report what that reclaimed."""
+    global _last_error
+    report = progress or (lambda message: None)
+    with _lock:
+        started = time.perf_counter()
+        before = _file_sizes()
+        try:
+            # Fold the WAL into the data files first, so their size change below is what
+            # purge, archive and vacuum reclaimed, not pages the checkpoint copied in.
+            checkpoint()
+            settled = _file_sizes()
+            purged = purge(older_than_days=purge_days)
+            report(f"purged {purged} deleted memories")
+            archived = archive(older_than_days=archive_days, max_importance=max_importance)
+            report(f"archived {archived} cold memories")
+            vacuumed = vacuum(pages=vacuum_pages, full=full_vacuum)
+            report(f"vacuumed ({'full' if full_vacuum else 'incremental'})")
+            checkpointed = checkpoint()
+        except Exception as exc:
+            _last_error = f"{type(exc).__name__}: {exc}"
+            raise
+        _last_error = None
+        after = _file_sizes()
+        result = {
+            "purged": purged,
+            "archived": archived,
+            **vacuumed,
+            "checkpoint": checkpointed,
+            "bytes_before": before,
+            "bytes_after": after,
+            # Archived rows move to the archive file, so only the total across both is reclaimed space.
+            "reclaimed_bytes": sum(settled[name] - after[name] for name in ("db", "archive")),
+            "wal_truncated_bytes": sum(before[name] - after[name] for name in ("wal", "archive_wal")),
+            "seconds": round(time.perf_counter() - started, 3),
+            "at": now_ts(),
+        }
+        with db_conn() as conn:
+            set_meta(conn, "maintenance", json.dumps({k: result[k] for k in ("purged", "archived", "reclaimed_bytes", "wal_truncated_bytes", "at")}))
+        return result
+
+
+def stats() -> dict:
+    """Storage state for mind_stats: vacuum mode, free space, tombstones, archive size and the last run."""
+    with db_read() as conn:
+        attach_archive(conn)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        last = get_meta(conn, "maintenance")
+        archived = (
+            conn.execute("SELECT COUNT(*) FROM archive.memories").fetchone()[0]
+            if "archive" in _schemas(conn)
+            else 0
+        )
+        return {
+            "auto_vacuum": _AUTO_VACUUM_MODES.get(conn.execute("PRAGMA auto_vacuum").fetchone()[0], "unknown"),
+            "free_bytes": conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size,
+            "deleted": conn.execute("SELECT COUNT(*) FROM memories WHERE deleted_at IS NOT NULL").fetchone()[0],
+            "archived": archived,
+            "files": _file_sizes(),
+            "last_run": json.loads(last) if last else None,
+            "last_error": _last_error,
+            "scheduled": _thread is not None and _thread.is_alive(),
+        }
+
+
+def start() -> None:
+    """Run WAL checkpoints and scheduled maintenance on a daemon thread (no-op if running or disabled)."""
+    global _thread
+    intervals = [interval for interval in (MAINTENANCE_INTERVAL, WAL_CHECKPOINT_SECONDS) if interval > 0]
+    if not intervals or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_schedule, args=(min(intervals),), name="mind-maintenance", daemon=True)
+    _thread.start()
+
+
+def stop() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join()
+        _thread = None
+
+
+def _schedule(tick: float) -> None:
+    global _last_error
+    next_run = time.monotonic() + MAINTENANCE_INTERVAL if MAINTENANCE_INTERVAL > 0 else math.inf
+    while not _stop.wait(tick):
+        try:
+            if time.monotonic() >= next_run:
+                next_run = time.monotonic() + MAINTENANCE_INTERVAL
+                run()
+            elif WAL_CHECKPOINT_SECONDS > 0 and not _lock.locked():
+                checkpoint()
+        except Exception as exc:
+            _last_error = f"{type(exc).__name__}: {exc}"  # Kept in stats(); the next tick tries again.
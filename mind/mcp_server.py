@@ -0,0 +1,39 @@
+"""Headless MCP server: the ``mind_*`` tools without the Gradio UI.
+
+Started with ``python -m mind.main --headless`` (or ``MIND_MODE=mcp``). Only
+the ``mcp`` SDK (installed with ``gradio[mcp]``) and the engine are imported;
+Gradio is never loaded and no Blocks are built. ``MIND_MCP_TRANSPORT``
+selects ``sse`` (``/sse``, the default), ``streamable-http`` (``/mcp``) or
+``stdio``, served on ``MIND_SERVER_NAME:MIND_SERVER_PORT``.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .config import MCP_TRANSPORT, SERVER_NAME, SERVER_PORT
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+
+_TRANSPORTS = ("sse", "streamable-http", "stdio")
+
+
+def create_server() -> "FastMCP":
+    """Open the database and register the tools on a FastMCP server."""
+    from mcp.server.fastmcp import FastMCP
+
+    from .db import init_db
+    from .tools import MCP_TOOLS
+
+    init_db()
+    server = FastMCP("Mind", host=SERVER_NAME, port=SERVER_PORT)
+    for tool in MCP_TOOLS:
+        server.add_tool(tool)
+    return server
+
+
+def serve(transport: str = MCP_TRANSPORT) -> None:
+    if transport not in _TRANSPORTS:
+        raise ValueError(f"MIND_MCP_TRANSPORT must be one of {', '.join(_TRANSPORTS)}")
+    server = create_server()
+    server.run(transport=transport)
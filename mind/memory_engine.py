@@ -1,14 +1,63 @@
 """Core memory operations for Mind."""
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Iterable, List, Optional
+import math
+import re
+import sqlite3
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Union
 from uuid import uuid4
 
-from .config import AI_ASSIST_ENABLED
-from .db import db_conn, now_ts
+from . import access, ann, clustering, enrichment, quantization
+from .config import (
+    AI_ASSIST_ENABLED,
+    CLASSIFY_CONCURRENCY,
+    CLUSTER_NPROBE,
+    CLUSTER_ROUTING,
+    DEDUP_DISTANCE,
+    DEDUP_POLICY,
+    ENRICHMENT_MODE,
+    GRAPH_HOPS,
+    GRAPH_NEIGHBOURS,
+    GRAPH_SEEDS,
+    HYBRID_RRF_K,
+    INGEST_CHUNK_SIZE,
+    RANK_ACCESS_HALF_LIFE_DAYS,
+    RANK_ACCESS_WEIGHT,
+    RANK_IMPORTANCE_WEIGHT,
+    RANK_OVERFETCH,
+    RANK_RECENCY_HALF_LIFE_DAYS,
+    RANK_RECENCY_WEIGHT,
+    RANK_RELEVANCE_WEIGHT,
+    RANKING,
+    RELATION_DEFAULT_WEIGHT,
+    RELATION_WEIGHTS,
+    SEARCH_EXACT,
+    SEARCH_MAX_K,
+    SEARCH_MODE,
+    SEARCH_OVERFETCH,
+    TENANT_PARTITIONS,
+    VECTOR_RERANK_FACTOR,
+)
+from .db import attach_archive, now_ts, run_read, run_write
 from .embeddings import embed_texts
 from .llm import LLMError, classify_memory
+from .metrics import DUPLICATES, stage, timed
+from .vectors import Vector
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+RANKINGS = ("relevance", "blend")
+DEDUP_POLICIES = ("off", "skip", "merge", "link")
+# Nearest neighbours looked at when checking for a near-duplicate.
+_DEDUP_NEIGHBOURS = 8
+# Most paths a graph expansion walks, so a hub memory cannot blow up the recursion.
+_GRAPH_MAX_VISITS = 10000
+RELATION_DIRECTIONS = ("out", "in", "both")
+
+
+class ConflictError(Exception):
+    """The memory was changed by someone else since the caller read it."""
 
 
 def _normalize_tags(tags: Optional[Iterable[str]]) -> Optional[str]:
@@ -17,9 +66,11 @@ def _normalize_tags(tags: Optional[Iterable[str]]) -> Optional[str]:
     cleaned = [t.strip() for t in tags if t and t.strip()]
     if not cleaned:
         return None
-    # Remove duplicates while preserving order.
-    seen = dict.fromkeys(cleaned)
-    return ",".join(seen.keys())
+    # Remove duplicates (case-insensitively, like the tag index) while preserving order.
+    seen: dict[str, str] = {}
+    for tag in cleaned:
+        seen.setdefault(tag.lower(), tag)
+    return ",".join(seen.values())
 
 
 def _parse_tags(tags_text: Optional[str]) -> List[str]:
@@ -28,33 +79,253 @@ def _parse_tags(tags_text: Optional[str]) -> List[str]:
     return [t for t in (part.strip() for part in tags_text.split(",")) if t]
 
 
+def _set_tags(conn: sqlite3.Connection, memory_ids: Sequence[int], tags_texts: Sequence[Optional[str]]) -> None:
+    """Replace the `memory_tags` rows of each memory with its normalized tags."""
+    conn.executemany("DELETE FROM memory_tags WHERE memory_id = ?", [(memory_id,) for memory_id in memory_ids])
+    conn.executemany(
+        "INSERT OR IGNORE INTO memory_tags(memory_id, tag) VALUES (?, ?)",
+        [
+            (memory_id, tag)
+            for memory_id, tags_text in zip(memory_ids, tags_texts)
+            for tag in _parse_tags(tags_text)
+        ],
+    )
+
+
+def _filter_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Tags to filter by, normalized like stored tags; blank entries are dropped."""
+    return _parse_tags(_normalize_tags(tags))
+
+
+def _tag_filter(tags: List[str], mode: str, schema: str = "main") -> tuple[str, List[Any]]:
+    """Subquery selecting memory ids that carry all (or any) of the tags, exactly.
+
+    ``tags`` must be non-empty and normalized (see ``_filter_tags``).
+    """
+    wanted = list(tags)
+    placeholders = ",".join("?" * len(wanted))
+    if mode == "any":
+        return f"SELECT memory_id FROM {schema}.memory_tags WHERE tag IN ({placeholders})", wanted
+    if mode != "all":
+        raise ValueError(f"Unknown tags_mode {mode!r}; expected 'all' or 'any'")
+    return (
+        f"SELECT memory_id FROM {schema}.memory_tags WHERE tag IN ({placeholders}) "
+        f"GROUP BY memory_id HAVING COUNT(*) = {len(wanted)}",
+        wanted,
+    )
+
+
 def _row_to_memory(row: Any) -> Optional[dict]:
+    """Decode a `memories` row, or the selected subset of its columns (plus any score columns)."""
     if row is None:
         return None
-    data = {
-        "id": row["id"],
-        "uuid": row["uuid"],
-        "user_id": row["user_id"],
-        "agent_id": row["agent_id"],
-        "source": row["source"],
-        "type": row["type"],
-        "text": row["text"],
-        "summary": row["summary"],
-        "tags": _parse_tags(row["tags"]),
-        "importance": row["importance"],
-        "conversation_id": row["conversation_id"],
-        "cluster_id": row["cluster_id"],
-        "created_at": row["created_at"],
-        "updated_at": row["updated_at"],
-        "last_accessed_at": row["last_accessed_at"],
-        "deleted_at": row["deleted_at"],
-        "extra_json": json.loads(row["extra_json"]) if row["extra_json"] else None,
-    }
-    if "distance" in row.keys():
-        data["distance"] = row["distance"]
+    data = dict(row)
+    if "tags" in data:
+        data["tags"] = _parse_tags(data["tags"])
+    if "extra_json" in data:
+        data["extra_json"] = json.loads(data["extra_json"]) if data["extra_json"] else None
     return data
 
 
+# Columns a caller can ask for with ``fields``; ``id`` is always included.
+MEMORY_FIELDS = (
+    "id", "uuid", "user_id", "agent_id", "source", "type", "text", "summary", "tags", "importance",
+    "conversation_id", "cluster_id", "created_at", "updated_at", "last_accessed_at", "deleted_at",
+    "version", "extra_json",
+)
+
+
+def _columns(fields: Optional[Sequence[str]]) -> str:
+    """SELECT list over `memories m` for ``fields`` (every column when None)."""
+    if fields is None:
+        return "m.*"
+    unknown = [field for field in fields if field not in MEMORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown memory fields {', '.join(unknown)}; expected any of {', '.join(MEMORY_FIELDS)}")
+    return ", ".join(f"m.{field}" for field in dict.fromkeys(["id", *fields]))
+
+
+_INSERT_MEMORY_SQL = """
+    INSERT INTO memories (
+      uuid, user_id, agent_id, source, type, text, summary,
+      tags, importance, conversation_id, cluster_id,
+      created_at, updated_at, last_accessed_at, extra_json
+    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+
+_INSERT_VEC_SQL = """
+    INSERT INTO vec_memories(rowid, embedding, type, created_at, user_id, agent_id, cluster_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _vec_row(
+    memory_id: int,
+    embedding: Vector,
+    type_: str,
+    created_at: int,
+    user_id: Optional[str],
+    agent_id: Optional[str],
+    cluster_id: Optional[int],
+) -> tuple:
+    # vec0 metadata columns reject NULL, so unset ids are stored as '' (and no cluster as partition 0).
+    return (memory_id, embedding, type_ or "note", created_at, user_id or "", agent_id or "", cluster_id or 0)
+
+
+def _store_vectors(conn: sqlite3.Connection, rows: Sequence[tuple]) -> None:
+    """Insert `_vec_row` tuples into vec_memories and every derived vector index."""
+    conn.executemany(_INSERT_VEC_SQL, rows)
+    quantization.insert(conn, [row[:6] for row in rows])
+    ann.log_changes(conn, [row[0] for row in rows])
+
+
+def _drop_vectors(conn: sqlite3.Connection, memory_ids: Sequence[int]) -> None:
+    conn.executemany("DELETE FROM vec_memories WHERE rowid = ?", [(i,) for i in memory_ids])
+    quantization.delete(conn, memory_ids)
+    ann.log_changes(conn, memory_ids)
+
+
+def _retype_vector(conn: sqlite3.Connection, memory_id: int, type_: Optional[str]) -> None:
+    conn.execute("UPDATE vec_memories SET type = ? WHERE rowid = ?", (type_ or "note", memory_id))
+    quantization.set_type(conn, memory_id, type_ or "note")
+
+
+def _wants_ai(
+    ai_enabled: bool,
+    type_: Optional[str],
+    tags: Optional[List[str]],
+    importance: Optional[float],
+    summary: Optional[str],
+) -> bool:
+    return ai_enabled and (type_ in (None, "auto") or tags is None or importance is None or summary is None)
+
+
+def _missing_fields(
+    type_: Optional[str],
+    tags: Optional[List[str]],
+    importance: Optional[float],
+    summary: Optional[str],
+) -> List[str]:
+    """Fields the caller left for the LLM to fill in."""
+    provided = {"type": type_ not in (None, "auto"), "tags": tags is not None,
+                "importance": importance is not None, "summary": summary is not None}
+    return [field for field, given in provided.items() if not given]
+
+
+async def _classify_or_empty(text: str) -> dict[str, Any]:
+    try:
+        return await classify_memory(text)
+    except LLMError:
+        return {}
+
+
+async def _no_guess() -> dict[str, Any]:
+    return {}
+
+
+def _resolve_metadata(
+    ai_guess: dict[str, Any],
+    type_: Optional[str],
+    tags: Optional[List[str]],
+    importance: Optional[float],
+    summary: Optional[str],
+) -> tuple[str, Optional[str], Optional[float], Optional[str]]:
+    """Merge caller-provided fields with the AI guess; returns (type, tags_text, importance, summary)."""
+    resolved_type = type_ if type_ not in (None, "auto") else ai_guess.get("type")
+    if not resolved_type:
+        # Fallback so every memory has a reasonable type
+        resolved_type = "note"
+
+    resolved_tags = tags if tags is not None else ai_guess.get("tags")
+    resolved_importance = importance if importance is not None else ai_guess.get("importance")
+    resolved_summary = summary if summary is not None else ai_guess.get("summary")
+    return resolved_type, _normalize_tags(resolved_tags), resolved_importance, resolved_summary
+
+
+def _near_duplicate(
+    conn: sqlite3.Connection,
+    embedding: Vector,
+    user_id: Optional[str],
+    *,
+    max_distance: float = DEDUP_DISTANCE,
+    older_than: Optional[int] = None,
+    exclude: Iterable[int] = (),
+) -> Optional[tuple[int, float]]:
+    """Closest live memory of the same user within ``max_distance``, as (id, distance).
+
+    Memories already linked as a duplicate of another one never qualify, so
+    duplicates always point at the original. ``older_than`` restricts the
+    match to smaller ids (the offline job keeps the oldest copy). Neighbours
+    are fetched in growing batches until one qualifies or they lie beyond
+    ``max_distance``.
+    """
+    index = None if SEARCH_EXACT else ann.get_index(conn)
+    skip = set(exclude)
+    k = _DEDUP_NEIGHBOURS
+    while True:
+        if index is not None:
+            matches, exhausted = index.search(embedding, k)
+        else:
+            matches, exhausted = _vector_matches(conn, embedding, k, ["user_id = ?"], [user_id or ""])
+        close = {
+            memory_id: distance
+            for memory_id, distance in matches
+            if distance <= max_distance and memory_id not in skip and (older_than is None or memory_id < older_than)
+        }
+        rows = conn.execute(
+            f"""
+            SELECT m.id FROM memories m
+            WHERE m.id IN ({",".join("?" * len(close))}) AND m.deleted_at IS NULL AND m.user_id IS ?
+              AND NOT EXISTS (
+                SELECT 1 FROM memory_relations r WHERE r.from_id = m.id AND r.kind = 'duplicate_of'
+              )
+            """,
+            [*close, user_id],
+        ).fetchall() if close else []
+        if rows:
+            best = min((row[0] for row in rows), key=close.__getitem__)
+            return best, close[best]
+        # Other tenants (the ANN index holds all of them), the memory itself and newer or
+        # linked copies can fill every slot; widen while the neighbours are still close enough.
+        if exhausted or k >= SEARCH_MAX_K or max((distance for _, distance in matches), default=math.inf) > max_distance:
+            return None
+        k = min(k * 4, SEARCH_MAX_K)
+
+
+def _merge_into(
+    conn: sqlite3.Connection,
+    memory_id: int,
+    tags_text: Optional[str],
+    importance: Optional[float],
+    ts: int,
+) -> Optional[sqlite3.Row]:
+    """Fold a duplicate's tags (union) and importance (max) into a live memory; None if it is gone."""
+    existing = conn.execute(
+        "SELECT * FROM memories WHERE id = ? AND deleted_at IS NULL", (memory_id,)
+    ).fetchone()
+    if existing is None:
+        return None
+    merged_tags = _normalize_tags([*_parse_tags(existing["tags"]), *_parse_tags(tags_text)])
+    importances = [value for value in (existing["importance"], importance) if value is not None]
+    merged_importance = max(importances) if importances else None
+    if merged_tags != existing["tags"] or merged_importance != existing["importance"]:
+        conn.execute(
+            "UPDATE memories SET tags = ?, importance = ?, updated_at = ?, version = version + 1 WHERE id = ?",
+            (merged_tags, merged_importance, ts, memory_id),
+        )
+        _set_tags(conn, [memory_id], [merged_tags])
+    return _get_row(conn, memory_id)
+
+
+def _link_duplicate(conn: sqlite3.Connection, memory_id: int, original_id: int, ts: int) -> None:
+    conn.execute(
+        "INSERT OR IGNORE INTO memory_relations(from_id, to_id, kind, created_at) VALUES (?, ?, 'duplicate_of', ?)",
+        (memory_id, original_id, ts),
+    )
+
+
+@timed("create_memory")
 async def create_memory(
     text: str,
     *,
@@ -69,42 +340,74 @@ async def create_memory(
     extra_json: Optional[dict] = None,
     summary: Optional[str] = None,
     use_ai: Optional[bool] = None,
+    dedup: Optional[str] = None,
 ) -> dict:
-    ai_enabled = AI_ASSIST_ENABLED if use_ai is None else use_ai
-    ai_guess: dict[str, Any] = {}
-    if ai_enabled and (type_ in (None, "auto") or tags is None or importance is None or summary is None):
-        try:
-            ai_guess = await classify_memory(text)
-        except LLMError:
-            ai_guess = {}
+    """Store one memory.
 
-    resolved_type = type_ if type_ not in (None, "auto") else ai_guess.get("type")
-    if not resolved_type:
-        # Fallback so every memory has a reasonable type
-        resolved_type = "note"
+    With a ``dedup`` policy (default MIND_DEDUP_POLICY) other than "off", a
+    live memory of the same user within MIND_DEDUP_DISTANCE is treated as
+    the same memory: "skip" returns it unchanged, "merge" folds the new tags
+    and importance into it and returns it, "link" stores the new memory with
+    a ``duplicate_of`` relation. The result then carries ``duplicate_of``
+    (the existing id) and ``dedup`` (the policy applied).
+    """
+    policy = (dedup or DEDUP_POLICY).lower()
+    if policy not in DEDUP_POLICIES:
+        raise ValueError(f"Unknown dedup policy {policy!r}; expected one of {', '.join(DEDUP_POLICIES)}")
+    ai_enabled = AI_ASSIST_ENABLED if use_ai is None else use_ai
+    wants_ai = _wants_ai(ai_enabled, type_, tags, importance, summary)
+    # In background mode the row is stored with provisional metadata and enriched later.
+    deferred = wants_ai and ENRICHMENT_MODE == "background"
 
-    resolved_tags = tags if tags is not None else ai_guess.get("tags")
-    resolved_importance = importance if importance is not None else ai_guess.get("importance")
-    resolved_summary = summary if summary is not None else ai_guess.get("summary")
+    # Classification and embedding are independent network calls; run them together.
+    ai_guess, embeddings = await asyncio.gather(
+        _classify_or_empty(text) if wants_ai and not deferred else _no_guess(),
+        embed_texts([text]),
+    )
+    embedding = embeddings[0]
 
+    resolved_type, tags_text, resolved_importance, resolved_summary = _resolve_metadata(
+        ai_guess, type_, tags, importance, summary
+    )
 
     ts = now_ts()
     memory_uuid = str(uuid4())
-
-    tags_text = _normalize_tags(resolved_tags)
     extra_json_text = json.dumps(extra_json) if extra_json else None
 
-    embedding = (await embed_texts([text]))[0]
+    async def no_duplicate() -> None:
+        return None
 
-    with db_conn() as conn:
+    async def explicit_cluster() -> List[Optional[int]]:
+        return [cluster_id]
+
+    # Looked up on readers (the duplicate through the ANN index when built), so the writer only re-checks ids.
+    with stage("create_memory.lookup"):
+        duplicate, (assigned_cluster,) = await asyncio.gather(
+            run_read(_near_duplicate, embedding, user_id) if policy != "off" else no_duplicate(),
+            clustering.assign([embedding]) if cluster_id is None else explicit_cluster(),
+        )
+
+    def absorb(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        if policy == "merge":
+            return _merge_into(conn, duplicate[0], tags_text, resolved_importance, ts)
+        return conn.execute(
+            "SELECT * FROM memories WHERE id = ? AND deleted_at IS NULL", (duplicate[0],)
+        ).fetchone()
+
+    if duplicate is not None and policy in ("skip", "merge"):
+        row = await run_write(absorb)
+        if row is not None:
+            DUPLICATES.inc(policy=policy)
+            return {**_row_to_memory(row), "duplicate_of": duplicate[0], "dedup": policy, "distance": duplicate[1]}
+        # The match was deleted in the meantime: store the new memory after all.
+        duplicate = None
+
+    def write(conn: sqlite3.Connection) -> sqlite3.Row:
+        resolved_cluster = assigned_cluster
+        if cluster_id is None and resolved_cluster not in clustering.existing(conn, [resolved_cluster]):
+            resolved_cluster = None  # Dropped by a rebalance since it was picked.
         cur = conn.execute(
-            """
-            INSERT INTO memories (
-              uuid, user_id, agent_id, source, type, text, summary,
-              tags, importance, conversation_id, cluster_id,
-              created_at, updated_at, last_accessed_at, extra_json
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """,
+            _INSERT_MEMORY_SQL,
             (
                 memory_uuid,
                 user_id,
@@ -116,7 +419,7 @@ async def create_memory(
                 tags_text,
                 resolved_importance,
                 conversation_id,
-                cluster_id,
+                resolved_cluster,
                 ts,
                 ts,
                 None,
@@ -124,20 +427,513 @@ async def create_memory(
             ),
         )
         memory_id = cur.lastrowid
-        conn.execute(
-            "INSERT INTO vec_memories(rowid, embedding) VALUES (?, ?)",
-            (memory_id, json.dumps(embedding)),
+        _store_vectors(conn, [_vec_row(memory_id, embedding, resolved_type, ts, user_id, agent_id, resolved_cluster)])
+        clustering.resize(conn, None, resolved_cluster)
+        _set_tags(conn, [memory_id], [tags_text])
+        if duplicate is not None:
+            _link_duplicate(conn, memory_id, duplicate[0], ts)
+        if deferred:
+            enrichment.enqueue(conn, [memory_id], _missing_fields(type_, tags, importance, summary))
+        return conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
+
+    with stage("create_memory.write"):
+        row = await run_write(write)
+
+    memory = _row_to_memory(row) or {}
+    if duplicate is not None:
+        DUPLICATES.inc(policy="link")
+        memory.update(duplicate_of=duplicate[0], dedup="link", distance=duplicate[1])
+    if deferred:
+        enrichment.ensure_workers()
+        enrichment.notify()
+        memory["enrichment"] = "pending"
+    return memory
+
+
+@timed("create_memories_batch")
+async def create_memories_batch(
+    items: Sequence[Union[str, dict]],
+    *,
+    source: str = "import",
+    use_ai: Optional[bool] = None,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """Store many memories with batched embeddings and one transaction per chunk.
+
+    Each item is either a text or a dict with ``text`` and any of ``type``,
+    ``tags``, ``importance``, ``summary``, ``user_id``, ``agent_id``,
+    ``conversation_id``, ``extra_json`` and ``created_at`` (defaults to
+    now). Items that fail are reported in ``failed`` (with their index) and
+    do not abort the rest of the batch.
+    ``progress(done, total)`` is called after every chunk.
+    """
+    ai_enabled = AI_ASSIST_ENABLED if use_ai is None else use_ai
+    deferred = ai_enabled and ENRICHMENT_MODE == "background"
+    total = len(items)
+    created: List[dict] = []
+    failed: List[dict] = []
+    semaphore = asyncio.Semaphore(max(CLASSIFY_CONCURRENCY, 1))
+
+    async def classify(spec: dict) -> dict[str, Any]:
+        if deferred or not _wants_ai(
+            ai_enabled, spec.get("type"), spec.get("tags"), spec.get("importance"), spec.get("summary")
+        ):
+            return {}
+        async with semaphore:
+            try:
+                return await classify_memory(spec["text"])
+            except Exception:
+                # Classification is best-effort; the memory is still stored without it.
+                return {}
+
+    for offset in range(0, total, max(chunk_size, 1)):
+        chunk: List[tuple[int, dict]] = []
+        for index in range(offset, min(offset + chunk_size, total)):
+            spec = items[index]
+            if isinstance(spec, str):
+                spec = {"text": spec}
+            text = spec.get("text") if isinstance(spec, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                failed.append({"index": index, "error": "missing or empty text"})
+                continue
+            chunk.append((index, spec))
+        if not chunk:
+            if progress is not None:
+                progress(min(offset + chunk_size, total), total)
+            continue
+
+        guesses, embeddings = await asyncio.gather(
+            asyncio.gather(*(classify(spec) for _, spec in chunk)),
+            embed_texts([spec["text"] for _, spec in chunk]),
+            return_exceptions=True,
         )
-        row = conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
-        return _row_to_memory(row) or {}
+        if isinstance(embeddings, BaseException):
+            failed.extend({"index": index, "error": f"embedding failed: {embeddings}"} for index, _ in chunk)
+            if progress is not None:
+                progress(min(offset + chunk_size, total), total)
+            continue
+        if isinstance(guesses, BaseException):
+            guesses = [{} for _ in chunk]
+        clusters = await clustering.assign(embeddings)
+
+        ts = now_ts()
+        rows = []
+        for (_, spec), guess, assigned in zip(chunk, guesses, clusters):
+            resolved_type, tags_text, resolved_importance, resolved_summary = _resolve_metadata(
+                guess, spec.get("type"), spec.get("tags"), spec.get("importance"), spec.get("summary")
+            )
+            extra = spec.get("extra_json")
+            rows.append(
+                (
+                    str(uuid4()),
+                    spec.get("user_id"),
+                    spec.get("agent_id"),
+                    source,
+                    resolved_type,
+                    spec["text"],
+                    resolved_summary,
+                    tags_text,
+                    resolved_importance,
+                    spec.get("conversation_id"),
+                    assigned,
+                    spec.get("created_at") or ts,
+                    ts,
+                    None,
+                    json.dumps(extra) if extra else None,
+                )
+            )
+
+        uuids = [row[0] for row in rows]
+
+        def write(conn: sqlite3.Connection) -> Dict[str, int]:
+            live = clustering.existing(conn, clusters)
+            # Clusters dropped by a rebalance since they were picked leave their memories unassigned.
+            checked = [(*row[:10], row[10] if row[10] in live else None, *row[11:]) for row in rows]
+            conn.executemany(_INSERT_MEMORY_SQL, checked)
+            placeholders = ",".join("?" * len(uuids))
+            ids = {
+                r["uuid"]: r["id"]
+                for r in conn.execute(f"SELECT id, uuid FROM memories WHERE uuid IN ({placeholders})", uuids)
+            }
+            _store_vectors(
+                conn,
+                [
+                    _vec_row(ids[row[0]], emb, row[4], row[11], row[1], row[2], row[10])
+                    for row, emb in zip(checked, embeddings)
+                ],
+            )
+            for row in checked:
+                clustering.resize(conn, None, row[10])
+            _set_tags(conn, [ids[row[0]] for row in rows], [row[7] for row in rows])
+            if deferred:
+                for (_, spec), u in zip(chunk, uuids):
+                    enrichment.enqueue(
+                        conn,
+                        [ids[u]],
+                        _missing_fields(spec.get("type"), spec.get("tags"), spec.get("importance"), spec.get("summary")),
+                    )
+            return ids
+
+        try:
+            with stage("create_memories_batch.write"):
+                ids = await run_write(write)
+        except sqlite3.Error as exc:
+            failed.extend({"index": index, "error": f"insert failed: {exc}"} for index, _ in chunk)
+        else:
+            created.extend({"index": index, "id": ids[u], "uuid": u} for (index, _), u in zip(chunk, uuids))
+
+        if progress is not None:
+            progress(min(offset + chunk_size, total), total)
+
+    if deferred and created:
+        enrichment.ensure_workers()
+        enrichment.notify()
+    failed.sort(key=lambda item: item["index"])
+    return {"total": total, "created": created, "failed": failed}
+
+
+def _get_row(conn: sqlite3.Connection, memory_id: int) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
 
 
 async def get_memory(memory_id: int) -> Optional[dict]:
-    with db_conn() as conn:
-        row = conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
-    return _row_to_memory(row)
+    memory = _row_to_memory(await run_read(_get_row, memory_id))
+    if memory is not None:
+        access.record([memory_id])
+    return memory
+
+
+def _rowid_in(ids: Sequence[int]) -> str:
+    """vec0 KNN constraint restricting the scan to ``ids``.
+
+    SQLite rewrites a one-element ``rowid IN (?)`` into ``rowid = ?``, which
+    vec0 does not apply to KNN queries, so a single id is bound twice.
+    """
+    return f"rowid IN ({','.join('?' * max(len(ids), 2))})"
+
+
+def _fetch_candidates(
+    conn: sqlite3.Connection,
+    distances: Dict[int, float],
+    filters: List[str],
+    params: List[Any],
+    columns: str = "m.*",
+) -> List[dict]:
+    """Load candidate rows that pass the `memories` filters, ordered by distance."""
+    if not distances:
+        return []
+    placeholders = ",".join("?" * len(distances))
+    where_clause = " AND ".join([f"m.id IN ({placeholders})", *filters])
+    rows = conn.execute(
+        f"SELECT {columns} FROM memories m WHERE {where_clause}",
+        [*distances, *params],
+    ).fetchall()
+    results = []
+    for row in rows:
+        memory = _row_to_memory(row)
+        memory["distance"] = distances[row["id"]]
+        results.append(memory)
+    results.sort(key=lambda memory: memory["distance"])
+    return results
+
 
+def _vector_matches(
+    conn: sqlite3.Connection,
+    query_embedding: Vector,
+    k: int,
+    vec_filters: List[str],
+    vec_params: List[Any],
+) -> tuple[List[tuple[int, float]], bool]:
+    """Nearest (rowid, L2 distance) pairs and whether fewer than k rows matched the filters."""
+    if quantization.is_ready(conn):
+        coarse_k = min(k * VECTOR_RERANK_FACTOR, SEARCH_MAX_K)
+        return quantization.search(conn, query_embedding, k, coarse_k, vec_filters, vec_params)
+    where_clause = " AND ".join(["embedding MATCH ?", "k = ?", *vec_filters])
+    matches = conn.execute(
+        f"SELECT rowid, distance FROM vec_memories WHERE {where_clause}",
+        [query_embedding, k, *vec_params],
+    ).fetchall()
+    return [(row[0], row[1]) for row in matches], len(matches) < k
 
+
+def _knn_search(
+    conn: sqlite3.Connection,
+    query_embedding: Vector,
+    top_k: int,
+    vec_filters: List[str],
+    vec_params: List[Any],
+    filters: List[str],
+    params: List[Any],
+    *,
+    post_filtered: bool = False,
+    exact: bool = False,
+    cluster_probe: int = 0,
+    columns: str = "m.*",
+    partitioned: bool = False,
+) -> List[dict]:
+    """KNN over vec_memories with metadata pre-filters and adaptive over-fetch.
+
+    ``vec_filters`` are evaluated by vec0 inside the KNN scan; ``filters``
+    run against `memories` afterwards. When some of them could not be
+    pushed into the scan (``post_filtered``) and reject too many
+    candidates, k is widened until enough rows pass, the index is
+    exhausted, or MIND_SEARCH_MAX_K is reached. Unless ``exact`` is set,
+    a ``cluster_probe`` > 0 scans only the members of that many nearest
+    clusters, and otherwise the ANN index answers instead of vec0 when
+    one is available. A ``partitioned`` (tenant-scoped) query never uses
+    the ANN index: it would post-filter across every tenant, while vec0
+    only reads the tenant's partitions.
+    """
+    routed = bool(cluster_probe) and not exact
+    index = None if exact or routed or partitioned or SEARCH_EXACT else ann.get_index(conn)
+    if index is not None:
+        # The ANN index carries no metadata, so vec0-side filters become post-filters.
+        post_filtered = post_filtered or bool(vec_filters)
+    k = min(top_k * SEARCH_OVERFETCH if post_filtered else top_k, SEARCH_MAX_K)
+    while True:
+        with stage("search.knn", f"k={k} ann={index is not None} filters={' AND '.join(vec_filters)}"):
+            found = clustering.search(conn, query_embedding, k, cluster_probe, vec_filters, vec_params) if routed else None
+            if found is not None:
+                matches, exhausted = found
+            elif index is not None:
+                matches, exhausted = index.search(query_embedding, k)
+            else:
+                matches, exhausted = _vector_matches(conn, query_embedding, k, vec_filters, vec_params)
+        with stage("search.fetch", " AND ".join(filters)):
+            results = _fetch_candidates(conn, dict(matches), filters, params, columns)
+        if len(results) >= top_k or exhausted or k >= SEARCH_MAX_K:
+            return results[:top_k]
+        k = min(k * SEARCH_OVERFETCH, SEARCH_MAX_K)
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: any term matches, the exact phrase ranks higher."""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in dict.fromkeys(terms)]
+    if len(terms) > 1:
+        quoted.insert(0, '"' + " ".join(terms) + '"')
+    return " OR ".join(quoted)
+
+
+def _lexical_search(
+    conn: sqlite3.Connection,
+    query: str,
+    limit: int,
+    filters: List[str],
+    params: List[Any],
+    columns: str = "m.*",
+) -> List[dict]:
+    """BM25-ranked keyword search over text, summary and tags (no network)."""
+    match = _fts_query(query)
+    if match is None:
+        return []
+    where_clause = " AND ".join(["memories_fts MATCH ?", *filters])
+    # CROSS JOIN keeps the FTS match as the outer loop; otherwise the planner may walk
+    # idx_memories_deleted_at and run the MATCH once per live memory.
+    sql = f"""
+        SELECT {columns}, bm25(memories_fts, 1.0, 0.5, 0.5) AS bm25
+        FROM memories_fts
+        CROSS JOIN memories m ON m.id = memories_fts.rowid
+        WHERE {where_clause}
+        ORDER BY bm25
+        LIMIT ?
+    """
+    with stage("search.lexical", sql):
+        rows = conn.execute(sql, [match, *params, limit]).fetchall()
+    return [_row_to_memory(row) for row in rows]
+
+
+def _fuse_rankings(rankings: List[List[dict]], top_k: int) -> List[dict]:
+    """Reciprocal rank fusion: each list contributes 1 / (MIND_HYBRID_RRF_K + rank)."""
+    scores: Dict[int, float] = {}
+    merged: Dict[int, dict] = {}
+    for ranking in rankings:
+        for rank, memory in enumerate(ranking, start=1):
+            scores[memory["id"]] = scores.get(memory["id"], 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+            merged.setdefault(memory["id"], {}).update(memory)
+    ordered = sorted(merged.values(), key=lambda memory: scores[memory["id"]], reverse=True)[:top_k]
+    for memory in ordered:
+        memory["score"] = scores[memory["id"]]
+    return ordered
+
+
+def _blend(conn: sqlite3.Connection, hits: List[dict], mode: str, top_k: int, archived: bool) -> List[dict]:
+    """Re-rank candidates by relevance, importance and recency; keeps the best ``top_k``.
+
+    Relevance is the mode's own score min-max scaled to 0-1 over the
+    candidates; creation and access recency decay as 1 / (1 + age / half-life),
+    so an unimportant, never-read memory still ranks on relevance alone.
+    Adds ``rank_score``.
+    """
+    if not hits:
+        return hits
+    if mode == "hybrid":
+        raw = [memory["score"] for memory in hits]
+    else:
+        key = "distance" if mode == "vector" else "bm25"
+        raw = [-memory[key] for memory in hits]
+    values = ",".join(["(?, ?, ?)"] * len(hits))
+    params: List[Any] = []
+    for memory, score in zip(hits, raw):
+        params.extend((memory["id"], score, 1 if memory.get("archived") else 0))
+    select = "SELECT n.*, m.importance, m.created_at, m.last_accessed_at FROM n"
+    sources = f"{select} JOIN memories m ON m.id = n.id AND NOT n.archived"
+    if archived:
+        sources += f" UNION ALL {select} JOIN archive.memories m ON m.id = n.id AND n.archived"
+    now = now_ts()
+    params.extend(
+        (
+            RANK_RELEVANCE_WEIGHT,
+            RANK_IMPORTANCE_WEIGHT,
+            RANK_RECENCY_WEIGHT,
+            now,
+            RANK_RECENCY_HALF_LIFE_DAYS * 86400.0,
+            RANK_ACCESS_WEIGHT,
+            now,
+            RANK_ACCESS_HALF_LIFE_DAYS * 86400.0,
+            top_k,
+        )
+    )
+    with stage("search.blend"):
+        rows = conn.execute(
+            f"""
+            WITH c(id, raw, archived) AS (VALUES {values}),
+            n AS (
+              SELECT id, archived,
+                     COALESCE((raw - MIN(raw) OVER ()) / NULLIF(MAX(raw) OVER () - MIN(raw) OVER (), 0), 1.0)
+                       AS relevance
+              FROM c
+            ),
+            f AS ({sources})
+            SELECT id, archived,
+                   ? * relevance
+                   + ? * COALESCE(importance, 0.5)
+                   + ? / (1.0 + MAX(? - created_at, 0) / ?)
+                   + COALESCE(? / (1.0 + MAX(? - last_accessed_at, 0) / ?), 0) AS rank_score
+            FROM f
+            ORDER BY rank_score DESC
+            LIMIT ?
+            """,
+            params,
+        ).fetchall()
+    by_key = {(memory["id"], bool(memory.get("archived"))): memory for memory in hits}
+    ranked = []
+    for row in rows:
+        memory = by_key[(row["id"], bool(row["archived"]))]
+        memory["rank_score"] = row["rank_score"]
+        ranked.append(memory)
+    return ranked
+
+
+def _archive_search(
+    conn: sqlite3.Connection,
+    query: str,
+    query_embedding: Optional[Vector],
+    mode: str,
+    limit: int,
+    filters: List[str],
+    params: List[Any],
+    columns: str,
+) -> List[dict]:
+    """Exact search over the attached archive, ranked the way ``mode`` ranks live memories."""
+    where_clause = " AND ".join(filters)
+    rankings: List[List[dict]] = []
+    if query_embedding is not None:
+        sql = f"""
+            SELECT {columns}, vec_distance_l2(v.embedding, ?) AS distance
+            FROM archive.memories m
+            JOIN archive.memory_vectors v ON v.memory_id = m.id
+            WHERE {where_clause}
+            ORDER BY distance
+            LIMIT ?
+        """
+        with stage("search.archive", sql):
+            rows = conn.execute(sql, [query_embedding, *params, limit]).fetchall()
+        rankings.append([_row_to_memory(row) for row in rows])
+    match = _fts_query(query) if mode != "vector" else None
+    if match:
+        sql = f"""
+            SELECT {columns}, bm25(memories_fts, 1.0, 0.5, 0.5) AS bm25
+            FROM archive.memories_fts
+            CROSS JOIN archive.memories m ON m.id = memories_fts.rowid
+            WHERE memories_fts MATCH ? AND {where_clause}
+            ORDER BY bm25
+            LIMIT ?
+        """
+        with stage("search.archive", sql):
+            rows = conn.execute(sql, [match, *params, limit]).fetchall()
+        rankings.append([_row_to_memory(row) for row in rows])
+    hits = _fuse_rankings(rankings, limit) if mode == "hybrid" else (rankings[0] if rankings else [])
+    for memory in hits:
+        memory["archived"] = True
+    return hits
+
+
+def _expand_graph(
+    conn: sqlite3.Connection,
+    hits: List[dict],
+    hops: int,
+    limit: int,
+    filters: List[str],
+    params: List[Any],
+    columns: str,
+) -> List[dict]:
+    """Neighbours up to ``hops`` relation hops from the top hits, in one recursive query.
+
+    The top MIND_GRAPH_SEEDS hits start with score 1/rank and every hop
+    multiplies by the weight of the edge's kind, in either direction; a
+    neighbour keeps its best path. Neighbours pass the same filters as
+    direct hits and carry ``graph_score``, ``hops`` and ``via`` (the hit
+    they were reached from).
+    """
+    seeds = [memory["id"] for memory in hits[: max(GRAPH_SEEDS, 0)] if not memory.get("archived")]
+    if not seeds or hops <= 0 or limit <= 0:
+        return []
+    weights = list(RELATION_WEIGHTS.items()) or [("", RELATION_DEFAULT_WEIGHT)]
+    seen = [memory["id"] for memory in hits]
+    sql = f"""
+        WITH RECURSIVE
+          seeds(id, score) AS (VALUES {",".join(["(?, ?)"] * len(seeds))}),
+          weights(kind, weight) AS (VALUES {",".join(["(?, ?)"] * len(weights))}),
+          walk(id, depth, score, via) AS (
+            SELECT id, 0, score, id FROM seeds
+            UNION ALL
+            SELECT CASE WHEN r.from_id = w.id THEN r.to_id ELSE r.from_id END, w.depth + 1,
+                   w.score * COALESCE((SELECT weight FROM weights k WHERE k.kind = r.kind), ?), w.via
+            FROM walk w
+            JOIN memory_relations r ON r.from_id = w.id OR r.to_id = w.id
+            WHERE w.depth < ?
+              AND NOT EXISTS (SELECT 1 FROM memories d WHERE d.id = w.id AND d.deleted_at IS NOT NULL)
+            LIMIT {_GRAPH_MAX_VISITS}
+          ),
+          best AS (
+            -- SQLite takes the bare depth/via columns from the row holding MAX(score).
+            SELECT id, MAX(score) AS graph_score, depth AS hops, via FROM walk WHERE depth > 0 GROUP BY id
+          )
+        SELECT {columns}, best.graph_score, best.hops, best.via
+        FROM best JOIN memories m ON m.id = best.id
+        WHERE m.id NOT IN ({",".join("?" * len(seen))}) AND {" AND ".join(filters)}
+        ORDER BY best.graph_score DESC
+        LIMIT ?
+    """
+    args = [
+        *(value for rank, memory_id in enumerate(seeds, start=1) for value in (memory_id, 1.0 / rank)),
+        *(value for pair in weights for value in pair),
+        RELATION_DEFAULT_WEIGHT,
+        hops,
+        *seen,
+        *params,
+        limit,
+    ]
+    with stage("search.graph", sql):
+        rows = conn.execute(sql, args).fetchall()
+    return [_row_to_memory(row) for row in rows]
+
+
+@timed("search_memories")
 async def search_memories(
     query: str,
     *,
@@ -146,53 +942,262 @@ async def search_memories(
     tags: Optional[List[str]] = None,
     since: Optional[int] = None,
     until: Optional[int] = None,
+    tags_mode: str = "all",
+    mode: Optional[str] = None,
+    cluster_probe: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+    include_archive: bool = False,
+    graph_hops: Optional[int] = None,
+    ranking: Optional[str] = None,
+    user_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
 ) -> List[dict]:
-    query_embedding = (await embed_texts([query]))[0]
-    embedding_json = json.dumps(query_embedding)
+    """Search memories.
 
-    filters = ["m.deleted_at IS NULL"]
-    params: list[Any] = [embedding_json, top_k]
+    ``mode`` is "vector" (semantic, results carry ``distance``), "lexical"
+    (FTS5/BM25 only, no OpenRouter call, results carry ``bm25``) or "hybrid"
+    (both rankings fused, results carry ``score``). ``tags`` match exactly
+    (case-insensitive); ``tags_mode`` is "all" or "any". ``cluster_probe``
+    routes the vector side through the nearest clusters (default
+    MIND_CLUSTER_NPROBE when MIND_CLUSTER_ROUTING is on; 0 disables it).
+    ``fields`` limits the columns read and returned (see MEMORY_FIELDS).
+    ``include_archive`` also scans memories tiered off to the archive
+    database (see mind/maintenance.py); those hits carry ``archived``.
+    ``graph_hops`` (default MIND_GRAPH_HOPS) appends up to
+    MIND_GRAPH_NEIGHBOURS memories related to the top hits, see
+    ``_expand_graph``. ``ranking`` (default MIND_RANKING) "blend" re-ranks
+    an over-fetched candidate set by relevance, importance and recency, see
+    ``_blend``. ``user_id`` / ``agent_id`` scope the search to one tenant;
+    the KNN then reads only that tenant's vec0 partitions. Returned
+    memories are recorded as accessed.
+    """
+    tags = _filter_tags(tags)
+    mode = mode or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}; expected one of {', '.join(SEARCH_MODES)}")
+    ranking = ranking or RANKING
+    if ranking not in RANKINGS:
+        raise ValueError(f"Unknown ranking {ranking!r}; expected one of {', '.join(RANKINGS)}")
+    # Candidates gathered before the final cut to top_k.
+    fetch_k = min(top_k * RANK_OVERFETCH, SEARCH_MAX_K) if ranking == "blend" else top_k
+    columns = _columns(fields)
+    if graph_hops is None:
+        graph_hops = GRAPH_HOPS
+
+    query_embedding = (await embed_texts([query]))[0] if mode != "lexical" else None
+    if cluster_probe is None:
+        cluster_probe = CLUSTER_NPROBE if CLUSTER_ROUTING else 0
 
+    # Filters on `memories`, applied to every candidate whatever produced it.
+    filters = ["m.deleted_at IS NULL"]
+    params: List[Any] = []
+    # The subset vec0 can evaluate during the KNN scan.
+    vec_filters: List[str] = []
+    vec_params: List[Any] = []
     if type_filter:
         filters.append("m.type = ?")
         params.append(type_filter)
+        vec_filters.append("type = ?")
+        vec_params.append(type_filter)
+    for column, value in (("user_id", user_id), ("agent_id", agent_id)):
+        if value:
+            filters.append(f"m.{column} = ?")
+            params.append(value)
+            vec_filters.append(f"{column} = ?")
+            vec_params.append(value)
+    if since is not None:
+        filters.append("m.created_at >= ?")
+        params.append(since)
+        vec_filters.append("created_at >= ?")
+        vec_params.append(since)
+    if until is not None:
+        filters.append("m.created_at <= ?")
+        params.append(until)
+        vec_filters.append("created_at <= ?")
+        vec_params.append(until)
 
+    # Same filters against the archive; its tags live in its own memory_tags table.
+    archive_filters = list(filters)
+    archive_params = list(params)
     if tags:
-        for tag in tags:
-            filters.append("m.tags LIKE ?")
-            params.append(f"%{tag}%")
+        tag_sql, tag_params = _tag_filter(tags, tags_mode, schema="archive")
+        archive_filters.append(f"m.id IN ({tag_sql})")
+        archive_params.extend(tag_params)
+
+    def run(conn: sqlite3.Connection) -> List[dict]:
+        # ATTACH is not allowed once a query has started.
+        archived = include_archive and attach_archive(conn)
+        results = search(conn)
+        if archived:
+            depth = fetch_k if mode == "vector" else min(fetch_k * SEARCH_OVERFETCH, SEARCH_MAX_K)
+            results += _archive_search(
+                conn, query, query_embedding, mode, depth, archive_filters, archive_params, columns
+            )
+            if mode == "hybrid":
+                results.sort(key=lambda memory: memory["score"], reverse=True)
+            else:
+                results.sort(key=lambda memory: memory["distance" if mode == "vector" else "bm25"])
+            results = results[:fetch_k]
+        if ranking == "blend":
+            results = _blend(conn, results, mode, top_k, archived)
+        if graph_hops:
+            results += _expand_graph(conn, results, graph_hops, GRAPH_NEIGHBOURS, filters, params, columns)
+        return results
+
+    def search(conn: sqlite3.Connection) -> List[dict]:
+        post_filtered = False
+        rowid_filtered = False
+        if tags:
+            tag_sql, tag_params = _tag_filter(tags, tags_mode)
+            filters.append(f"m.id IN ({tag_sql})")
+            params.extend(tag_params)
+            if query_embedding is not None:
+                tagged = [row[0] for row in conn.execute(tag_sql, tag_params)]
+                if not tagged:
+                    return []
+                if len(tagged) <= SEARCH_MAX_K:
+                    # Few enough to restrict the KNN scan itself to the tagged rows.
+                    vec_filters.append(_rowid_in(tagged))
+                    vec_params.extend(tagged if len(tagged) > 1 else tagged * 2)
+                    rowid_filtered = True
+                else:
+                    post_filtered = True
+
+        if mode == "lexical":
+            return _lexical_search(conn, query, fetch_k, filters, params, columns)
+
+        depth = fetch_k if mode == "vector" else min(fetch_k * SEARCH_OVERFETCH, SEARCH_MAX_K)
+        vector_hits = _knn_search(
+            conn,
+            query_embedding,
+            depth,
+            vec_filters,
+            vec_params,
+            filters,
+            params,
+            post_filtered=post_filtered,
+            # An exact scan over a few tagged rows beats probing the ANN index.
+            exact=rowid_filtered,
+            cluster_probe=cluster_probe,
+            columns=columns,
+            partitioned=TENANT_PARTITIONS and bool(user_id or agent_id),
+        )
+        if mode == "vector":
+            return vector_hits
+        lexical_hits = _lexical_search(conn, query, depth, filters, params, columns)
+        return _fuse_rankings([vector_hits, lexical_hits], fetch_k)
+
+    results = await run_read(run)
+    access.record(memory["id"] for memory in results if not memory.get("archived"))
+    return results
+
+
+def _encode_cursor(created_at: int, memory_id: int) -> str:
+    return f"{created_at}:{memory_id}"
 
+
+def _decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        created_at, memory_id = cursor.split(":")
+        return int(created_at), int(memory_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}") from None
+
+
+@timed("list_memories")
+async def list_memories(
+    *,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    order: str = "desc",
+    type_filter: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    tags_mode: str = "all",
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    user_id: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    conversation_id: Optional[str] = None,
+    cluster_id: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> dict:
+    """One page of live memories, newest first (``order="asc"`` for oldest first).
+
+    Returns ``{"items", "next_cursor"}``; pass ``next_cursor`` back as
+    ``cursor`` for the following page (None after the last one). Pages are
+    keyed on (created_at, id), so writes in between never shift or repeat
+    rows. ``fields`` limits the columns read and returned.
+    """
+    tags = _filter_tags(tags)
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unknown order {order!r}; expected 'asc' or 'desc'")
+    columns = _columns(fields)
+    # Unary + keeps the planner off idx_memories_deleted_at, so it walks idx_memories_created_at
+    # in order and stops after one page instead of sorting every live memory.
+    filters = ["+m.deleted_at IS NULL"]
+    params: List[Any] = []
+    for column, value in (
+        ("type", type_filter),
+        ("user_id", user_id),
+        ("agent_id", agent_id),
+        ("conversation_id", conversation_id),
+        ("cluster_id", cluster_id),
+    ):
+        if value is not None:
+            filters.append(f"m.{column} = ?")
+            params.append(value)
     if since is not None:
         filters.append("m.created_at >= ?")
         params.append(since)
     if until is not None:
         filters.append("m.created_at <= ?")
         params.append(until)
+    if tags:
+        tag_sql, tag_params = _tag_filter(tags, tags_mode)
+        filters.append(f"m.id IN ({tag_sql})")
+        params.extend(tag_params)
+    if cursor:
+        filters.append(f"(m.created_at, m.id) {'>' if order == 'asc' else '<'} (?, ?)")
+        params.extend(_decode_cursor(cursor))
+    limit = max(int(limit), 1)
 
-    where_clause = " AND ".join(filters)
-
-    with db_conn() as conn:
+    def run(conn: sqlite3.Connection) -> dict:
         rows = conn.execute(
             f"""
-            WITH matches AS (
-              SELECT rowid, distance
-              FROM vec_memories
-              WHERE embedding MATCH ?
-              ORDER BY distance
-              LIMIT ?
-            )
-            SELECT m.*, matches.distance
-            FROM matches
-            JOIN memories m ON m.id = matches.rowid
-            WHERE {where_clause}
-            ORDER BY matches.distance
+            SELECT {columns}, m.created_at AS cursor_created_at FROM memories m
+            WHERE {" AND ".join(filters)}
+            ORDER BY m.created_at {order}, m.id {order}
+            LIMIT ?
             """,
-            params,
+            [*params, limit + 1],
         ).fetchall()
+        items = []
+        for row in rows[:limit]:
+            memory = _row_to_memory(row)
+            del memory["cursor_created_at"]
+            items.append(memory)
+        last = rows[limit - 1] if len(rows) > limit else None
+        return {
+            "items": items,
+            "next_cursor": _encode_cursor(last["cursor_created_at"], last["id"]) if last is not None else None,
+        }
+
+    return await run_read(run)
+
 
-    return [_row_to_memory(r) for r in rows if r]
+async def iter_memories(*, page_size: int = 500, **filters: Any) -> AsyncIterator[dict]:
+    """Every memory ``list_memories(**filters)`` matches, read one page at a time (for exports and tables)."""
+    cursor = None
+    while True:
+        page = await list_memories(limit=page_size, cursor=cursor, **filters)
+        for memory in page["items"]:
+            yield memory
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
 
 
+@timed("update_memory")
 async def update_memory(
     memory_id: int,
     *,
@@ -202,13 +1207,30 @@ async def update_memory(
     importance: Optional[float] = None,
     summary: Optional[str] = None,
     cluster_id: Optional[int] = None,
+    expected_version: Optional[int] = None,
 ) -> Optional[dict]:
-    with db_conn() as conn:
+    """Patch the given fields; returns None if the memory does not exist (or was deleted).
+
+    Every update bumps ``version``. Pass the ``version`` you read as
+    ``expected_version`` to raise ConflictError, instead of overwriting,
+    when someone else updated the memory in between.
+    """
+    # Embed first: the queued write runs on the writer thread and cannot await, so the
+    # transaction never spans a network call and text and vector change together.
+    embedding = (await embed_texts([text]))[0] if text is not None else None
+    # New text may belong to another cluster, unless the caller picks one.
+    assigned_cluster = (await clustering.assign([embedding]))[0] if embedding is not None and cluster_id is None else None
+
+    def write(conn: sqlite3.Connection) -> Optional[dict]:
         existing = conn.execute(
             "SELECT * FROM memories WHERE id = ? AND deleted_at IS NULL", (memory_id,)
         ).fetchone()
         if existing is None:
             return None
+        if expected_version is not None and existing["version"] != expected_version:
+            raise ConflictError(
+                f"Memory {memory_id} is at version {existing['version']}, expected {expected_version}"
+            )
 
         new_text = text if text is not None else existing["text"]
         new_type = type_ if type_ is not None else existing["type"]
@@ -216,29 +1238,188 @@ async def update_memory(
         new_importance = importance if importance is not None else existing["importance"]
         new_summary = summary if summary is not None else existing["summary"]
         new_cluster = cluster_id if cluster_id is not None else existing["cluster_id"]
+        if assigned_cluster is not None and assigned_cluster in clustering.existing(conn, [assigned_cluster]):
+            new_cluster = assigned_cluster
 
         conn.execute(
             """
             UPDATE memories
-            SET text = ?, type = ?, tags = ?, importance = ?, summary = ?, cluster_id = ?, updated_at = ?
+            SET text = ?, type = ?, tags = ?, importance = ?, summary = ?, cluster_id = ?, updated_at = ?,
+                version = version + 1
             WHERE id = ?
             """,
             (new_text, new_type, new_tags_text, new_importance, new_summary, new_cluster, now_ts(), memory_id),
         )
+        if tags is not None:
+            _set_tags(conn, [memory_id], [new_tags_text])
 
-        if text is not None:
-            embedding = (await embed_texts([new_text]))[0]
-            conn.execute(
-                "INSERT OR REPLACE INTO vec_memories(rowid, embedding) VALUES (?, ?)",
-                (memory_id, json.dumps(embedding)),
+        if embedding is not None:
+            # vec0 rejects INSERT OR REPLACE on an existing rowid, so replace explicitly.
+            _drop_vectors(conn, [memory_id])
+            _store_vectors(
+                conn,
+                [
+                    _vec_row(
+                        memory_id, embedding, new_type, existing["created_at"],
+                        existing["user_id"], existing["agent_id"], new_cluster,
+                    )
+                ],
             )
+        else:
+            if new_cluster != existing["cluster_id"]:
+                clustering.relocate(conn, memory_id, new_cluster)
+            if new_type != existing["type"]:
+                _retype_vector(conn, memory_id, new_type)
+        clustering.resize(conn, existing["cluster_id"], new_cluster)
 
         row = conn.execute("SELECT * FROM memories WHERE id = ?", (memory_id,)).fetchone()
         return _row_to_memory(row)
 
+    with stage("update_memory.write"):
+        return await run_write(write)
 
-def delete_memory(memory_id: int) -> None:
-    ts = now_ts()
-    with db_conn() as conn:
-        conn.execute("UPDATE memories SET deleted_at = ? WHERE id = ?", (ts, memory_id))
-        conn.execute("DELETE FROM vec_memories WHERE rowid = ?", (memory_id,))
+
+def _soft_delete(conn: sqlite3.Connection, memory_id: int, ts: int) -> None:
+    row = conn.execute("SELECT cluster_id FROM memories WHERE id = ? AND deleted_at IS NULL", (memory_id,)).fetchone()
+    if row is not None:
+        clustering.resize(conn, row[0], None)
+    conn.execute("UPDATE memories SET deleted_at = ?, version = version + 1 WHERE id = ?", (ts, memory_id))
+    _drop_vectors(conn, [memory_id])
+    conn.execute("DELETE FROM memory_tags WHERE memory_id = ?", (memory_id,))
+
+
+@timed("delete_memory")
+async def delete_memory(memory_id: int) -> None:
+    await run_write(_soft_delete, memory_id, now_ts())
+
+
+@timed("create_relation")
+async def create_relation(from_id: int, to_id: int, kind: str = "related") -> Optional[dict]:
+    """Link two live memories with a directed ``kind`` edge; returns None if either does not exist.
+
+    Linking the same pair with the same kind again returns the existing edge.
+    """
+    kind = (kind or "").strip().lower()
+    if not kind:
+        raise ValueError("Relation kind must not be empty")
+    if from_id == to_id:
+        raise ValueError("A memory cannot be related to itself")
+
+    def write(conn: sqlite3.Connection) -> Optional[dict]:
+        live = conn.execute(
+            "SELECT COUNT(*) FROM memories WHERE id IN (?, ?) AND deleted_at IS NULL", (from_id, to_id)
+        ).fetchone()[0]
+        if live < 2:
+            return None
+        conn.execute(
+            "INSERT OR IGNORE INTO memory_relations(from_id, to_id, kind, created_at) VALUES (?, ?, ?, ?)",
+            (from_id, to_id, kind, now_ts()),
+        )
+        row = conn.execute(
+            "SELECT id, from_id, to_id, kind, created_at FROM memory_relations WHERE from_id = ? AND kind = ? AND to_id = ?",
+            (from_id, kind, to_id),
+        ).fetchone()
+        return dict(row)
+
+    return await run_write(write)
+
+
+@timed("delete_relation")
+async def delete_relation(from_id: int, to_id: int, kind: Optional[str] = None) -> int:
+    """Remove the edges from ``from_id`` to ``to_id`` (only ``kind`` when given); returns how many."""
+    sql = "DELETE FROM memory_relations WHERE from_id = ? AND to_id = ?"
+    args: List[Any] = [from_id, to_id]
+    if kind:
+        sql += " AND kind = ?"
+        args.append(kind.strip().lower())
+
+    def write(conn: sqlite3.Connection) -> int:
+        return conn.execute(sql, args).rowcount
+
+    return await run_write(write)
+
+
+@timed("list_relations")
+async def list_relations(
+    memory_id: int,
+    *,
+    direction: str = "both",
+    kind: Optional[str] = None,
+    limit: int = 100,
+) -> List[dict]:
+    """Edges of a memory, newest first, each with the live memory at the other end.
+
+    ``direction`` is "out" (edges from it), "in" (edges to it) or "both".
+    """
+    if direction not in RELATION_DIRECTIONS:
+        raise ValueError(f"Unknown direction {direction!r}; expected one of {', '.join(RELATION_DIRECTIONS)}")
+    parts = []
+    args: List[Any] = []
+    for side, own, other in (("out", "from_id", "to_id"), ("in", "to_id", "from_id")):
+        if direction not in (side, "both"):
+            continue
+        kind_filter = " AND r.kind = ?" if kind else ""
+        parts.append(
+            f"""
+            SELECT r.id AS id, r.from_id, r.to_id, r.kind, r.created_at AS created_at, '{side}' AS direction,
+                   m.id AS memory_id, m.type, m.text, m.summary
+            FROM memory_relations r JOIN memories m ON m.id = r.{other}
+            WHERE r.{own} = ?{kind_filter} AND m.deleted_at IS NULL
+            """
+        )
+        args.extend([memory_id, kind.strip().lower()] if kind else [memory_id])
+    sql = " UNION ALL ".join(parts) + " ORDER BY created_at DESC, id DESC LIMIT ?"
+
+    def run(conn: sqlite3.Connection) -> List[dict]:
+        return [
+            {
+                "id": row["id"],
+                "from_id": row["from_id"],
+                "to_id": row["to_id"],
+                "kind": row["kind"],
+                "created_at": row["created_at"],
+                "direction": row["direction"],
+                "memory": {"id": row["memory_id"], "type": row["type"], "text": row["text"], "summary": row["summary"]},
+            }
+            for row in conn.execute(sql, [*args, limit])
+        ]
+
+    return await run_read(run)
+
+
+@timed("list_tags")
+async def list_tags(
+    *,
+    prefix: Optional[str] = None,
+    with_tags: Optional[List[str]] = None,
+    limit: int = 100,
+) -> List[dict]:
+    """Tag facets with live-memory counts, served from the `memory_tags` index.
+
+    ``prefix`` narrows to tags starting with it; ``with_tags`` restricts the
+    counts to memories that carry all of those tags (drill-down faceting).
+    """
+    with_tags = _filter_tags(with_tags)
+    filters: List[str] = []
+    params: List[Any] = []
+    if prefix:
+        # Range scan on the NOCASE index instead of LIKE.
+        filters.append("t.tag >= ? AND t.tag < ?")
+        params.extend([prefix, prefix + "\uffff"])
+    if with_tags:
+        tag_sql, tag_params = _tag_filter(with_tags, "all")
+        filters.append(f"t.memory_id IN ({tag_sql})")
+        params.extend(tag_params)
+        filters.append(f"t.tag NOT IN ({','.join('?' * len(tag_params))})")
+        params.extend(tag_params)
+    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
+    sql = f"""
+        SELECT t.tag AS tag, COUNT(*) AS count
+        FROM memory_tags t
+        {where_clause}
+        GROUP BY t.tag
+        ORDER BY count DESC, t.tag
+        LIMIT ?
+    """
+    rows = await run_read(lambda conn: conn.execute(sql, [*params, limit]).fetchall())
+    return [{"tag": row["tag"], "count": row["count"]} for row in rows]
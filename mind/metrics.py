@@ -0,0 +1,302 @@
+"""In-process metrics: counters, gauges and latency histograms.
+
+Stdlib only. Hot paths record into the module-level instruments below;
+``render()`` produces the Prometheus text format served by
+``start_http_server()`` (``MIND_METRICS_PORT``, next to the Gradio app) and
+``snapshot()`` backs the ``mind_stats`` tool.
+
+``stage(name)`` times a block into ``mind_stage_seconds{stage=name}``. Blocks
+slower than ``MIND_SLOW_QUERY_MS`` are also reported on the ``mind.slow``
+logger (and to ``MIND_SLOW_QUERY_LOG`` when set).
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .config import SLOW_QUERY_LOG, SLOW_QUERY_MS
+
+_DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], None]] = []
+
+slow_log = logging.getLogger("mind.slow")
+if SLOW_QUERY_LOG:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_log.addHandler(_handler)
+    slow_log.setLevel(logging.INFO)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _lines(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._lines()]
+
+    def values(self) -> Dict[str, Any]:
+        """Current values keyed by comma-joined label values ("" without labels)."""
+        with self._lock:
+            return {",".join(key): value for key, value in self._values.items()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels_text(self.labelnames, key)} {value:g}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    _lines = Counter._lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = _DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, the last one for +Inf; then sum and count.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _labels_text(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total:g}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        """Bucket upper bound at quantile q (the largest finite bound for the +Inf bucket)."""
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        out = {}
+        for key, counts, total, count in items:
+            out[",".join(key)] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                "p50_ms": self._quantile(counts, count, 0.50) * 1000,
+                "p95_ms": self._quantile(counts, count, 0.95) * 1000,
+                "p99_ms": self._quantile(counts, count, 0.99) * 1000,
+            }
+        return out
+
+
+STAGE_SECONDS = Histogram("mind_stage_seconds", "Time spent per operation and stage.", ("stage",))
+SLOW_OPERATIONS = Counter(
+    "mind_slow_operations_total", "Stages slower than MIND_SLOW_QUERY_MS.", ("stage",)
+)
+UPSTREAM_REQUESTS = Counter(
+    "mind_upstream_requests_total", "OpenRouter HTTP attempts by response status.", ("endpoint", "status")
+)
+UPSTREAM_RETRIES = Counter("mind_upstream_retries_total", "OpenRouter retries by reason.", ("endpoint", "reason"))
+UPSTREAM_ERRORS = Counter(
+    "mind_upstream_errors_total", "OpenRouter calls that failed after retries.", ("endpoint", "error")
+)
+UPSTREAM_BYTES = Counter(
+    "mind_upstream_bytes_total", "Bytes sent to and received from OpenRouter.", ("endpoint", "direction")
+)
+TOKENS = Counter("mind_tokens_total", "Tokens reported by OpenRouter usage.", ("endpoint", "kind"))
+EMBEDDING_INPUTS = Counter(
+    "mind_embedding_inputs_total", "Texts embedded, by where the vector came from.", ("source",)
+)
+COALESCED = Counter(
+    "mind_coalesced_total", "Embeddings and classifications shared with an identical in-flight request.", ("endpoint",)
+)
+DUPLICATES = Counter("mind_duplicates_total", "Near-duplicate memories found, by policy applied.", ("policy",))
+ACCESS_EVENTS = Counter(
+    "mind_access_events_total", "Memory reads buffered for last_accessed_at, and rows written.", ("kind",)
+)
+DB_CONNECTIONS = Counter("mind_db_connections_opened_total", "SQLite connections opened.")
+DB_WRITE_BATCH_SIZE = Histogram(
+    "mind_db_write_batch_size", "Writes committed per group commit.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+DB_ROWS = Gauge("mind_db_rows", "Rows per table (memories split into live and deleted).", ("table",))
+DB_BYTES = Gauge("mind_db_bytes", "Size of the database files.", ("file",))
+ENRICHMENT_JOBS = Gauge("mind_enrichment_jobs", "Enrichment jobs by status.", ("status",))
+
+
+@contextmanager
+def stage(name: str, detail: Optional[str] = None) -> Iterator[None]:
+    """Time a block into mind_stage_seconds and the slow-query log."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        if SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS:
+            SLOW_OPERATIONS.inc(stage=name)
+            context = " | " + " ".join(detail.split())[:500] if detail else ""
+            slow_log.warning("slow %s: %.1f ms%s", name, elapsed * 1000, context)
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of ``stage`` for plain and async functions."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with stage(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    """Run ``collector`` (which sets gauges) before every render/snapshot."""
+    _collectors.append(collector)
+
+
+def _collect() -> None:
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception:
+            pass  # A failing collector must not break the endpoint.
+
+
+def render() -> str:
+    _collect()
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    """JSON-friendly view: stage latency summaries plus every counter and gauge."""
+    _collect()
+    return {
+        "stages": STAGE_SECONDS.summary(),
+        **{metric.name: metric.values() for metric in _metrics if not isinstance(metric, Histogram)},
+    }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_http_server(host: str, port: int) -> None:
+    """Serve /metrics from a daemon thread (idempotent)."""
+    global _server
+    if _server is not None:
+        return
+    _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="mind-metrics", daemon=True).start()
+
+
+def stop_http_server() -> None:
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -0,0 +1,146 @@
+"""Shared keep-alive HTTP client for OpenRouter with bounded concurrency and retries."""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+import httpx
+
+from .config import (
+    HTTP2_ENABLED,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_IN_FLIGHT,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_MAX_RETRIES,
+    OPENROUTER_API_KEY,
+    OPENROUTER_BASE,
+)
+from .metrics import UPSTREAM_BYTES, UPSTREAM_ERRORS, UPSTREAM_REQUESTS, UPSTREAM_RETRIES, stage
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional `h2` package is installed.
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide client, creating it lazily for the running loop."""
+    global _client, _semaphore, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=OPENROUTER_BASE,
+            headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
+            http2=HTTP2_ENABLED and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=30,
+        )
+        _semaphore = asyncio.Semaphore(max(HTTP_MAX_IN_FLIGHT, 1))
+        _loop = loop
+    return _client
+
+
+async def aclose_client() -> None:
+    """Close the shared client (call from the loop that owns it)."""
+    global _client, _semaphore, _loop
+    client = _client
+    _client = _semaphore = _loop = None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def close_client() -> None:
+    """Synchronous shutdown hook for code running outside the client's loop."""
+    global _client, _semaphore, _loop
+    client, loop = _client, _loop
+    _client = _semaphore = _loop = None
+    if client is None or client.is_closed or loop is None or loop.is_closed():
+        return
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+    else:
+        loop.run_until_complete(client.aclose())
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    """Parse Retry-After as delta-seconds or an HTTP date."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2**attempt)))
+
+
+async def post_json(path: str, payload: dict[str, Any], *, timeout: float = 30) -> Any:
+    """POST to OpenRouter and return the decoded JSON body.
+
+    Retries 429/5xx responses and transport errors with jittered backoff,
+    honoring Retry-After. The in-flight limit is released while waiting.
+    """
+    client = get_client()
+    assert _semaphore is not None
+    semaphore = _semaphore
+    body = json.dumps(payload).encode()
+    attempt = 0
+    with stage(f"http{path}"):
+        while True:
+            delay: Optional[float] = None
+            async with semaphore:
+                UPSTREAM_BYTES.inc(len(body), endpoint=path, direction="sent")
+                try:
+                    resp = await client.post(
+                        path, content=body, headers={"Content-Type": "application/json"}, timeout=timeout
+                    )
+                except httpx.TransportError as exc:
+                    UPSTREAM_REQUESTS.inc(endpoint=path, status="transport_error")
+                    if attempt >= HTTP_MAX_RETRIES:
+                        UPSTREAM_ERRORS.inc(endpoint=path, error=type(exc).__name__)
+                        raise
+                    UPSTREAM_RETRIES.inc(endpoint=path, reason="transport_error")
+                else:
+                    UPSTREAM_REQUESTS.inc(endpoint=path, status=resp.status_code)
+                    UPSTREAM_BYTES.inc(len(resp.content), endpoint=path, direction="received")
+                    if resp.status_code not in RETRY_STATUSES or attempt >= HTTP_MAX_RETRIES:
+                        if resp.is_error:
+                            UPSTREAM_ERRORS.inc(endpoint=path, error=resp.status_code)
+                        resp.raise_for_status()
+                        return resp.json()
+                    UPSTREAM_RETRIES.inc(endpoint=path, reason=resp.status_code)
+                    delay = _retry_after(resp)
+            wait = _backoff(attempt)
+            if delay is not None:
+                wait = max(wait, min(delay, HTTP_BACKOFF_MAX))
+            attempt += 1
+            await asyncio.sleep(wait)
@@ -0,0 +1,160 @@
+"""Quantized vector storage with full-precision rerank.
+
+When ``MIND_VECTOR_QUANTIZATION`` is ``int8`` or ``bit``, every embedding is
+also stored in ``vec_memories_q`` as a compact vector (optionally truncated
+to ``MIND_VECTOR_QUANT_DIM`` leading dimensions and re-normalized).
+Searches scan that table for ``k * MIND_VECTOR_RERANK_FACTOR`` candidates
+and rerank them by exact L2 distance against ``vec_memories``.
+
+The table is derived data. Its state lives in ``mind_meta['quantized']`` as
+``"<kind>:<dim>:<building|ready>"``: writes are mirrored while the stored
+kind/dim match the configuration, and searches use it only once ``ready``.
+``backfill()`` (``python -m mind.cli quantize``) builds it for existing rows.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import MIND_EMBEDDING_DIM, VECTOR_QUANT_DIM, VECTOR_QUANTIZATION
+from .db import db_conn, get_meta, set_meta, vec_memories_q_ddl
+from .vectors import Vector
+
+KINDS = ("int8", "bit")
+_META_KEY = "quantized"
+
+
+def _check(kind: str, dim: int) -> None:
+    if kind not in KINDS:
+        raise ValueError(f"Unknown quantization {kind!r}; expected one of {', '.join(KINDS)}")
+    if not 0 < dim <= MIND_EMBEDDING_DIM:
+        raise ValueError(f"Quantized dim must be between 1 and {MIND_EMBEDDING_DIM}")
+    if kind == "bit" and dim % 8:
+        raise ValueError("Binary quantization needs a dimension divisible by 8")
+
+
+def quantize_sql(kind: str = VECTOR_QUANTIZATION, dim: int = VECTOR_QUANT_DIM) -> str:
+    """SQL expression turning a float32 ``?`` parameter into the stored quantized form."""
+    source = "vec_normalize(?)" if dim == MIND_EMBEDDING_DIM else f"vec_normalize(vec_slice(?, 0, {dim}))"
+    if kind == "int8":
+        return f"vec_quantize_int8({source}, 'unit')"
+    return f"vec_quantize_binary({source})"
+
+
+def _state(conn: sqlite3.Connection) -> Optional[str]:
+    """'building' or 'ready' when the stored table matches the configuration, else None."""
+    if VECTOR_QUANTIZATION == "none":
+        return None
+    value = get_meta(conn, _META_KEY)
+    if value is None:
+        return None
+    kind, dim, state = value.split(":")
+    if kind != VECTOR_QUANTIZATION or int(dim) != VECTOR_QUANT_DIM:
+        return None
+    return state
+
+
+def is_ready(conn: sqlite3.Connection) -> bool:
+    return _state(conn) == "ready"
+
+
+def create_table(conn: sqlite3.Connection, state: str) -> None:
+    """(Re)create an empty quantized table for the configured kind/dim."""
+    _check(VECTOR_QUANTIZATION, VECTOR_QUANT_DIM)
+    conn.execute("DROP TABLE IF EXISTS vec_memories_q")
+    conn.execute(vec_memories_q_ddl(VECTOR_QUANTIZATION, VECTOR_QUANT_DIM))
+    set_meta(conn, _META_KEY, f"{VECTOR_QUANTIZATION}:{VECTOR_QUANT_DIM}:{state}")
+
+
+def insert(conn: sqlite3.Connection, rows: Sequence[tuple]) -> None:
+    """Mirror ``(rowid, embedding, type, created_at, user_id, agent_id)`` rows into the quantized table."""
+    if not rows or _state(conn) is None:
+        return
+    conn.executemany(
+        f"""
+        INSERT INTO vec_memories_q(rowid, embedding, type, created_at, user_id, agent_id)
+        VALUES (?, {quantize_sql()}, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+
+
+def delete(conn: sqlite3.Connection, memory_ids: Sequence[int]) -> None:
+    if memory_ids and _state(conn) is not None:
+        conn.executemany("DELETE FROM vec_memories_q WHERE rowid = ?", [(i,) for i in memory_ids])
+
+
+def set_type(conn: sqlite3.Connection, memory_id: int, type_: str) -> None:
+    if _state(conn) is not None:
+        conn.execute("UPDATE vec_memories_q SET type = ? WHERE rowid = ?", (type_, memory_id))
+
+
+def rerank(conn: sqlite3.Connection, query_embedding: Vector, ids: Sequence[int]) -> Dict[int, float]:
+    """Exact L2 distances from the full-precision vectors of ``ids``."""
+    if not ids:
+        return {}
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(
+        f"SELECT rowid, vec_distance_l2(embedding, ?) FROM vec_memories WHERE rowid IN ({placeholders})",
+        [query_embedding, *ids],
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def search(
+    conn: sqlite3.Connection,
+    query_embedding: Vector,
+    k: int,
+    coarse_k: int,
+    vec_filters: List[str],
+    vec_params: List[Any],
+) -> Tuple[List[Tuple[int, float]], bool]:
+    """Coarse KNN on the quantized table, reranked; returns (matches, exhausted)."""
+    where_clause = " AND ".join([f"embedding MATCH {quantize_sql()}", "k = ?", *vec_filters])
+    coarse = conn.execute(
+        f"SELECT rowid FROM vec_memories_q WHERE {where_clause}",
+        [query_embedding, coarse_k, *vec_params],
+    ).fetchall()
+    exact = rerank(conn, query_embedding, [row[0] for row in coarse])
+    matches = sorted(exact.items(), key=lambda item: item[1])[:k]
+    return matches, len(coarse) < coarse_k
+
+
+def backfill(
+    *,
+    rebuild: bool = False,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """Build the quantized table from vec_memories in bounded batches, then mark it ready."""
+    if VECTOR_QUANTIZATION == "none":
+        raise ValueError("Set MIND_VECTOR_QUANTIZATION to 'int8' or 'bit' first")
+    with db_conn() as conn:
+        if rebuild or _state(conn) is None:
+            create_table(conn, "building")
+
+    done = 0
+    last_id = 0
+    while True:
+        with db_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT rowid, embedding, type, created_at, user_id, agent_id
+                FROM vec_memories WHERE rowid > ? ORDER BY rowid LIMIT ?
+                """,
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            # Rows written while the table was building are already mirrored; replace them.
+            delete(conn, ids)
+            insert(conn, [tuple(row) for row in rows])
+        last_id = ids[-1]
+        done += len(rows)
+        if progress is not None:
+            progress(done)
+
+    with db_conn() as conn:
+        set_meta(conn, _META_KEY, f"{VECTOR_QUANTIZATION}:{VECTOR_QUANT_DIM}:ready")
+    return {"kind": VECTOR_QUANTIZATION, "dim": VECTOR_QUANT_DIM, "rows": done}
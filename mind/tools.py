@@ -0,0 +1,399 @@
+"""The ``mind_*`` tool functions shared by the Gradio UI and the headless MCP server.
+
+Nothing here imports Gradio: the docstrings and type hints are what both
+Gradio and the MCP SDK turn into tool descriptions and input schemas.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Callable, Optional
+
+from . import access, ann, clustering, maintenance, memory_engine, metrics
+from .config import GRAPH_HOPS, RANKING, SEARCH_MODE
+from .embeddings import cache_stats
+
+
+def _split_tags(text: str | None) -> list[str] | None:
+    """Split a comma-separated tags string into a clean list."""
+    if not text:
+        return None
+    return [t.strip() for t in text.split(",") if t.strip()]
+
+
+# What mind_list_memories returns unless the caller asks for other fields.
+_LIST_FIELDS = ("type", "text", "summary", "tags", "importance", "created_at")
+
+
+def _split_fields(text: str | None) -> list[str] | None:
+    """Split a comma-separated fields string; None (every field) when empty."""
+    if not text:
+        return None
+    return [f.strip() for f in text.split(",") if f.strip()] or None
+
+
+def _split_batch(texts: str) -> list:
+    """Parse bulk input: a JSON array (of strings or objects) or one memory per line."""
+    stripped = texts.strip()
+    if stripped.startswith("["):
+        items = json.loads(stripped)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of memories")
+        return items
+    return [line.strip() for line in stripped.splitlines() if line.strip()]
+
+
+# ---------- MCP tool functions (minimal parameter sets) ----------
+
+
+async def mind_add_memory(
+    text: str,
+    tags_text: str | None = None,
+    importance: float = 0.5,
+    user_id: str | None = None,
+    agent_id: str | None = None,
+):
+    """
+    Store a new long-term memory in Mind.
+
+    Use this tool whenever the user says things like:
+    - "remember that ..."
+    - "save this in Mind"
+    - "use Mind to remember that I need to look at X"
+
+    Args:
+        text: Natural-language text to remember.
+        tags_text: Optional comma-separated tags (e.g. "work, aurora").
+        importance: Optional importance score between 0.0 (low) and 1.0 (critical).
+        user_id: Optional user the memory belongs to; set it (or agent_id) when several
+            users or agents share one Mind, and pass the same ids when searching.
+        agent_id: Optional agent the memory belongs to.
+
+    Returns:
+        The stored memory record (including id, uuid, type, tags, importance, etc.).
+    """
+    return await memory_engine.create_memory(
+        text=text,
+        tags=_split_tags(tags_text),
+        importance=importance,
+        user_id=user_id or None,
+        agent_id=agent_id or None,
+        # Let the engine + MIND_AI_ASSIST handle type/tags/summary inference.
+        source="ui",
+        use_ai=True,
+    )
+
+
+async def import_memories(
+    texts: str,
+    tags_text: str | None = None,
+    importance: float = 0.5,
+    user_id: str | None = None,
+    agent_id: str | None = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+):
+    """Body of ``mind_add_memories``; ``progress(done, total)`` lets the UI draw a progress bar."""
+    items = []
+    for item in _split_batch(texts):
+        spec = dict(item) if isinstance(item, dict) else {"text": item}
+        if "tags" not in spec and tags_text:
+            spec["tags"] = _split_tags(tags_text)
+        spec.setdefault("importance", importance)
+        if user_id:
+            spec.setdefault("user_id", user_id)
+        if agent_id:
+            spec.setdefault("agent_id", agent_id)
+        items.append(spec)
+    return await memory_engine.create_memories_batch(items, source="ui", use_ai=True, progress=progress)
+
+
+async def mind_add_memories(
+    texts: str,
+    tags_text: str | None = None,
+    importance: float = 0.5,
+    user_id: str | None = None,
+    agent_id: str | None = None,
+):
+    """
+    Store many memories in Mind at once (bulk import).
+
+    Use this tool when the user wants to import a batch of notes, e.g.:
+    - "save all of these notes to Mind"
+    - "import this conversation transcript into Mind"
+
+    Args:
+        texts: Either one memory per line, or a JSON array of strings or of objects
+            with "text" and optional "type", "tags", "importance", "summary".
+        tags_text: Optional comma-separated tags applied to items that do not set their own.
+        importance: Default importance (0.0-1.0) for items that do not set their own.
+        user_id: Optional user the memories belong to (items may set their own "user_id").
+        agent_id: Optional agent the memories belong to (items may set their own "agent_id").
+
+    Returns:
+        A summary with "total", "created" (index, id, uuid per stored memory) and
+        "failed" (index and error per item that could not be stored).
+    """
+    return await import_memories(texts, tags_text, importance, user_id, agent_id)
+
+
+async def mind_search_memory(
+    query: str,
+    max_results: int = 20,
+    tags_text: str | None = None,
+    mode: str = SEARCH_MODE,
+    fields: str | None = None,
+    include_archive: bool = False,
+    graph_hops: int = GRAPH_HOPS,
+    ranking: str = RANKING,
+    user_id: str | None = None,
+    agent_id: str | None = None,
+):
+    """
+    Search Mind for relevant memories using semantic similarity, keywords, or both.
+
+    Use this tool when the user asks things like:
+    - "use Mind to tell me what I worked on yesterday"
+    - "what does Mind remember about Project Aurora?"
+    - "search Mind for my editor preferences"
+
+    Args:
+        query: Natural-language query describing what to retrieve.
+        max_results: Maximum number of memories to return (1–100).
+        tags_text: Optional comma-separated tags; only memories carrying all of them are returned.
+        mode: "vector" (semantic), "lexical" (exact keywords such as ids, codenames or
+            error strings; fastest) or "hybrid" (both rankings fused).
+        fields: Optional comma-separated fields to return, e.g. "text,tags,created_at"
+            (`id` and the score are always included); every field when empty.
+        include_archive: Also search old, rarely used memories moved to the archive
+            (slower; such results carry `archived: true`).
+        graph_hops: Also return memories linked to the top results through up to this many
+            relations (0 = off); they come last and carry `graph_score`, `hops` and `via`.
+        ranking: "relevance" (match quality only) or "blend" (also favour important, recent
+            and recently used memories; results carry `rank_score`).
+        user_id: Optional; only search this user's memories.
+        agent_id: Optional; only search this agent's memories.
+
+    Returns:
+        A list of matching memories: `distance` for vector results (smaller is closer),
+        `bm25` for lexical results (more negative is better), `score` for hybrid results.
+    """
+    # We just pass through to the engine's search.
+    return await memory_engine.search_memories(
+        query=query,
+        top_k=max_results,
+        tags=_split_tags(tags_text),
+        mode=mode,
+        fields=_split_fields(fields),
+        include_archive=bool(include_archive),
+        graph_hops=max(0, min(int(graph_hops), 3)),
+        ranking=ranking,
+        user_id=user_id or None,
+        agent_id=agent_id or None,
+    )
+
+
+async def mind_list_memories(
+    max_results: int = 20,
+    cursor: str | None = None,
+    tags_text: str | None = None,
+    type_filter: str | None = None,
+    since: int | None = None,
+    until: int | None = None,
+    fields: str | None = None,
+    user_id: str | None = None,
+    agent_id: str | None = None,
+):
+    """
+    Browse Mind's memories newest first, one page at a time, without a search query.
+
+    Use this tool when the user asks things like:
+    - "what did I save in Mind this week?"
+    - "show me my latest tasks in Mind"
+    - "list everything Mind has tagged work"
+
+    Args:
+        max_results: Page size (1–100).
+        cursor: The `next_cursor` of the previous page; empty for the first page.
+        tags_text: Optional comma-separated tags; only memories carrying all of them are listed.
+        type_filter: Optional memory type (fact, preference, task, journal, note).
+        since: Optional unix timestamp; only memories created at or after it.
+        until: Optional unix timestamp; only memories created at or before it.
+        fields: Optional comma-separated fields to return (`id` is always included);
+            defaults to type, text, summary, tags, importance and created_at.
+        user_id: Optional; only list this user's memories.
+        agent_id: Optional; only list this agent's memories.
+
+    Returns:
+        {"items": [...], "next_cursor": "..."}; `next_cursor` is null on the last page.
+    """
+    return await memory_engine.list_memories(
+        limit=max(1, min(int(max_results), 100)),
+        cursor=cursor or None,
+        tags=_split_tags(tags_text),
+        type_filter=type_filter or None,
+        since=since,
+        until=until,
+        fields=_split_fields(fields) or _LIST_FIELDS,
+        user_id=user_id or None,
+        agent_id=agent_id or None,
+    )
+
+
+async def mind_list_tags(
+    prefix: str | None = None,
+    max_results: int = 50,
+):
+    """
+    List the tags used in Mind with how many memories carry each one.
+
+    Use this tool when the user asks things like:
+    - "what tags do I have in Mind?"
+    - "which topics does Mind know most about?"
+
+    Args:
+        prefix: Optional prefix to narrow the list (e.g. "proj").
+        max_results: Maximum number of tags to return.
+
+    Returns:
+        A list of {"tag", "count"} objects, most used first.
+    """
+    return await memory_engine.list_tags(prefix=prefix or None, limit=int(max_results))
+
+
+async def mind_list_clusters(max_results: int = 50):
+    """
+    List the topic clusters Mind has grouped memories into.
+
+    Use this tool when the user asks things like:
+    - "what topics does Mind know about?"
+    - "give me an overview of my memories"
+
+    Args:
+        max_results: Maximum number of clusters to return.
+
+    Returns:
+        A list of {"id", "label", "summary", "size", "updated_at"} objects, largest first.
+        Labels are empty until the LLM has named the cluster.
+    """
+    return await clustering.list_clusters(limit=int(max_results))
+
+
+async def mind_link_memories(from_id: int, to_id: int, kind: str = "related"):
+    """
+    Record that one memory relates to another in Mind, so searches can surface them together.
+
+    Use this tool when the user says things like:
+    - "link memory 12 to memory 40 in Mind"
+    - "note in Mind that this decision came from that meeting"
+
+    Args:
+        from_id: The numeric id of the memory the relation starts from.
+        to_id: The numeric id of the memory it points to.
+        kind: The relation, e.g. "related", "derived_from", "supports", "contradicts".
+
+    Returns:
+        The relation {"id", "from_id", "to_id", "kind", "created_at"}, or null if either memory does not exist.
+    """
+    return await memory_engine.create_relation(int(from_id), int(to_id), kind or "related")
+
+
+async def mind_unlink_memories(from_id: int, to_id: int, kind: str | None = None):
+    """
+    Remove a relation between two memories in Mind.
+
+    Args:
+        from_id: The numeric id of the memory the relation starts from.
+        to_id: The numeric id of the memory it points to.
+        kind: Only remove relations of this kind; all kinds when empty.
+
+    Returns:
+        {"deleted": <number of relations removed>}.
+    """
+    return {"deleted": await memory_engine.delete_relation(int(from_id), int(to_id), kind or None)}
+
+
+async def mind_list_relations(memory_id: int, kind: str | None = None, max_results: int = 50):
+    """
+    List the memories related to a memory in Mind.
+
+    Use this tool when the user asks things like:
+    - "what is linked to memory 12 in Mind?"
+    - "what in Mind supports this decision?"
+
+    Args:
+        memory_id: The numeric id of the memory.
+        kind: Optional relation kind to filter on.
+        max_results: Maximum number of relations to return.
+
+    Returns:
+        A list of {"id", "from_id", "to_id", "kind", "created_at", "direction", "memory"} objects,
+        newest first; `direction` is "out" or "in" and `memory` is the memory at the other end.
+    """
+    return await memory_engine.list_relations(int(memory_id), kind=kind or None, limit=int(max_results))
+
+
+async def mind_delete_memory(memory_id: int):
+    """
+    Delete (soft-delete) a memory from Mind by its numeric id.
+
+    Use this tool when the user clearly wants to forget something, e.g.:
+    - "remove this from Mind"
+    - "delete that old memory from Mind"
+    - "delete memory 42 from Mind"
+
+    Args:
+        memory_id: The numeric id of the memory to delete.
+
+    Returns:
+        A small dict confirming which id was deleted.
+    """
+    await memory_engine.delete_memory(memory_id)
+    return {"deleted_id": memory_id}
+
+
+def _stats() -> dict:
+    return {
+        **metrics.snapshot(),
+        "embedding_cache": cache_stats(),
+        "ann_index": ann.stats(),
+        "clusters": clustering.stats(),
+        "maintenance": maintenance.stats(),
+        "access_pending": access.pending(),
+    }
+
+
+async def mind_stats():
+    """
+    Report Mind's health and performance counters.
+
+    Use this tool when the user asks why Mind is slow, how big the store is,
+    or whether OpenRouter calls are failing, e.g.:
+    - "how many memories does Mind hold?"
+    - "where does the time go when adding a memory?"
+
+    Returns:
+        "stages" with count/mean/p50/p95/p99 latency (ms) per operation and stage
+        (classify, embed, http calls, db waits and writes, search phases), plus
+        counters and gauges (upstream requests/retries/errors, bytes, tokens, row
+        counts, file sizes, enrichment queue), the embedding cache, ANN index, clustering,
+        storage maintenance state and access times waiting to be written.
+    """
+    # Row counts and file sizes are read from SQLite; keep them off the event loop.
+    return await asyncio.to_thread(_stats)
+
+
+
+# Served by the headless MCP server (mind.mcp_server); the UI registers the same functions.
+MCP_TOOLS = (
+    mind_add_memory,
+    mind_add_memories,
+    mind_search_memory,
+    mind_list_memories,
+    mind_list_tags,
+    mind_list_clusters,
+    mind_link_memories,
+    mind_unlink_memories,
+    mind_list_relations,
+    mind_delete_memory,
+    mind_stats,
+)
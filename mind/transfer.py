@@ -0,0 +1,367 @@
+"""Streaming export and import of a Mind store, embeddings included.
+
+    python -m mind.cli export mind-export.jsonl.gz [--include-deleted]
+    python -m mind.cli import mind-export.jsonl.gz [--any-model]
+
+The file is JSON Lines (gzip-compressed when the name ends in ``.gz``): a
+``header`` record with the embedding model and dimension, then
+``cluster``, ``memory`` and ``relation`` records. Embeddings and centroids
+are the raw little-endian float32 blobs, base64-encoded. Relations name
+their ends by ``uuid``, so ids never leave the store they belong to.
+
+Export reads one page of memories at a time, so memory use is bounded by
+the page size whatever the store size. Import loads the records straight
+into `memories`, `vec_memories` and the derived tables, one transaction
+per page, without calling OpenRouter: memories get fresh ids, and a
+``uuid`` already present (live, deleted or archived) is skipped. Clusters
+are only imported into a store that has none; otherwise imported memories
+arrive unassigned and the next rebalance places them. Archived memories
+are not exported; restore them first.
+"""
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Union
+
+from .config import MIND_EMBEDDING_DIM, MIND_EMBEDDING_MODEL
+from .db import MEMORIES_FTS_INSERT_TRIGGER, SCHEMA_VERSION, attach_archive, db_conn, db_read, now_ts, set_meta
+from .memory_engine import MEMORY_FIELDS, _normalize_tags, _parse_tags, _store_vectors, _vec_row
+from .metrics import stage
+
+FORMAT = "mind"
+FORMAT_VERSION = 1
+# Memory columns written per record; ids are local to a store, uuids are not.
+_EXPORTED = tuple(field for field in MEMORY_FIELDS if field != "id")
+
+PathLike = Union[str, Path]
+
+
+def _open(path: PathLike, mode: str) -> TextIO:
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _b64(blob: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(blob).decode("ascii") if blob is not None else None
+
+
+def _line(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def dump(
+    path: PathLike,
+    *,
+    include_deleted: bool = False,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """Write the store to ``path``; ``progress(memories)`` is called after each page."""
+    counts = {"clusters": 0, "memories": 0, "relations": 0}
+    live = "" if include_deleted else "AND m.deleted_at IS NULL"
+    live_ends = "" if include_deleted else "AND f.deleted_at IS NULL AND t.deleted_at IS NULL"
+    with stage("transfer.export"), _open(path, "w") as out:
+        out.write(
+            _line(
+                {
+                    "record": "header",
+                    "format": FORMAT,
+                    "version": FORMAT_VERSION,
+                    "schema": SCHEMA_VERSION,
+                    "embedding_model": MIND_EMBEDDING_MODEL,
+                    "embedding_dim": MIND_EMBEDDING_DIM,
+                    "exported_at": now_ts(),
+                }
+            )
+        )
+        with db_read() as conn:
+            clusters = conn.execute(
+                """
+                SELECT c.id, c.label, c.summary, c.created_at, c.updated_at, c.labeled_size, v.embedding
+                FROM clusters c JOIN vec_clusters v ON v.rowid = c.id ORDER BY c.id
+                """
+            ).fetchall()
+        for row in clusters:
+            record = {"record": "cluster", **dict(row)}
+            record["centroid"] = _b64(record.pop("embedding"))
+            out.write(_line(record))
+        counts["clusters"] = len(clusters)
+
+        last_id = 0
+        while True:
+            with db_read() as conn:
+                page = conn.execute(
+                    f"""
+                    SELECT m.id, {", ".join(f"m.{column}" for column in _EXPORTED)}, v.embedding
+                    FROM memories m LEFT JOIN vec_memories v ON v.rowid = m.id
+                    WHERE m.id > ? {live}
+                    ORDER BY m.id LIMIT ?
+                    """,
+                    (last_id, batch_size),
+                ).fetchall()
+            if not page:
+                break
+            for row in page:
+                record = {"record": "memory", **{column: row[column] for column in _EXPORTED}}
+                record["tags"] = _parse_tags(record["tags"])
+                record["embedding"] = _b64(row["embedding"])
+                out.write(_line(record))
+            last_id = page[-1]["id"]
+            counts["memories"] += len(page)
+            if progress is not None:
+                progress(counts["memories"])
+
+        last_id = 0
+        while True:
+            with db_read() as conn:
+                page = conn.execute(
+                    f"""
+                    SELECT r.id, f.uuid AS from_uuid, t.uuid AS to_uuid, r.kind, r.created_at
+                    FROM memory_relations r
+                    JOIN memories f ON f.id = r.from_id
+                    JOIN memories t ON t.id = r.to_id
+                    WHERE r.id > ? {live_ends}
+                    ORDER BY r.id LIMIT ?
+                    """,
+                    (last_id, batch_size),
+                ).fetchall()
+            if not page:
+                break
+            for row in page:
+                out.write(
+                    _line(
+                        {
+                            "record": "relation",
+                            "from": row["from_uuid"],
+                            "to": row["to_uuid"],
+                            "kind": row["kind"],
+                            "created_at": row["created_at"],
+                        }
+                    )
+                )
+            last_id = page[-1]["id"]
+            counts["relations"] += len(page)
+    return {"path": str(path), **counts}
+
+
+def _records(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Line {number} is not valid JSON: {exc}") from None
+
+
+def _check_header(header: Dict[str, Any], any_model: bool) -> None:
+    if header.get("record") != "header" or header.get("format") != FORMAT:
+        raise ValueError("Not a Mind export: the first record must be its header")
+    if header.get("version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Export format version {header['version']} is newer than this Mind understands")
+    if header.get("embedding_dim") != MIND_EMBEDDING_DIM:
+        raise ValueError(
+            f"Export has {header.get('embedding_dim')}-dimensional embeddings; MIND_EMBEDDING_DIM is {MIND_EMBEDDING_DIM}"
+        )
+    if not any_model and header.get("embedding_model") != MIND_EMBEDDING_MODEL:
+        raise ValueError(
+            f"Export was embedded with {header.get('embedding_model')!r}, this store uses {MIND_EMBEDDING_MODEL!r}; "
+            "its vectors would not be comparable (pass any_model to import anyway)"
+        )
+
+
+def _decode_vector(text: Optional[str]) -> Optional[bytes]:
+    if text is None:
+        return None
+    blob = base64.b64decode(text)
+    if len(blob) != MIND_EMBEDDING_DIM * 4:
+        raise ValueError(f"Embedding of {len(blob) // 4} dimensions; expected {MIND_EMBEDDING_DIM}")
+    return blob
+
+
+def _next_memory_id(conn: sqlite3.Connection) -> int:
+    # AUTOINCREMENT's high-water mark also covers ids that were archived or purged.
+    row = conn.execute(
+        """
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'memories'), 0),
+                   COALESCE((SELECT MAX(id) FROM memories), 0))
+        """
+    ).fetchone()
+    return row[0] + 1
+
+
+class _Importer:
+    """Import state carried across pages: id maps and counts."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.clusters: Dict[int, int] = {}
+        self.importing_clusters: Optional[bool] = None
+        self.counts = {"clusters": 0, "memories": 0, "skipped": 0, "relations": 0}
+
+    def clusters_page(self, conn: sqlite3.Connection, records: List[Dict[str, Any]]) -> None:
+        if self.importing_clusters is None:
+            self.importing_clusters = conn.execute("SELECT 1 FROM clusters LIMIT 1").fetchone() is None
+        if not self.importing_clusters:
+            return
+        for record in records:
+            cursor = conn.execute(
+                "INSERT INTO clusters(label, summary, created_at, updated_at, labeled_size) VALUES (?, ?, ?, ?, ?)",
+                (
+                    record.get("label"),
+                    record.get("summary"),
+                    record["created_at"],
+                    record["updated_at"],
+                    record.get("labeled_size", 0),
+                ),
+            )
+            conn.execute(
+                "INSERT INTO vec_clusters(rowid, embedding) VALUES (?, ?)",
+                (cursor.lastrowid, _decode_vector(record["centroid"])),
+            )
+            self.clusters[record["id"]] = cursor.lastrowid
+        self.counts["clusters"] += len(records)
+
+    def memories_page(self, conn: sqlite3.Connection, records: List[Dict[str, Any]], archived: bool) -> None:
+        uuids = [record["uuid"] for record in records]
+        marks = ",".join("?" * len(uuids))
+        # Relations to a memory that already exists attach to it; archived ones are left out.
+        existing = dict(conn.execute(f"SELECT uuid, id FROM main.memories WHERE uuid IN ({marks})", uuids).fetchall())
+        if archived:
+            existing.update(
+                (row[0], 0) for row in conn.execute(f"SELECT uuid FROM archive.memories WHERE uuid IN ({marks})", uuids)
+            )
+        next_id = _next_memory_id(conn)
+        rows, vectors, tags = [], [], []
+        for record in records:
+            uuid = record["uuid"]
+            if uuid in existing or uuid in self.ids:
+                self.ids.setdefault(uuid, existing.get(uuid, 0))
+                self.counts["skipped"] += 1
+                continue
+            memory_id = next_id
+            next_id += 1
+            self.ids[uuid] = memory_id
+            values = {column: record.get(column) for column in _EXPORTED}
+            values["tags"] = _normalize_tags(record.get("tags"))
+            values["cluster_id"] = self.clusters.get(record.get("cluster_id"))
+            values["version"] = values["version"] or 1
+            rows.append((memory_id, *(values[column] for column in _EXPORTED)))
+            if values["deleted_at"] is None:
+                # Tombstones keep neither vectors nor tags, as after delete_memory.
+                embedding = _decode_vector(record.get("embedding"))
+                if embedding is not None:
+                    vectors.append(
+                        _vec_row(
+                            memory_id, embedding, values["type"], values["created_at"],
+                            values["user_id"], values["agent_id"], values["cluster_id"],
+                        )
+                    )
+                tags.extend((memory_id, tag) for tag in _parse_tags(values["tags"]))
+        if not rows:
+            return
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        # Indexing the page with one FTS5 insert is several times faster than the per-row trigger.
+        # The trigger is only missing inside this transaction, so no other write runs without it.
+        conn.execute("DROP TRIGGER memories_fts_insert")
+        conn.executemany(
+            f"INSERT INTO memories (id, {', '.join(_EXPORTED)}) VALUES ({','.join('?' * (len(_EXPORTED) + 1))})",
+            rows,
+        )
+        conn.execute(
+            "INSERT INTO memories_fts(rowid, text, summary, tags) SELECT id, text, summary, tags FROM memories WHERE id >= ?",
+            (rows[0][0],),
+        )
+        conn.execute(MEMORIES_FTS_INSERT_TRIGGER)
+        _store_vectors(conn, vectors)
+        conn.executemany("INSERT INTO memory_tags(memory_id, tag) VALUES (?, ?)", tags)
+        self.counts["memories"] += len(rows)
+
+    def relations_page(self, conn: sqlite3.Connection, records: List[Dict[str, Any]]) -> None:
+        edges = [
+            (self.ids[record["from"]], self.ids[record["to"]], record["kind"], record["created_at"])
+            for record in records
+            if self.ids.get(record["from"]) and self.ids.get(record["to"])
+        ]
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO memory_relations(from_id, to_id, kind, created_at) VALUES (?, ?, ?, ?)", edges
+        )
+        self.counts["relations"] += conn.total_changes - before
+
+    def finish(self, conn: sqlite3.Connection) -> None:
+        if not self.clusters:
+            return
+        conn.execute(
+            f"""
+            UPDATE clusters SET size = (
+              SELECT COUNT(*) FROM memories m WHERE m.cluster_id = clusters.id AND m.deleted_at IS NULL
+            )
+            WHERE id IN ({",".join("?" * len(self.clusters))})
+            """,
+            list(self.clusters.values()),
+        )
+        live = conn.execute("SELECT COUNT(*) FROM memories WHERE deleted_at IS NULL").fetchone()[0]
+        # Record the imported clusters as a build, so the store is not re-clustered straight away.
+        set_meta(conn, "clusters", json.dumps({"rows": live, "clusters": len(self.clusters), "built_at": now_ts()}))
+
+
+def load(
+    path: PathLike,
+    *,
+    any_model: bool = False,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> dict:
+    """Import an export written by ``dump``; ``progress(memories)`` is called after each page.
+
+    Returns counts of imported clusters, memories and relations, and of
+    memories skipped because their uuid already exists.
+    """
+    importer = _Importer()
+    handlers = {
+        "cluster": importer.clusters_page,
+        "memory": importer.memories_page,
+        "relation": importer.relations_page,
+    }
+    with stage("transfer.import"), _open(path, "r") as source:
+        records = _records(source)
+        header = next(records, None)
+        if header is None:
+            raise ValueError("Empty export file")
+        _check_header(header, any_model)
+
+        kind: Optional[str] = None
+        page: List[Dict[str, Any]] = []
+
+        def flush() -> None:
+            if not page:
+                return
+            with db_conn() as conn:
+                if kind == "memory":
+                    handlers[kind](conn, page, attach_archive(conn))
+                else:
+                    handlers[kind](conn, page)
+            if kind == "memory" and progress is not None:
+                progress(importer.counts["memories"] + importer.counts["skipped"])
+            page.clear()
+
+        for record in records:
+            record_kind = record.get("record")
+            if record_kind not in handlers:
+                raise ValueError(f"Unknown record type {record_kind!r}")
+            if record_kind != kind or len(page) >= batch_size:
+                flush()
+                kind = record_kind
+            page.append(record)
+        flush()
+
+    with db_conn() as conn:
+        importer.finish(conn)
+    return {"path": str(path), **importer.counts}
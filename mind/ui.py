@@ -1,8 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
 import gradio as gr
 
-from . import memory_engine
+from . import clustering, maintenance, memory_engine, tools, transfer
+from .config import GRAPH_HOPS, RANKING, SEARCH_MODE
+from .tools import (
+    import_memories,
+    mind_add_memory,
+    mind_delete_memory,
+    mind_link_memories,
+    mind_list_clusters,
+    mind_list_memories,
+    mind_list_relations,
+    mind_list_tags,
+    mind_search_memory,
+    mind_stats,
+    mind_unlink_memories,
+)
 
 # Theme and CSS (same look, simpler logic)
 APP_THEME = gr.themes.Base(
@@ -107,90 +127,57 @@ body {
 """
 
 
-def _split_tags(text: str | None) -> list[str] | None:
-    """Split a comma-separated tags string into a clean list."""
-    if not text:
-        return None
-    return [t.strip() for t in text.split(",") if t.strip()]
+async def mind_add_memories(
+    texts: str,
+    tags_text: str | None = None,
+    importance: float = 0.5,
+    user_id: str | None = None,
+    agent_id: str | None = None,
+    progress=gr.Progress(),
+):
+    def report(done: int, total: int) -> None:
+        progress((done, total), desc="Storing memories")
 
+    return await import_memories(texts, tags_text, importance, user_id, agent_id, progress=report)
 
-# ---------- MCP tool functions (minimal parameter sets) ----------
 
+# Gradio builds the MCP description from the docstring.
+mind_add_memories.__doc__ = tools.mind_add_memories.__doc__
 
-async def mind_add_memory(
-    text: str,
-    tags_text: str | None = None,
-    importance: float = 0.5,
-):
-    """
-    Store a new long-term memory in Mind.
-
-    Use this tool whenever the user says things like:
-    - "remember that ..."
-    - "save this in Mind"
-    - "use Mind to remember that I need to look at X"
-
-    Args:
-        text: Natural-language text to remember.
-        tags_text: Optional comma-separated tags (e.g. "work, aurora").
-        importance: Optional importance score between 0.0 (low) and 1.0 (critical).
-
-    Returns:
-        The stored memory record (including id, uuid, type, tags, importance, etc.).
-    """
-    return await memory_engine.create_memory(
-        text=text,
-        tags=_split_tags(tags_text),
-        importance=importance,
-        # Let the engine + MIND_AI_ASSIST handle type/tags/summary inference.
-        source="ui",
-        use_ai=True,
-    )
 
+async def rebalance_clusters():
+    """Rebuild the clusters now, then label the ones that need it."""
+    result = await asyncio.to_thread(clustering.rebalance)
+    return {**result, **(await clustering.label_clusters())}
+
+
+async def show_cluster(cluster_id: float):
+    return await clustering.cluster_members(int(cluster_id))
+
+
+async def run_maintenance():
+    """Purge, archive, vacuum and checkpoint now."""
+    return await asyncio.to_thread(maintenance.run)
 
-async def mind_search_memory(
-    query: str,
-    max_results: int = 20,
-):
-    """
-    Search Mind for relevant memories using semantic similarity.
-
-    Use this tool when the user asks things like:
-    - "use Mind to tell me what I worked on yesterday"
-    - "what does Mind remember about Project Aurora?"
-    - "search Mind for my editor preferences"
-
-    Args:
-        query: Natural-language query describing what to retrieve.
-        max_results: Maximum number of memories to return (1–100).
-
-    Returns:
-        A list of matching memories, each with a `distance` score.
-    """
-    # We just pass through to the engine's semantic search.
-    return await memory_engine.search_memories(
-        query=query,
-        top_k=max_results,
-    )
 
+async def restore_memory(memory_id: float):
+    return {"restored": await asyncio.to_thread(maintenance.restore, [int(memory_id)])}
 
-async def mind_delete_memory(memory_id: int):
-    """
-    Delete (soft-delete) a memory from Mind by its numeric id.
 
-    Use this tool when the user clearly wants to forget something, e.g.:
-    - "remove this from Mind"
-    - "delete that old memory from Mind"
-    - "delete memory 42 from Mind"
+async def export_store():
+    """Export the store to a temporary .jsonl.gz file for download."""
+    path = Path(tempfile.mkdtemp(prefix="mind-export-")) / f"mind-export-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+    result = await asyncio.to_thread(transfer.dump, path)
+    return str(path), result
 
-    Args:
-        memory_id: The numeric id of the memory to delete.
 
-    Returns:
-        A small dict confirming which id was deleted.
-    """
-    memory_engine.delete_memory(memory_id)
-    return {"deleted_id": memory_id}
+async def import_store(path: Optional[str]):
+    if not path:
+        return {"error": "Choose an export file first"}
+    try:
+        return await asyncio.to_thread(transfer.load, path)
+    except ValueError as exc:
+        return {"error": str(exc)}
 
 
 # ---------- UI wiring ----------
@@ -220,9 +207,13 @@ def build_ui():
     gr.Markdown(
         "##### How to use\n"
         "- **Add**: enter text (and optional tags/importance), click **Save to Mind**.\n"
+        "- **Bulk import**: paste one memory per line (or a JSON array), click **Import**.\n"
         "- **Search**: enter a natural-language query, click **Search Mind**.\n"
+        "- **Browse**: click **Next page** repeatedly to page through memories, newest first.\n"
         "- **Delete**: use the numeric `id` from search results and click **Delete**.\n"
-        "- **MCP**: call `mind_add_memory`, `mind_search_memory`, `mind_delete_memory` from your MCP client.",
+        "- **MCP**: call `mind_add_memory`, `mind_add_memories`, `mind_search_memory`, `mind_list_memories`, "
+        "`mind_list_tags`, `mind_link_memories`, `mind_unlink_memories`, `mind_list_relations`, "
+        "`mind_list_clusters`, `mind_delete_memory`, `mind_stats` from your MCP client.",
         elem_classes=["caption", "mind-card"],
     )
 
@@ -248,16 +239,50 @@ def build_ui():
                     value=0.5,
                     info="0 = low, 1 = critical",
                 )
+                with gr.Row():
+                    add_user = gr.Textbox(label="User id (optional)")
+                    add_agent = gr.Textbox(label="Agent id (optional)")
                 add_btn = gr.Button("Save to Mind", elem_classes=["primary"])
                 add_output = gr.JSON(label="Created memory")
 
                 add_btn.click(
                     fn=mind_add_memory,
-                    inputs=[memory_text, tags_text, importance],
+                    inputs=[memory_text, tags_text, importance, add_user, add_agent],
                     outputs=add_output,
                     api_name="mind_add_memory",
                 )
 
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown("#### Bulk import", elem_classes=["caption"])
+                batch_text = gr.Textbox(
+                    label="Memories (one per line, or a JSON array)",
+                    lines=10,
+                    placeholder="Prefers dark mode\nWorking on Project Aurora\n...",
+                )
+                batch_tags = gr.Textbox(
+                    label="Tags for all items (optional, comma-separated)",
+                    placeholder="import, notes",
+                )
+                batch_importance = gr.Slider(
+                    label="Importance",
+                    minimum=0.0,
+                    maximum=1.0,
+                    step=0.05,
+                    value=0.5,
+                )
+                with gr.Row():
+                    batch_user = gr.Textbox(label="User id (optional)")
+                    batch_agent = gr.Textbox(label="Agent id (optional)")
+                batch_btn = gr.Button("Import", elem_classes=["primary"])
+                batch_output = gr.JSON(label="Import result")
+
+                batch_btn.click(
+                    fn=mind_add_memories,
+                    inputs=[batch_text, batch_tags, batch_importance, batch_user, batch_agent],
+                    outputs=batch_output,
+                    api_name="mind_add_memories",
+                )
+
         # ---- Search tab ----
         with gr.Tab("Search"):
             with gr.Column(elem_classes=["mind-card"]):
@@ -273,16 +298,153 @@ def build_ui():
                     step=1,
                     value=20,
                 )
+                search_tags = gr.Textbox(
+                    label="Only with tags (optional, comma-separated)",
+                    placeholder="work, aurora",
+                )
+                search_mode = gr.Radio(
+                    label="Mode",
+                    choices=list(memory_engine.SEARCH_MODES),
+                    value=SEARCH_MODE,
+                    info="lexical = keyword match without calling OpenRouter",
+                )
+                with gr.Row():
+                    search_fields = gr.Textbox(
+                        label="Fields (optional, comma-separated)",
+                        placeholder="text, tags, created_at",
+                    )
+                    search_archive = gr.Checkbox(label="Include archive", value=False)
+                    search_hops = gr.Slider(
+                        label="Related hops",
+                        minimum=0,
+                        maximum=3,
+                        step=1,
+                        value=GRAPH_HOPS,
+                        info="Also show memories linked to the top results",
+                    )
+                    search_ranking = gr.Radio(
+                        label="Ranking",
+                        choices=list(memory_engine.RANKINGS),
+                        value=RANKING,
+                        info="blend = also favour important, recent and recently used memories",
+                    )
+                with gr.Row():
+                    search_user = gr.Textbox(label="User id (optional)")
+                    search_agent = gr.Textbox(label="Agent id (optional)")
                 search_btn = gr.Button("Search Mind", elem_classes=["primary"])
                 search_output = gr.JSON(label="Matches", show_label=False)
 
                 search_btn.click(
                     fn=mind_search_memory,
-                    inputs=[query, max_results],
+                    inputs=[
+                        query,
+                        max_results,
+                        search_tags,
+                        search_mode,
+                        search_fields,
+                        search_archive,
+                        search_hops,
+                        search_ranking,
+                        search_user,
+                        search_agent,
+                    ],
                     outputs=search_output,
                     api_name="mind_search_memory",
                 )
 
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown("#### Browse", elem_classes=["caption"])
+                browse_limit = gr.Number(label="Page size", value=20, precision=0)
+                browse_tags = gr.Textbox(
+                    label="Only with tags (optional, comma-separated)",
+                    placeholder="work, aurora",
+                )
+                with gr.Row():
+                    browse_type = gr.Textbox(label="Type (optional)", placeholder="task")
+                    browse_since = gr.Number(label="Created since (unix time)", precision=0)
+                    browse_until = gr.Number(label="Created until (unix time)", precision=0)
+                    browse_fields = gr.Textbox(
+                        label="Fields (optional, comma-separated)",
+                        placeholder="text, tags, created_at",
+                    )
+                with gr.Row():
+                    browse_user = gr.Textbox(label="User id (optional)")
+                    browse_agent = gr.Textbox(label="Agent id (optional)")
+                browse_cursor = gr.Textbox(
+                    label="Cursor",
+                    info="Filled in after each page; clear it to start again from the newest.",
+                )
+                browse_btn = gr.Button("Next page", elem_classes=["secondary"])
+                browse_output = gr.JSON(label="Memories", show_label=False)
+
+                browse_btn.click(
+                    fn=mind_list_memories,
+                    inputs=[
+                        browse_limit,
+                        browse_cursor,
+                        browse_tags,
+                        browse_type,
+                        browse_since,
+                        browse_until,
+                        browse_fields,
+                        browse_user,
+                        browse_agent,
+                    ],
+                    outputs=browse_output,
+                    api_name="mind_list_memories",
+                ).then(
+                    fn=lambda page: page.get("next_cursor") or "",
+                    inputs=[browse_output],
+                    outputs=browse_cursor,
+                    api_visibility="private",
+                )
+
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown("#### Relations", elem_classes=["caption"])
+                with gr.Row():
+                    relation_from = gr.Number(label="From id", precision=0)
+                    relation_to = gr.Number(label="To id", precision=0)
+                    relation_kind = gr.Textbox(label="Kind", value="related")
+                    relation_limit = gr.Number(label="Max relations", value=50, precision=0)
+                with gr.Row():
+                    link_btn = gr.Button("Link", elem_classes=["secondary"])
+                    unlink_btn = gr.Button("Unlink", elem_classes=["secondary"])
+                    relations_btn = gr.Button("List relations of From id (of Kind)", elem_classes=["secondary"])
+                relations_output = gr.JSON(label="Relations", show_label=False)
+
+                link_btn.click(
+                    fn=mind_link_memories,
+                    inputs=[relation_from, relation_to, relation_kind],
+                    outputs=relations_output,
+                    api_name="mind_link_memories",
+                )
+                unlink_btn.click(
+                    fn=mind_unlink_memories,
+                    inputs=[relation_from, relation_to, relation_kind],
+                    outputs=relations_output,
+                    api_name="mind_unlink_memories",
+                )
+                relations_btn.click(
+                    fn=mind_list_relations,
+                    inputs=[relation_from, relation_kind, relation_limit],
+                    outputs=relations_output,
+                    api_name="mind_list_relations",
+                )
+
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown("#### Tags", elem_classes=["caption"])
+                tag_prefix = gr.Textbox(label="Tag prefix (optional)")
+                tag_limit = gr.Number(label="Max tags", value=50, precision=0)
+                tags_btn = gr.Button("List tags", elem_classes=["secondary"])
+                tags_output = gr.JSON(label="Tags", show_label=False)
+
+                tags_btn.click(
+                    fn=mind_list_tags,
+                    inputs=[tag_prefix, tag_limit],
+                    outputs=tags_output,
+                    api_name="mind_list_tags",
+                )
+
             with gr.Column(elem_classes=["mind-card"]):
                 gr.Markdown("#### Delete a memory", elem_classes=["caption"])
                 delete_id = gr.Number(label="Memory id", precision=0)
@@ -296,17 +458,109 @@ def build_ui():
                     api_name="mind_delete_memory",
                 )
 
-        # ---- Future tabs ----
+        # ---- Clusters tab ----
         with gr.Tab("Clusters"):
-            gr.Markdown(
-                "Clusters UI coming soon. Mind already has schema support for clusters and relations; "
-                "a future version will group related memories here.",
-                elem_classes=["mind-card"],
-            )
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown(
+                    "#### Topics\nMemories are grouped automatically once the store is large enough "
+                    "(`MIND_AUTO_CLUSTER`); labels come from the LLM.",
+                    elem_classes=["caption"],
+                )
+                clusters_limit = gr.Number(label="Max clusters", value=50, precision=0)
+                with gr.Row():
+                    clusters_btn = gr.Button("List clusters", elem_classes=["secondary"])
+                    rebalance_btn = gr.Button("Rebalance now", elem_classes=["secondary"])
+                clusters_output = gr.JSON(label="Clusters", show_label=False)
+
+                clusters_btn.click(
+                    fn=mind_list_clusters,
+                    inputs=[clusters_limit],
+                    outputs=clusters_output,
+                    api_name="mind_list_clusters",
+                )
+                rebalance_btn.click(
+                    fn=rebalance_clusters,
+                    inputs=[],
+                    outputs=clusters_output,
+                    api_visibility="private",
+                )
 
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown("#### Cluster members", elem_classes=["caption"])
+                member_cluster = gr.Number(label="Cluster id", precision=0)
+                members_btn = gr.Button("Show members", elem_classes=["secondary"])
+                members_output = gr.JSON(label="Members", show_label=False)
+
+                members_btn.click(
+                    fn=show_cluster,
+                    inputs=[member_cluster],
+                    outputs=members_output,
+                    api_visibility="private",
+                )
+
+        # ---- Settings tab ----
         with gr.Tab("Settings"):
-            gr.Markdown(
-                "Settings UI coming soon. This will surface AI assist toggles, model choices, "
-                "and export/import for your `mind.db`.",
-                elem_classes=["mind-card"],
-            )
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown("#### Stats", elem_classes=["caption"])
+                stats_btn = gr.Button("Refresh stats", elem_classes=["secondary"])
+                stats_output = gr.JSON(label="Stats", show_label=False)
+
+                stats_btn.click(
+                    fn=mind_stats,
+                    inputs=[],
+                    outputs=stats_output,
+                    api_name="mind_stats",
+                )
+
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown(
+                    "#### Maintenance\nPurges old deleted memories (with `MIND_PURGE_AFTER_DAYS` set), moves cold ones to the archive, "
+                    "returns free space to disk and truncates the WAL. Runs on its own every "
+                    "`MIND_MAINTENANCE_INTERVAL_SECONDS`.",
+                    elem_classes=["caption"],
+                )
+                with gr.Row():
+                    maintenance_btn = gr.Button("Run maintenance now", elem_classes=["secondary"])
+                    restore_id = gr.Number(label="Archived memory id", precision=0)
+                    restore_btn = gr.Button("Restore", elem_classes=["secondary"])
+                maintenance_output = gr.JSON(label="Maintenance", show_label=False)
+
+                maintenance_btn.click(
+                    fn=run_maintenance,
+                    inputs=[],
+                    outputs=maintenance_output,
+                    api_visibility="private",
+                )
+                restore_btn.click(
+                    fn=restore_memory,
+                    inputs=[restore_id],
+                    outputs=maintenance_output,
+                    api_visibility="private",
+                )
+
+            with gr.Column(elem_classes=["mind-card"]):
+                gr.Markdown(
+                    "#### Export / import\nMoves memories, tags, relations, clusters and embeddings between "
+                    "Mind stores. Importing calls no model, and skips memories that are already here.",
+                    elem_classes=["caption"],
+                )
+                with gr.Row():
+                    export_btn = gr.Button("Export", elem_classes=["secondary"])
+                    export_file = gr.File(label="Export file", interactive=False)
+                with gr.Row():
+                    import_file = gr.File(label="Export to import", file_types=[".jsonl", ".gz"], type="filepath")
+                    import_btn = gr.Button("Import", elem_classes=["secondary"])
+                transfer_output = gr.JSON(label="Export / import", show_label=False)
+
+                export_btn.click(
+                    fn=export_store,
+                    inputs=[],
+                    outputs=[export_file, transfer_output],
+                    api_visibility="private",
+                )
+                import_btn.click(
+                    fn=import_store,
+                    inputs=[import_file],
+                    outputs=transfer_output,
+                    api_visibility="private",
+                )
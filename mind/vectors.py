@@ -0,0 +1,60 @@
+"""Packed little-endian float32 vectors, the format sqlite-vec stores natively.
+
+Embeddings travel through Mind as ``bytes`` from the moment the HTTP
+response is decoded until they reach ``vec_memories``; nothing keeps a
+list of Python floats around. NumPy is used for packing when installed.
+"""
+from __future__ import annotations
+
+import base64
+import sys
+from array import array
+from typing import Any, Iterable, List
+
+try:  # Optional: faster packing straight from the decoded JSON list.
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+Vector = bytes
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def pack(values: Iterable[float]) -> Vector:
+    """Pack floats into a little-endian float32 buffer."""
+    if np is not None:
+        return np.asarray(values, dtype="<f4").tobytes()
+    packed = array("f", values)
+    if _BIG_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def from_base64(text: str) -> Vector:
+    """Decode an OpenAI-style ``encoding_format="base64"`` embedding (already little-endian float32)."""
+    return base64.b64decode(text)
+
+
+def decode(raw: Any) -> Vector:
+    """Convert an embedding from an API response (float list or base64 string) into a packed vector."""
+    if isinstance(raw, str):
+        return from_base64(raw)
+    return pack(raw)
+
+
+def unpack(vector: Vector) -> array:
+    """View a packed vector as an ``array('f')`` in native byte order."""
+    values = array("f")
+    values.frombytes(vector)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def to_list(vector: Vector) -> List[float]:
+    return unpack(vector).tolist()
+
+
+def dimension(vector: Vector) -> int:
+    return len(vector) // 4